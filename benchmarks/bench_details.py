@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+"""
+Mesure la latence par commande de PkgQuery, avant et après le chargement
+différé des champs de PkgDetails.
+
+« avant » reproduit l'ancien chargement complet à la construction
+(details.resolve() juste après PkgQuery(...)) ; « après » ne charge que les
+champs lus par la commande.
+
+    PYTHONPATH=. python benchmarks/bench_details.py [--package zstd] [--binary] [--repeat 20]
+"""
+import argparse
+import time
+from nbpkg.pkginspect.nbpkgdescr import PkgQuery
+
+SOURCE_COMMANDS = {
+    "construction": lambda query: None,
+    "show": lambda query: query.show(),
+    "depends": lambda query: query.depends().dependencies,
+    "provides": lambda query: query.provides().files,
+}
+BINARY_COMMANDS = {
+    "construction": lambda query: None,
+    "show": lambda query: query.show(),
+    "depends": lambda query: query.depends().dependencies,
+    "history": lambda query: query.history().files,
+    "outdated": lambda query: query.outdated().comment,
+}
+
+
+def run(package: str, binary: bool, command, eager: bool) -> float:
+    start = time.perf_counter()
+    query = PkgQuery(package, binary=binary)
+    if eager:
+        query.details.resolve()
+    try:
+        command(query)
+    except Exception:
+        pass  # Paquet non installé, journal absent... : seule la latence compte ici
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--package", default="zstd")
+    parser.add_argument("--binary", action="store_true")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    commands = BINARY_COMMANDS if args.binary else SOURCE_COMMANDS
+    print(f"{'commande':<14}{'avant (ms)':>12}{'après (ms)':>12}")
+    for name, command in commands.items():
+        medians = []
+        for eager in (True, False):
+            latencies = sorted(run(args.package, args.binary, command, eager) for _ in range(args.repeat))
+            medians.append(latencies[len(latencies) // 2] * 1000)
+        print(f"{name:<14}{medians[0]:12.3f}{medians[1]:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
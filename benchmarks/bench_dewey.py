@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+"""
+Mesure la comparaison dewey groupée de check_package_versions : N couples
+(installée, pkgsrc) générés aléatoirement, clés encodées à froid puis
+réutilisées (cache de version_key).
+
+    PYTHONPATH=. python benchmarks/bench_dewey.py [--pairs 2000]
+"""
+import argparse
+import random
+import time
+from nbpkg.pkginspect.dewey import compare_versions, version_key
+
+
+def random_version(rng: random.Random) -> str:
+    version = ".".join(str(rng.randint(0, 40)) for _ in range(rng.randint(1, 4)))
+    if rng.random() < 0.1:
+        version += rng.choice(["alpha", "beta", "rc", "pl"]) + str(rng.randint(1, 5))
+    if rng.random() < 0.3:
+        version += f"nb{rng.randint(1, 9)}"
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(2024)
+    pairs = [(random_version(rng), random_version(rng)) for _ in range(args.pairs)]
+    for label in ("à froid", "clés en cache"):
+        start = time.perf_counter()
+        outdated = sum(1 for result in compare_versions(pairs) if result < 0)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<14} {args.pairs} couples en {elapsed * 1000:7.2f} ms ({outdated} obsolètes)")
+    print(f"versions distinctes encodées : {version_key.cache_info().currsize}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+"""
+Mesure les suggestions « vouliez-vous dire » de l'index de trigrammes :
+construction sur N noms de paquets synthétiques (préfixes réalistes de
+pkgsrc : py311-, p5-, php83-, ...), puis latence par requête mal orthographiée.
+
+    PYTHONPATH=. python benchmarks/bench_fuzzy.py [--names 25000]
+"""
+import argparse
+import random
+import string
+import time
+from nbpkg.pkginspect.fuzzy import TrigramIndex
+
+PREFIXES = ["", "", "", "py311-", "py312-", "p5-", "php83-", "ruby33-", "lib", "R-", "tex-", "xf86-", "go-"]
+
+
+def random_name(rng: random.Random) -> str:
+    stem = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+    return rng.choice(PREFIXES) + stem + (str(rng.randint(1, 40)) if rng.random() < 0.15 else "")
+
+
+def typo(rng: random.Random, name: str) -> str:
+    i = rng.randrange(len(name) - 1)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=25000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(2024)
+    names = [random_name(rng) for _ in range(args.names)]
+    start = time.perf_counter()
+    index = TrigramIndex.from_sources(((name, None, f"cat/{name}") for name in names))
+    print(f"construction     {len(index)} noms en {(time.perf_counter() - start) * 1000:7.1f} ms")
+
+    queries = [typo(rng, rng.choice(names)) for _ in range(args.queries)]
+    latencies, found = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        suggestions = index.suggest(query)
+        latencies.append(time.perf_counter() - start)
+        found += bool(suggestions)
+    latencies.sort()
+    print(f"requête médiane  {latencies[len(latencies) // 2] * 1000:7.3f} ms")
+    print(f"requête p99      {latencies[int(len(latencies) * 0.99)] * 1000:7.3f} ms")
+    print(f"suggestions      {found}/{len(queries)} requêtes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+"""
+Compare l'empreinte mémoire de N résultats synthétiques (catégories,
+mainteneurs, licences et BUILD_INFO répétés comme dans pkgsrc) conservés en
+liste de PkgDetails et en DetailsTable.
+
+    PYTHONPATH=. python benchmarks/bench_pkgtable.py [--packages 25000]
+"""
+import argparse
+import random
+import string
+import time
+import tracemalloc
+from nbpkg.pkginspect.nbpkgdescr import PkgDetails
+from nbpkg.pkginspect.pkgtable import DetailsTable
+
+CATEGORIES = ["devel", "lang", "www", "net", "textproc", "graphics", "databases", "security", "math", "x11"]
+LICENSES = ["gnu-gpl-v2", "gnu-gpl-v3", "modified-bsd", "mit", "apache-2.0", "artistic", None]
+MAINTAINERS = ["pkgsrc-users@NetBSD.org"] * 6 + [f"dev{i}@NetBSD.org" for i in range(300)]
+
+
+def records(count: int, seed: int = 2024):
+    """Enregistrements neufs (chaînes non partagées, comme lues depuis les fichiers)."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 12)))
+        category = rng.choice(CATEGORIES)
+        yield {
+            "pkgname": name,
+            "version": f"{rng.randint(0, 9)}.{rng.randint(0, 20)}",
+            "comment": f"{name} " + " ".join(rng.choice(["library", "tool", "for", "the", "X11", "client"]) for _ in range(5)),
+            "categories": [category] + ([rng.choice(CATEGORIES)] if rng.random() < 0.3 else []),
+            "maintainer": "".join(rng.choice(MAINTAINERS)),
+            "license": "".join(license) if (license := rng.choice(LICENSES)) else None,
+            "homepage": f"https://{name}.example.org/",
+            "origin": f"{category}/{name}",
+            "dependencies": [f"{rng.choice(['gettext-lib', 'zlib', 'openssl', 'libffi'])}>=1.0"
+                             for _ in range(rng.randint(0, 4))],
+            "build_info": {"OPSYS": "".join("NetBSD"), "OS_VERSION": "".join("10.0"),
+                           "MACHINE_ARCH": "".join("x86_64"), "PKGTOOLS_VERSION": "".join("20091115")},
+        }
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packages", type=int, default=25000)
+    args = parser.parse_args()
+
+    for label, build in (
+        ("PkgDetails", lambda: [PkgDetails(**record) for record in records(args.packages)]),
+        ("DetailsTable", lambda: DetailsTable(PkgDetails).extend(records(args.packages))),
+    ):
+        result, size, elapsed = measure(build)
+        print(f"{label:<14}{len(result):>8} paquets  {size / 1024 / 1024:8.2f} Mio  {elapsed * 1000:8.1f} ms")
+        del result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+"""
+Compare le nombre d'appels système de l'ancien parcours (Path.iterdir +
+is_dir/exists) et de treewalk.walk_tree (os.scandir + d_type).
+
+Les appels stat/lstat/listdir/scandir sont comptés au niveau de la
+bibliothèque Python ; sous Linux, strace -c -f donne les mêmes ordres de
+grandeur. Par défaut, l'arborescence est générée dans un répertoire
+temporaire (100 catégories x 200 paquets).
+
+    PYTHONPATH=. python benchmarks/bench_treewalk.py [--pkgsrc /usr/pkgsrc]
+"""
+import argparse
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from nbpkg.pkginspect.treewalk import walk_tree
+
+_COUNTED = ("stat", "lstat", "listdir", "scandir")
+
+
+@contextmanager
+def count_syscalls():
+    counts = dict.fromkeys(_COUNTED, 0)
+    originals = {name: getattr(os, name) for name in _COUNTED}
+
+    def wrap(name):
+        def counted(*args, **kwargs):
+            counts[name] += 1
+            return originals[name](*args, **kwargs)
+        return counted
+
+    for name in _COUNTED:
+        setattr(os, name, wrap(name))
+    try:
+        yield counts
+    finally:
+        for name, func in originals.items():
+            setattr(os, name, func)
+
+
+def legacy_walk(base: str):
+    for category in Path(base).iterdir():
+        if category.is_dir():
+            for pkg in category.iterdir():
+                if pkg.is_dir():
+                    yield category.name, pkg.name, str(pkg)
+
+
+def legacy_find(base: str, name: str):
+    for category in Path(base).iterdir():
+        if category.is_dir():
+            pkg_path = category / name
+            if pkg_path.exists() and pkg_path.is_dir():
+                return pkg_path
+    return None
+
+
+def make_tree(base: Path, categories: int, packages: int):
+    for c in range(categories):
+        for p in range(packages):
+            pkg = base / f"cat{c:03d}" / f"pkg{p:04d}"
+            pkg.mkdir(parents=True)
+            (pkg / "Makefile").touch()
+
+
+def measure(label: str, func):
+    with count_syscalls() as counts:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    detail = ", ".join(f"{name}={count}" for name, count in counts.items())
+    print(f"{label:<32} {total:>8} appels ({detail}) {elapsed * 1000:8.1f} ms -> {result}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pkgsrc", help="Arborescence pkgsrc existante à mesurer")
+    parser.add_argument("--categories", type=int, default=100)
+    parser.add_argument("--packages", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = args.pkgsrc
+        if base is None:
+            base = tmp
+            make_tree(Path(base), args.categories, args.packages)
+        # Paquet de la dernière catégorie : pire cas pour la recherche par nom
+        target = max(walk_tree(base))[1]
+
+        before = measure("walk: iterdir + is_dir", lambda: sum(1 for _ in legacy_walk(base)))
+        after = measure("walk: walk_tree (scandir)", lambda: sum(1 for _ in walk_tree(base)))
+        print(f"  réduction : {before / max(after, 1):.0f}x")
+        before = measure("find: iterdir + exists/is_dir", lambda: legacy_find(base, target) is not None)
+        after = measure("find: walk_tree(package=...)",
+                        lambda: next(walk_tree(base, package=target), None) is not None)
+        print(f"  réduction : {before / max(after, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
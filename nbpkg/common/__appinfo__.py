@@ -17,7 +17,7 @@ __platform__ = ["NetBSD", "Linux", "FreeBSD", "OpenBSD", "DragonFlyBSD", "Window
 __url__      = "https://github.com/kiaderouiche/nbpkgquery"
 __license__  = "MPL-2.0"
 __keywords__ = "checksum, md5, sha-1, sha256"
-__install_requires__ = ["click"]
+__install_requires__ = ["click", "requests"]
 __classifiers__=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
@@ -2,7 +2,7 @@ LOCALBASE="/usr/pkg/"
 PKGSRCDIR="/usr/pkgsrc/"
 PKG_DBDIR="/usr/pkg/pkgdb"
 CROSSBASE=LOCALBASE+"/cross"
-DISTDIR=PKGSRCDIR+"/distfile"
+DISTDIR=PKGSRCDIR+"/distfiles"
 SYSCONFBASE="/etc"
 VARBASE="/var"
 PKGINFODIR="info"
@@ -14,3 +14,9 @@ PKGSRCORG="https://pkgsrc.org/"
 PKGSRCGIT="https://raw.githubusercontent.com/NetBSD/pkgsrc/refs/heads/trunk/"
 FILE_MKCONF="mk.conf"
 FILE_INSTALL_PKG="pkg_install.conf"
+NBQUERY_DBDIR=VARBASE+"/db/nbpkgquery"
+NBQUERY_JOBS=""
+NBQUERY_REPOSDIR=SYSCONFBASE+"/nbpkgquery/repos.d"
+NBQUERY_CACHE_TTL="3600"
+NBQUERY_CACHE_SIZE="268435456"
+NBQUERY_PKGLOG=VARBASE+"/log/pkg.log"
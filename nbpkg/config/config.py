@@ -3,7 +3,8 @@ from pathlib import Path
 import logging
 from nbpkg.config.__appconfig__ import (
     PKGSRCDIR, PKG_DBDIR, LOCALBASE, CROSSBASE, DISTDIR, SYSCONFBASE, VARBASE,
-    PKGINFODIR, PKGMANDIR, PKGSRCWIP, PKGSRCSE, PKGSRCORG
+    PKGINFODIR, PKGMANDIR, PKGSRCWIP, PKGSRCSE, PKGSRCORG, NBQUERY_DBDIR,
+    NBQUERY_JOBS, NBQUERY_REPOSDIR, NBQUERY_CACHE_TTL, NBQUERY_CACHE_SIZE, NBQUERY_PKGLOG
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -34,7 +35,13 @@ class ConfigManager:
         "PKGMANDIR": PKGMANDIR,
         "PKGSRCWIP": PKGSRCWIP,
         "PKGSRCSE": PKGSRCSE,
-        "PKGSRCORG": PKGSRCORG
+        "PKGSRCORG": PKGSRCORG,
+        "NBQUERY_DBDIR": NBQUERY_DBDIR,
+        "NBQUERY_JOBS": NBQUERY_JOBS,
+        "NBQUERY_REPOSDIR": NBQUERY_REPOSDIR,
+        "NBQUERY_CACHE_TTL": NBQUERY_CACHE_TTL,
+        "NBQUERY_CACHE_SIZE": NBQUERY_CACHE_SIZE,
+        "NBQUERY_PKGLOG": NBQUERY_PKGLOG
     }
 
     def __init__(self):
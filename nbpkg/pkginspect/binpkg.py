@@ -0,0 +1,250 @@
+import bz2
+import glob
+import gzip
+import io
+import lzma
+import os
+import tarfile
+from pathlib import Path
+from typing import Optional, List, Dict, Any, IO, Iterable, Iterator, Tuple
+from nbpkg.pkginspect.pkgdbsnap import parse_contents, split_pkgname
+from nbpkg.pkginspect.scanner import scan
+
+try:
+    from compression import zstd as _zstd  # Python >= 3.14
+except ImportError:
+    try:
+        import zstandard as _zstd
+    except ImportError:
+        _zstd = None
+
+# Membres de métadonnées lus ; les autres fichiers "+" (+INSTALL, ...) sont ignorés
+METADATA_MEMBERS = ("+CONTENTS", "+COMMENT", "+DESC", "+BUILD_INFO", "+BUILD_VERSION",
+                    "+SIZE_PKG", "+SIZE_ALL")
+
+# Les métadonnées précèdent le contenu installé ; au-delà, on cesse de lire
+_MAX_METADATA_SIZE = 64 * 1024 * 1024
+
+_AR_MAGIC = b"!<arch>\n"
+
+# Extensions des paquets binaires pkgsrc (PKG_SUFX)
+PACKAGE_SUFFIXES = (".tgz", ".tbz", ".txz", ".tzst")
+
+
+class CountingReader(io.RawIOBase):
+    """Flux binaire qui compte les octets lus dans le fichier sous-jacent."""
+
+    def __init__(self, raw: IO[bytes]):
+        self._raw = raw
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+class _Limited(io.RawIOBase):
+    """Vue en lecture seule des size octets suivants d'un flux."""
+
+    def __init__(self, raw: IO[bytes], size: int):
+        self._raw = raw
+        self._left = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(min(len(buffer), self._left))
+        buffer[:len(data)] = data
+        self._left -= len(data)
+        return len(data)
+
+
+def _ar_package_member(stream: IO[bytes]) -> IO[bytes]:
+    """
+    Positionne un paquet signé (archive ar de pkg_install) sur son tarball.
+
+    Les membres +PACKAGE_INFO, +PKG_HASH et +PKG_GPG_SIGNATURE sont sautés.
+    """
+    stream.read(len(_AR_MAGIC))
+    while True:
+        header = stream.read(60)
+        if len(header) < 60:
+            raise ValueError("Archive ar sans paquet")
+        name = header[:16].decode("ascii", errors="replace").strip().rstrip("/")
+        size = int(header[48:58].decode("ascii").strip())
+        if not name.startswith("+"):
+            return io.BufferedReader(_Limited(stream, size))
+        stream.read(size + (size & 1))
+
+
+def decompress_stream(stream: IO[bytes]) -> IO[bytes]:
+    """
+    Décompresse à la volée un tarball de paquet (gzip, bzip2, xz, zstd ou brut).
+
+    Le format est reconnu à sa signature ; un paquet signé (ar) est d'abord
+    positionné sur son tarball.
+
+    Raises:
+        ValueError: Pour un paquet zstd sans module zstd disponible.
+    """
+    stream = io.BufferedReader(stream) if not hasattr(stream, "peek") else stream
+    magic = stream.peek(8)[:8]
+    if magic.startswith(_AR_MAGIC):
+        stream = _ar_package_member(stream)
+        magic = stream.peek(8)[:8]
+    if magic.startswith(b"\x1f\x8b"):
+        return gzip.GzipFile(fileobj=stream)
+    if magic.startswith(b"BZh"):
+        return bz2.BZ2File(stream)
+    if magic.startswith(b"\xfd7zXZ\x00"):
+        return lzma.LZMAFile(stream)
+    if magic.startswith(b"\x28\xb5\x2f\xfd"):
+        if _zstd is None:
+            raise ValueError("Paquet compressé en zstd : module zstandard requis")
+        if hasattr(_zstd, "ZstdFile"):
+            return _zstd.ZstdFile(stream)
+        return _zstd.ZstdDecompressor().stream_reader(stream)
+    return stream
+
+
+def read_metadata(stream: IO[bytes]) -> Dict[str, str]:
+    """
+    Lit les membres de métadonnées en tête d'un paquet binaire.
+
+    La lecture s'arrête au premier membre qui n'est pas un fichier "+" :
+    le contenu installé n'est jamais décompressé.
+
+    Args:
+        stream (IO[bytes]): Paquet (compressé) ouvert en lecture séquentielle.
+
+    Returns:
+        Dict[str, str]: Contenu texte des membres lus, par nom (ex. "+CONTENTS").
+    """
+    members = {}
+    with tarfile.open(fileobj=decompress_stream(stream), mode="r|") as archive:
+        for member in archive:
+            name = member.name.lstrip("./")
+            if not name.startswith("+"):
+                break
+            if name in METADATA_MEMBERS and member.isfile() and member.size <= _MAX_METADATA_SIZE:
+                members[name] = archive.extractfile(member).read().decode("utf-8", errors="replace")
+    return members
+
+
+def parse_build_info(text: str) -> Dict[str, str]:
+    """Analyse +BUILD_INFO (lignes VARIABLE=valeur ; les répétitions sont jointes par une espace)."""
+    info: Dict[str, str] = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            info[key] = f"{info[key]} {value}" if key in info else value
+    return info
+
+
+def package_record(members: Dict[str, str], filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convertit les métadonnées lues en champs de PkgDetails.
+
+    Args:
+        members (Dict[str, str]): Résultat de read_metadata.
+        filename (Optional[str]): Nom du fichier, pour déduire le nom du paquet
+                                  si +CONTENTS n'a pas de ligne @name.
+    """
+    contents_text = members.get("+CONTENTS", "")
+    contents = parse_contents(contents_text)
+    pkgname = next((line[6:].strip() for line in contents_text.splitlines() if line.startswith("@name ")), None)
+    if pkgname is None and filename:
+        pkgname = Path(filename).name.split(".t", 1)[0]
+    name, version = split_pkgname(pkgname) if pkgname else (None, None)
+    build_info = parse_build_info(members.get("+BUILD_INFO", ""))
+    size = members.get("+SIZE_PKG", "").strip() or None
+    files = contents["files"]
+    return {
+        "pkgname": name,
+        "version": version or None,
+        "comment": members.get("+COMMENT", "").strip() or None,
+        "description": members.get("+DESC", "").strip() or None,
+        "categories": build_info.get("CATEGORIES", "").split() or None,
+        "size": size,
+        "origin": build_info.get("PKGPATH"),
+        "files": files,
+        "build_info": build_info,
+        "dependencies": contents["depends"],
+        "build_deps": contents["build_depends"],
+        "runtime_deps": contents["depends"],
+        "license": build_info.get("LICENSE"),
+        "has_man_pages": any("/man/" in path for path in files),
+        "maintainer": build_info.get("MAINTAINER"),
+        "homepage": build_info.get("HOMEPAGE"),
+        "master_sites": [],
+    }
+
+
+def inspect_package(path: str) -> Dict[str, Any]:
+    """
+    Extrait les métadonnées d'un paquet binaire local (.tgz, .tbz, .txz, .tzst).
+
+    Returns:
+        Dict[str, Any]: Champs de PkgDetails, plus "bytes_read" (octets du
+                        fichier compressé effectivement lus).
+    """
+    with open(path, "rb") as f:
+        reader = CountingReader(f)
+        members = read_metadata(io.BufferedReader(reader, buffer_size=64 * 1024))
+    record = package_record(members, filename=path)
+    record["bytes_read"] = reader.bytes_read
+    return record
+
+
+def find_packages(sources: Iterable[str]) -> List[str]:
+    """
+    Résout une liste de sources en chemins de paquets binaires.
+
+    Un répertoire est parcouru récursivement (fichiers PACKAGE_SUFFIXES), un
+    motif glob est développé, un fichier est pris tel quel. Les doublons sont
+    écartés en conservant l'ordre.
+
+    Args:
+        sources (Iterable[str]): Répertoires, motifs glob ou fichiers.
+
+    Returns:
+        List[str]: Chemins des paquets.
+    """
+    found: Dict[str, None] = {}
+    for source in sources:
+        if os.path.isdir(source):
+            for dirpath, dirnames, filenames in os.walk(source):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith(PACKAGE_SUFFIXES):
+                        found.setdefault(os.path.join(dirpath, filename))
+        elif any(c in source for c in "*?["):
+            for path in sorted(glob.glob(source)):
+                if os.path.isfile(path):
+                    found.setdefault(path)
+        else:
+            found.setdefault(source)
+    return list(found)
+
+
+def iter_inspect(sources: Iterable[str], jobs: Optional[int] = None) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Inspecte un lot de paquets binaires sur un pool de processus.
+
+    La décompression est liée au CPU : chaque paquet est lu dans un processus
+    séparé, les résultats sont produits au fil de l'eau (fenêtre bornée de scan).
+
+    Args:
+        sources (Iterable[str]): Répertoires, motifs glob ou fichiers (voir find_packages).
+        jobs (Optional[int]): Nombre de processus (par défaut: NBQUERY_JOBS).
+
+    Yields:
+        Tuple[str, Optional[Dict[str, Any]], Optional[str]]: (chemin, champs, message d'erreur).
+    """
+    yield from scan(inspect_package, find_packages(sources), jobs=jobs, processes=True)
@@ -0,0 +1,288 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
+from fnmatch import fnmatchcase
+from typing import Optional, List, Dict, Iterable, Tuple
+from nbpkg.common.logger import logger
+from nbpkg.pkginspect.mkdeps import DEPENDS_KINDS, parse_depends
+from nbpkg.pkginspect.pkgdbsnap import PkgDBSnapshot, split_pkgname
+from nbpkg.pkginspect.scanner import scan
+from nbpkg.pkginspect.treewalk import walk_tree
+
+_BRACES = re.compile(r"\{([^{}]*)\}")
+_OPERATOR = re.compile(r"[<>]=?|==")
+
+
+def expand_alternatives(pattern: str) -> List[str]:
+    """Développe les alternatives csh d'un motif pkgsrc ("{a,b}>=1" -> ["a>=1", "b>=1"])."""
+    match = _BRACES.search(pattern)
+    if not match:
+        return [pattern]
+    expanded = []
+    for choice in match.group(1).split(","):
+        expanded.extend(expand_alternatives(pattern[:match.start()] + choice + pattern[match.end():]))
+    return expanded
+
+
+def pattern_base(pattern: str) -> Tuple[str, bool]:
+    """
+    Extrait le nom de base d'un motif de dépendance pkgsrc sans alternatives.
+
+    Returns:
+        Tuple[str, bool]: (nom ou motif glob, True si le résultat est un glob
+                          à comparer aux noms complets "nom-version").
+    """
+    match = _OPERATOR.search(pattern)
+    if match:
+        return pattern[:match.start()], False
+    if any(c in pattern for c in "*?["):
+        return pattern, True
+    return split_pkgname(pattern)[0], False
+
+
+class DepGraph:
+    """
+    Graphe de dépendances compact : les nœuds sont des entiers et les arcs
+    sont stockés en tableaux d'adjacence (offsets + cibles, format CSR) dans
+    les deux sens, pour répondre aux requêtes depends/revdepends directes ou
+    transitives sans relire les métadonnées des paquets.
+    """
+
+    _installed: Dict[Tuple[str, int], "DepGraph"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, labels: List[str], edges: Iterable[Tuple[int, int]],
+                 aliases: Optional[Dict[str, int]] = None):
+        self.labels = labels
+        self._ids = {label: node for node, label in enumerate(labels)}
+        if aliases:
+            for alias, node in aliases.items():
+                self._ids.setdefault(alias, node)
+        edges = sorted(set(edges))
+        self._fwd_off, self._fwd = self._csr(len(labels), edges)
+        self._rev_off, self._rev = self._csr(len(labels), sorted((dst, src) for src, dst in edges))
+
+    @staticmethod
+    def _csr(size: int, edges: List[Tuple[int, int]]) -> Tuple[array, array]:
+        offsets = array("I", [0] * (size + 1))
+        targets = array("I", (dst for _, dst in edges))
+        for src, _ in edges:
+            offsets[src + 1] += 1
+        for node in range(size):
+            offsets[node + 1] += offsets[node]
+        return offsets, targets
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._fwd)
+
+    def node(self, name: str) -> int:
+        try:
+            return self._ids[name]
+        except KeyError:
+            raise KeyError(f"Paquet {name} absent du graphe de dépendances") from None
+
+    def _neighbours(self, node: int, reverse: bool) -> array:
+        offsets, targets = (self._rev_off, self._rev) if reverse else (self._fwd_off, self._fwd)
+        return targets[offsets[node]:offsets[node + 1]]
+
+    def _walk(self, nodes: Iterable[int], reverse: bool, transitive: bool) -> List[int]:
+        start = list(nodes)
+        seen = set(start)
+        found = []
+        queue = deque(start)
+        while queue:
+            for neighbour in self._neighbours(queue.popleft(), reverse):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    found.append(neighbour)
+                    if transitive:
+                        queue.append(neighbour)
+        return found
+
+    def depends(self, name: str, transitive: bool = False) -> List[str]:
+        """Dépendances directes (ou transitives) d'un paquet."""
+        return sorted(self.labels[n] for n in self._walk([self.node(name)], False, transitive))
+
+    def revdepends(self, name: str, transitive: bool = False) -> List[str]:
+        """Paquets qui dépendent directement (ou transitivement) d'un paquet."""
+        return sorted(self.labels[n] for n in self._walk([self.node(name)], True, transitive))
+
+    def depends_many(self, names: Iterable[str], transitive: bool = True) -> Dict[str, List[str]]:
+        """Requête groupée : dépendances de chaque paquet de la liste."""
+        return {name: self.depends(name, transitive) for name in names}
+
+    def revdepends_many(self, names: Iterable[str], transitive: bool = True) -> Dict[str, List[str]]:
+        """Requête groupée : dépendants inverses de chaque paquet de la liste."""
+        return {name: self.revdepends(name, transitive) for name in names}
+
+    def impact(self, names: Iterable[str]) -> List[str]:
+        """Union des dépendants transitifs d'un ensemble de paquets, en un seul parcours."""
+        nodes = [self.node(name) for name in names]
+        return sorted(self.labels[n] for n in self._walk(nodes, True, True))
+
+    def build_levels(self) -> Tuple[List[List[str]], List[str]]:
+        """
+        Ordre de construction par niveaux (algorithme de Kahn).
+
+        Les paquets d'un même niveau ne dépendent que des niveaux précédents
+        et peuvent donc être construits en parallèle.
+
+        Returns:
+            Tuple[List[List[str]], List[str]]: (niveaux, paquets bloqués par un
+                                               cycle ou par un dépendant d'un cycle).
+        """
+        remaining = array("I", (self._fwd_off[n + 1] - self._fwd_off[n] for n in range(len(self.labels))))
+        level = [n for n in range(len(self.labels)) if remaining[n] == 0]
+        levels = []
+        while level:
+            levels.append(sorted(self.labels[n] for n in level))
+            following = []
+            for node in level:
+                for dependent in self._neighbours(node, True):
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        following.append(dependent)
+            level = following
+        blocked = sorted(self.labels[n] for n in range(len(self.labels)) if remaining[n])
+        return levels, blocked
+
+    def build_order(self) -> List[str]:
+        """Ordre topologique à plat (dépendances d'abord), sans les paquets bloqués."""
+        return [label for level in self.build_levels()[0] for label in level]
+
+    def cycles(self) -> List[List[str]]:
+        """Composantes fortement connexes de plus d'un nœud (Tarjan itératif)."""
+        index, lowlink, on_stack = {}, {}, set()
+        stack, components, counter = [], [], 0
+        for root in range(len(self.labels)):
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, position = work.pop()
+                if position == 0:
+                    index[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack.add(node)
+                neighbours = self._neighbours(node, False)
+                for i in range(position, len(neighbours)):
+                    neighbour = neighbours[i]
+                    if neighbour not in index:
+                        work.append((node, i + 1))
+                        work.append((neighbour, 0))
+                        break
+                    if neighbour in on_stack:
+                        lowlink[node] = min(lowlink[node], index[neighbour])
+                else:
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1:
+                            components.append(sorted(self.labels[n] for n in component))
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+        return sorted(components)
+
+    @staticmethod
+    def _glob(sorted_labels: List[str], pattern: str, by_label: Dict[str, int]) -> List[int]:
+        # Seuls les noms partageant le préfixe littéral du motif sont comparés
+        prefix = pattern[:min(i for i, c in enumerate(pattern) if c in "*?[")]
+        matches = []
+        for label in sorted_labels[bisect_left(sorted_labels, prefix):]:
+            if not label.startswith(prefix):
+                break
+            if fnmatchcase(label, pattern):
+                matches.append(by_label[label])
+        return matches
+
+    @classmethod
+    def from_snapshot(cls, snapshot: PkgDBSnapshot) -> "DepGraph":
+        """Construit le graphe des paquets installés à partir des @pkgdep du snapshot pkgdb."""
+        packages = list(snapshot.packages())
+        labels = [pkg["pkgname"] for pkg in packages]
+        by_name = {pkg["name"]: node for node, pkg in enumerate(packages)}
+        by_label = {label: node for node, label in enumerate(labels)}
+        sorted_labels = sorted(labels)
+        edges = []
+        for node, pkg in enumerate(packages):
+            for dependency in pkg["depends"]:
+                targets = []
+                for alternative in expand_alternatives(dependency):
+                    base, is_glob = pattern_base(alternative)
+                    if is_glob:
+                        targets.extend(cls._glob(sorted_labels, base, by_label))
+                    elif base in by_name:
+                        targets.append(by_name[base])
+                if not targets:
+                    logger.debug(f"Dépendance {dependency} de {pkg['pkgname']} non installée")
+                edges.extend((node, target) for target in targets if target != node)
+        return cls(labels, edges, aliases=by_name)
+
+    @classmethod
+    def from_source_tree(cls, pkgsrc_dir: str, packages: Optional[Iterable[str]] = None,
+                         kinds: Iterable[str] = DEPENDS_KINDS, jobs: Optional[int] = None) -> "DepGraph":
+        """
+        Construit le graphe DEPENDS/BUILD_DEPENDS/TOOL_DEPENDS de l'arbre pkgsrc.
+
+        Args:
+            pkgsrc_dir (str): Racine pkgsrc.
+            packages (Optional[Iterable[str]]): Sous-ensemble "category/package" ;
+                                                leurs dépendances sont ajoutées
+                                                transitivement au graphe.
+            kinds (Iterable[str]): Types de dépendances retenus.
+            jobs (Optional[int]): Nombre de workers d'analyse des Makefile.
+        """
+        kinds = tuple(kinds)
+        parsed: Dict[str, List[str]] = {}
+
+        def parse(pkgpath: str) -> List[str]:
+            depends = parse_depends(pkgsrc_dir, pkgpath)
+            return sorted({dep for kind in kinds for dep in depends[kind]})
+
+        if packages is None:
+            todo = [f"{category}/{name}" for category, name, _ in walk_tree(pkgsrc_dir)]
+        else:
+            todo = list(packages)
+        while todo:
+            batch = [pkgpath for pkgpath in dict.fromkeys(todo) if pkgpath not in parsed]
+            todo = []
+            for pkgpath, depends, error in scan(parse, batch, jobs=jobs):
+                if error is not None:
+                    logger.warning(f"Impossible d'analyser {pkgpath} : {error}")
+                    depends = []
+                parsed[pkgpath] = depends
+                if packages is not None:
+                    todo.extend(dep for dep in depends if dep not in parsed)
+
+        labels = sorted(set(parsed) | {dep for depends in parsed.values() for dep in depends})
+        ids = {label: node for node, label in enumerate(labels)}
+        edges = [(ids[pkgpath], ids[dep]) for pkgpath, depends in parsed.items() for dep in depends]
+        return cls(labels, edges)
+
+    @classmethod
+    def installed(cls, pkg_db_path: Optional[str] = None) -> "DepGraph":
+        """Graphe des paquets installés, partagé tant que pkgdb n'a pas changé."""
+        snapshot = PkgDBSnapshot.load(pkg_db_path)
+        key = (snapshot.path, snapshot.pkgdb_mtime)
+        with cls._lock:
+            graph = cls._installed.get(key)
+            if graph is None:
+                cls._installed = {key: cls.from_snapshot(snapshot)}
+                graph = cls._installed[key]
+            return graph
@@ -0,0 +1,97 @@
+from functools import lru_cache
+from typing import List, Tuple, Iterable
+
+# Valeurs des modificateurs de pkg_install (lib/dewey.c) : alpha < beta < rc = pre < "."
+ALPHA, BETA, RC, DOT = -3, -2, -1, 0
+
+# Ordre de reconnaissance de dewey.c : "pl" et "_" valent un point
+MODIFIERS = (("alpha", ALPHA), ("beta", BETA), ("pre", RC), ("rc", RC), ("pl", DOT), ("_", DOT), (".", DOT))
+
+
+def dewey_components(version: str) -> Tuple[List[int], int]:
+    """
+    Décompose une version comme mkcomponent() de pkg_install.
+
+    Chaque nombre, modificateur (alpha, beta, pre, rc, pl, _, .) ou lettre
+    isolée (". n" où n est son rang dans l'alphabet) produit une composante ;
+    le suffixe nbN est la révision pkgsrc, comparée en dernier. Les autres
+    caractères sont ignorés.
+
+    Returns:
+        Tuple[List[int], int]: (composantes, révision nb).
+    """
+    components: List[int] = []
+    nb = 0
+    i, length = 0, len(version)
+    lower = version.lower()
+    while i < length:
+        c = lower[i]
+        if c.isdigit():
+            start = i
+            while i < length and lower[i].isdigit():
+                i += 1
+            components.append(int(lower[start:i]))
+            continue
+        for text, value in MODIFIERS:
+            if lower.startswith(text, i):
+                components.append(value)
+                i += len(text)
+                break
+        else:
+            if lower.startswith("nb", i):
+                i += 2
+                start = i
+                while i < length and lower[i].isdigit():
+                    i += 1
+                nb = int(lower[start:i] or 0)
+            elif "a" <= c <= "z":
+                components.extend((DOT, ord(c) - ord("a") + 1))
+                i += 1
+            else:
+                i += 1
+    return components, nb
+
+
+@lru_cache(maxsize=65536)
+def version_key(version: str) -> tuple:
+    """
+    Clé triable équivalente à la comparaison dewey de pkg_install.
+
+    dewey.c complète la plus courte des deux versions par des zéros : seules
+    les composantes non nulles comptent, avec leur position. Chacune est
+    encodée de sorte qu'une composante positive l'emporte sur la fin de la
+    version, et une négative (alpha, beta, rc) lui cède ; la révision nb
+    termine la clé. Deux versions se comparent alors comme leurs clés.
+    """
+    components, nb = dewey_components(version)
+    key = []
+    for position, value in enumerate(components):
+        if value > 0:
+            key.append((1, -position, value))
+        elif value < 0:
+            key.append((-1, position, value))
+    key.append((0, nb))
+    return tuple(key)
+
+
+def dewey_cmp(version1: str, version2: str) -> int:
+    """Compare deux versions pkgsrc : -1, 0 ou 1."""
+    key1, key2 = version_key(version1), version_key(version2)
+    return (key1 > key2) - (key1 < key2)
+
+
+def compare_versions(pairs: Iterable[Tuple[str, str]]) -> List[int]:
+    """
+    Compare un lot de couples (installée, disponible) en une passe.
+
+    Les clés sont encodées une fois par version distincte (cache partagé),
+    puis chaque couple se réduit à une comparaison de tuples.
+
+    Returns:
+        List[int]: -1 (installée plus ancienne), 0 ou 1, dans l'ordre des couples.
+    """
+    results = []
+    for installed, available in pairs:
+        key1, key2 = version_key(installed), version_key(available)
+        results.append((key1 > key2) - (key1 < key2))
+    return results
@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Iterable, Tuple
+from nbpkg.common.logger import logger
+from nbpkg.config.config import ConfigManager
+
+CACHE_FILENAME = "distfile-digests.db"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    path TEXT NOT NULL,
+    checked_at INTEGER NOT NULL,
+    PRIMARY KEY (dev, ino, size, mtime_ns, algorithm)
+);
+CREATE INDEX IF NOT EXISTS digests_path ON digests (path);
+"""
+
+
+def file_identity(st: os.stat_result) -> Tuple[int, int, int, int]:
+    """Identité d'un fichier : (périphérique, inode, taille, mtime en ns)."""
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class DigestCache:
+    """
+    Cache persistant (SQLite) des empreintes de fichiers de distribution.
+
+    Une empreinte est associée à l'identité du fichier (périphérique, inode,
+    taille, mtime_ns) : toute réécriture ou tout remplacement du fichier
+    change cette identité et rend l'entrée caduque sans autre invalidation.
+
+    Si le cache ne peut être ouvert (NBQUERY_DBDIR non accessible en écriture,
+    base illisible), lookup() et store() ne font rien : les fichiers sont
+    simplement hachés sans cache.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None):
+        if cache_path is None:
+            cache_path = Path(ConfigManager().get("NBQUERY_DBDIR")) / CACHE_FILENAME
+        self.cache_path = Path(cache_path)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._unavailable = False
+        self.hits = self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Partagée entre les threads de vérification, sous self._lock
+            self._conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] not in (0, SCHEMA_VERSION):
+                self._conn.execute("DROP TABLE IF EXISTS digests")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return self._conn
+
+    def _disable(self, error: Exception):
+        if not self._unavailable:
+            logger.debug(f"Cache d'empreintes {self.cache_path} indisponible, vérification sans cache : {str(error)}")
+        self._unavailable = True
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def lookup(self, identity: Tuple[int, int, int, int], algorithms: Iterable[str]) -> Dict[str, str]:
+        """Empreintes connues pour cette identité, limitées aux algorithmes demandés."""
+        algorithms = list(algorithms)
+        rows = []
+        with self._lock:
+            if not self._unavailable:
+                try:
+                    rows = self._connect().execute(
+                        "SELECT algorithm, digest FROM digests WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+                        identity,
+                    ).fetchall()
+                except (OSError, sqlite3.Error) as e:
+                    self._disable(e)
+        found = {algorithm: digest for algorithm, digest in rows if algorithm in algorithms}
+        if len(found) == len(algorithms):
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def store(self, identity: Tuple[int, int, int, int], path: str, digests: Dict[str, str]):
+        now = int(time.time())
+        with self._lock:
+            if self._unavailable:
+                return
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(*identity, algorithm, digest, str(path), now) for algorithm, digest in digests.items()],
+                    )
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+
+    def invalidate(self, path: Optional[str] = None) -> int:
+        """
+        Supprime les empreintes d'un fichier, ou tout le cache si path est None.
+
+        Returns:
+            int: Nombre d'entrées supprimées.
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if path is None:
+                    cursor = conn.execute("DELETE FROM digests")
+                else:
+                    cursor = conn.execute("DELETE FROM digests WHERE path = ?", (str(path),))
+        return cursor.rowcount
+
+    def prune(self) -> int:
+        """
+        Supprime les entrées dont le fichier a disparu ou changé d'identité.
+
+        Returns:
+            int: Nombre d'entrées supprimées.
+        """
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT DISTINCT path, dev, ino, size, mtime_ns FROM digests").fetchall()
+            stale = []
+            for path, *identity in rows:
+                try:
+                    current = file_identity(os.stat(path))
+                except OSError:
+                    current = None
+                if current != tuple(identity):
+                    stale.append(tuple(identity))
+            with conn:
+                conn.executemany(
+                    "DELETE FROM digests WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?", stale
+                )
+        if stale:
+            logger.info(f"Cache d'empreintes : {len(stale)} fichiers obsolètes retirés")
+        return len(stale)
@@ -0,0 +1,213 @@
+import hashlib
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+from nbpkg.pkginspect.digestcache import DigestCache, file_identity
+from nbpkg.pkginspect.scanner import scan
+from nbpkg.pkginspect.treewalk import walk_tree
+
+# Correspondance entre les algorithmes de distinfo et hashlib
+ALGORITHMS = {
+    "BLAKE2s": "blake2s",
+    "SHA512": "sha512",
+    "SHA256": "sha256",
+    "SHA1": "sha1",
+    "RMD160": "ripemd160",
+    "MD5": "md5",
+}
+
+# Taille des tranches passées à chaque algorithme : assez grande pour que
+# hashlib relâche le GIL, assez petite pour rester dans le cache
+CHUNK_SIZE = 4 * 1024 * 1024
+
+_LINE = re.compile(r"^(\w+) \((.+)\) = (\S+)(?: bytes)?$")
+
+
+def parse_distinfo(distinfo_file: Path) -> Dict[str, Dict[str, str]]:
+    """
+    Lit un fichier distinfo.
+
+    Les sommes des patches (patch-*, SHA1 seul, sans Size) sont écartées :
+    elles portent sur les fichiers de patches/, pas sur DISTDIR.
+
+    Returns:
+        Dict[str, Dict[str, str]]: Valeurs attendues par fichier de distribution
+                                   et par algorithme (dont "Size").
+    """
+    entries: Dict[str, Dict[str, str]] = {}
+    with Path(distinfo_file).open(errors="replace") as f:
+        for line in f:
+            match = _LINE.match(line.strip())
+            if match:
+                algorithm, filename, value = match.groups()
+                entries.setdefault(filename, {})[algorithm] = value
+    return {
+        filename: values for filename, values in entries.items()
+        if not (os.path.basename(filename).startswith("patch-") and "Size" not in values)
+    }
+
+
+def _hashers(algorithms: Iterable[str]) -> Tuple[Dict[str, Any], List[str]]:
+    hashers, unsupported = {}, []
+    for algorithm in algorithms:
+        if algorithm == "Size":
+            continue
+        try:
+            hashers[algorithm] = hashlib.new(ALGORITHMS.get(algorithm, algorithm.lower()))
+        except (ValueError, TypeError):
+            unsupported.append(algorithm)
+    return hashers, unsupported
+
+
+def digest_file(path: Path, algorithms: Iterable[str], cache: Optional[DigestCache] = None,
+                force: bool = False) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Calcule toutes les empreintes demandées en une seule lecture du fichier.
+
+    Le fichier est projeté en mémoire (mmap) et chaque tranche est transmise
+    successivement à tous les algorithmes. Avec un cache, seules les
+    empreintes absentes pour l'identité courante du fichier sont calculées.
+
+    Args:
+        path (Path): Fichier à hacher.
+        algorithms (Iterable[str]): Algorithmes distinfo ("Size" est ignoré).
+        cache (Optional[DigestCache]): Cache persistant des empreintes.
+        force (bool): Recalculer même si le cache connaît les empreintes.
+
+    Returns:
+        Tuple[Dict[str, str], List[str]]: (empreintes hexadécimales par
+                                          algorithme, algorithmes non supportés).
+    """
+    hashers, unsupported = _hashers(algorithms)
+    digests = {}
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        identity = file_identity(st)
+        if cache is not None and not force:
+            digests = cache.lookup(identity, hashers)
+            hashers = {algorithm: hasher for algorithm, hasher in hashers.items() if algorithm not in digests}
+        if st.st_size and hashers:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                view = memoryview(data)
+                try:
+                    for start in range(0, st.st_size, CHUNK_SIZE):
+                        chunk = view[start:start + CHUNK_SIZE]
+                        for hasher in hashers.values():
+                            hasher.update(chunk)
+                        chunk.release()
+                finally:
+                    view.release()
+    computed = {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+    # Ne mémoriser que si le fichier n'a pas changé pendant la lecture
+    if cache is not None and computed and file_identity(os.stat(path)) == identity:
+        cache.store(identity, str(path), computed)
+    digests.update(computed)
+    return digests, unsupported
+
+
+def verify_distfile(path: Path, expected: Dict[str, str], cache: Optional[DigestCache] = None,
+                    force: bool = False) -> Dict[str, Any]:
+    """
+    Vérifie un fichier de distribution contre toutes les valeurs de distinfo.
+
+    La taille est contrôlée d'abord : un fichier tronqué n'est pas haché.
+    Voir digest_file pour cache et force.
+
+    Returns:
+        Dict[str, Any]: "status" ("ok", "missing", "size", "checksum", "error"),
+                        "message", "algorithms" vérifiés et "size" lue.
+    """
+    result = {"file": path.name, "status": "ok", "algorithms": [], "size": None}
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        return dict(result, status="missing", message="Fichier non trouvé")
+    except OSError as e:
+        return dict(result, status="error", message=f"Erreur de vérification : {str(e)}")
+    result["size"] = size
+
+    if "Size" in expected:
+        result["algorithms"].append("Size")
+        if str(size) != expected["Size"]:
+            return dict(result, status="size",
+                        message=f"Taille invalide (attendue: {expected['Size']}, lue: {size})")
+    try:
+        digests, unsupported = digest_file(path, expected, cache=cache, force=force)
+    except OSError as e:
+        return dict(result, status="error", message=f"Erreur de vérification : {str(e)}")
+
+    mismatches = []
+    for algorithm, computed in digests.items():
+        result["algorithms"].append(algorithm)
+        if computed.lower() != expected[algorithm].lower():
+            mismatches.append(f"{algorithm} attendu: {expected[algorithm]}, calculé: {computed}")
+    if mismatches:
+        return dict(result, status="checksum", message=f"Checksum invalide ({'; '.join(mismatches)})")
+    message = "Checksum valide"
+    if unsupported:
+        message += f" (non vérifiés : {', '.join(unsupported)})"
+    if not digests and "Size" not in expected:
+        return dict(result, status="error", message="Aucun algorithme vérifiable")
+    return dict(result, message=message)
+
+
+def verify_entries(entries: Iterable[Tuple[str, Dict[str, str]]], distdir: str, jobs: Optional[int] = None,
+                   cache: Optional[DigestCache] = None, force: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Vérifie en parallèle des entrées (fichier, valeurs attendues) de distinfo.
+
+    Les résultats sont produits dans l'ordre des entrées.
+    """
+    def check(entry):
+        filename, expected = entry
+        return dict(verify_distfile(Path(distdir) / filename, expected, cache=cache, force=force), file=filename)
+
+    for (filename, _), result, error in scan(check, entries, jobs=jobs):
+        if error is not None:
+            result = {"file": filename, "status": "error", "message": f"Erreur de vérification : {error}"}
+        yield result
+
+
+def iter_tree_distinfo(pkgsrc_dir: str) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """
+    Parcourt tous les distinfo de l'arbre pkgsrc.
+
+    Yields:
+        Tuple[str, str, Dict[str, str]]: ("category/package", fichier, valeurs attendues).
+    """
+    for category, name, path in walk_tree(pkgsrc_dir):
+        distinfo_file = Path(path) / "distinfo"
+        try:
+            entries = parse_distinfo(distinfo_file)
+        except FileNotFoundError:
+            continue
+        for filename, expected in entries.items():
+            yield f"{category}/{name}", filename, expected
+
+
+def verify_tree(pkgsrc_dir: str, distdir: str, jobs: Optional[int] = None,
+                cache: Optional[DigestCache] = None, force: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Vérifie tous les fichiers de distribution référencés par l'arbre pkgsrc.
+
+    Un fichier partagé par plusieurs paquets avec les mêmes valeurs attendues
+    n'est haché qu'une fois ; le résultat indique le premier paquet qui le
+    référence. Des valeurs divergentes sont vérifiées séparément.
+    """
+    seen = set()
+    owners: Dict[int, str] = {}
+
+    def entries():
+        for pkgpath, filename, expected in iter_tree_distinfo(pkgsrc_dir):
+            key = (filename, tuple(sorted(expected.items())))
+            if key in seen:
+                continue
+            seen.add(key)
+            owners[len(seen)] = pkgpath
+            yield filename, expected
+
+    for number, result in enumerate(verify_entries(entries(), distdir, jobs=jobs, cache=cache, force=force), start=1):
+        result["package"] = owners.pop(number)
+        yield result
@@ -0,0 +1,123 @@
+import os
+from typing import Optional, Dict, Any, Iterator, Set, Tuple
+from nbpkg.common.logger import logger
+from nbpkg.config.config import ConfigManager
+from nbpkg.pkginspect.digestcache import DigestCache
+from nbpkg.pkginspect.distinfo import iter_tree_distinfo, verify_entries
+
+
+def default_distdir(pkgsrc_dir: Optional[str] = None) -> str:
+    """
+    Répertoire des distfiles par défaut : DISTDIR s'il est défini (mk.conf ou
+    environnement), sinon <pkgsrc_dir>/distfiles.
+    """
+    config = ConfigManager()
+    distdir = config.get("DISTDIR")
+    if distdir and distdir != ConfigManager.DEFAULT_CONFIG["DISTDIR"]:
+        return distdir
+    return os.path.join(pkgsrc_dir or config.get("PKGSRCDIR"), "distfiles")
+
+
+def iter_distdir(distdir: str) -> Iterator[Tuple[str, int]]:
+    """
+    Parcourt récursivement DISTDIR (DIST_SUBDIR compris) sans suivre les liens.
+
+    Yields:
+        Tuple[str, int]: (chemin relatif à DISTDIR au format distinfo, taille).
+    """
+    pending = [""]
+    while pending:
+        relative = pending.pop()
+        try:
+            with os.scandir(os.path.join(distdir, relative)) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.warning(f"Impossible de lire {os.path.join(distdir, relative)} : {str(e)}")
+            continue
+        for entry in entries:
+            name = f"{relative}/{entry.name}" if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(name)
+            elif entry.is_file(follow_symlinks=False):
+                yield name, entry.stat(follow_symlinks=False).st_size
+
+
+class DistLint:
+    """
+    Audit de DISTDIR contre l'ensemble des distinfo de l'arbre pkgsrc.
+
+    Un seul passage en flux : les distinfo sont lus au fil du parcours et
+    vérifiés en parallèle par une fenêtre bornée de workers, puis DISTDIR est
+    parcouru pour repérer les fichiers qu'aucun paquet ne référence. Seules
+    les entrées distinctes (nom et valeurs attendues) restent en mémoire,
+    jamais les distinfo ni les résultats.
+    """
+
+    def __init__(self, pkgsrc_dir: Optional[str] = None, distdir: Optional[str] = None,
+                 jobs: Optional[int] = None, checksums: bool = True,
+                 cache: Optional[DigestCache] = None, force: bool = False):
+        config = ConfigManager()
+        self.pkgsrc_dir = pkgsrc_dir or config.get("PKGSRCDIR")
+        self.distdir = distdir or default_distdir(self.pkgsrc_dir)
+        self.jobs = jobs
+        self.checksums = checksums
+        self.cache = cache
+        self.force = force
+        self.stats: Dict[str, int] = {}
+
+    def _expected(self, expected: Dict[str, str]) -> Dict[str, str]:
+        # Sans contrôle des sommes, la taille suffit quand distinfo la donne
+        if not self.checksums and "Size" in expected:
+            return {"Size": expected["Size"]}
+        return expected
+
+    def run(self) -> Iterator[Dict[str, Any]]:
+        """
+        Produit les anomalies au fil de l'audit.
+
+        Yields:
+            Dict[str, Any]: "file", "status" ("missing", "size", "checksum",
+                            "error" ou "orphan"), "message", "size" et, sauf
+                            pour les orphelins, "package".
+        """
+        self.stats = dict.fromkeys(
+            ("entries", "checked", "ok", "missing", "size", "checksum", "error", "orphans", "reclaimable_bytes"), 0)
+        referenced: Set[str] = set()
+        seen = set()
+        owners: Dict[int, str] = {}
+
+        def entries():
+            # Comme verify_tree : un fichier partagé n'est vérifié qu'une fois
+            # par jeu de valeurs attendues
+            for pkgpath, filename, expected in iter_tree_distinfo(self.pkgsrc_dir):
+                self.stats["entries"] += 1
+                referenced.add(filename)
+                expected = self._expected(expected)
+                key = (filename, tuple(sorted(expected.items())))
+                if key in seen:
+                    continue
+                seen.add(key)
+                owners[len(seen)] = pkgpath
+                yield filename, expected
+
+        results = verify_entries(entries(), self.distdir, jobs=self.jobs, cache=self.cache, force=self.force)
+        for number, result in enumerate(results, start=1):
+            self.stats["checked"] += 1
+            result["package"] = owners.pop(number)
+            status = result["status"]
+            self.stats[status] += 1
+            if status != "ok":
+                yield result
+
+        for filename, size in iter_distdir(self.distdir):
+            if filename in referenced:
+                continue
+            self.stats["orphans"] += 1
+            self.stats["reclaimable_bytes"] += size
+            yield {"file": filename, "status": "orphan", "size": size,
+                   "message": "Fichier de distribution référencé par aucun paquet"}
+        logger.info(
+            f"distlint : {self.stats['checked']} fichiers vérifiés, {self.stats['missing']} manquants, "
+            f"{self.stats['size'] + self.stats['checksum']} invalides, {self.stats['orphans']} orphelins "
+            f"({self.stats['reclaimable_bytes']} octets récupérables)"
+        )
@@ -0,0 +1,285 @@
+import configparser
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+from urllib.parse import urljoin, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from nbpkg.common.logger import logger
+from nbpkg.common.nberrors import NetworkError
+from nbpkg.config.__appconfig__ import CDNSERVER, NBQUERY_CACHE_TTL
+from nbpkg.config.config import ConfigManager
+from nbpkg.pkginspect.scanner import scan
+
+# Priorité des dépôts sans champ priority (valeur par défaut de zypper)
+DEFAULT_PRIORITY = 99
+# Requêtes simultanées par défaut, et donc connexions gardées par hôte
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 10
+# Lissage exponentiel des latences mesurées
+LATENCY_WEIGHT = 0.3
+# Mise à l'écart d'un miroir défaillant : 30 s, doublée à chaque échec
+BACKOFF = 30.0
+MAX_BACKOFF = 3600.0
+
+
+def default_ttl() -> int:
+    """Durée de validité en cache configurée (NBQUERY_CACHE_TTL), en secondes."""
+    try:
+        return int(ConfigManager().get("NBQUERY_CACHE_TTL"))
+    except (TypeError, ValueError):
+        return int(NBQUERY_CACHE_TTL)
+
+
+def load_remote_repos(repos_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Lit les dépôts distants (baseurl http/https) activés de repos.d.
+
+    Args:
+        repos_dir (Optional[str]): Répertoire des fichiers .repo
+                                   (par défaut: NBQUERY_REPOSDIR de ConfigManager).
+
+    Returns:
+        List[Dict[str, Any]]: "name", "baseurl", "priority" (plus petit = préféré),
+                              "autorefresh" et "ttl" de chaque dépôt : durée de
+                              validité en cache (metadata_expire, sinon
+                              NBQUERY_CACHE_TTL) si autorefresh=1, None sinon
+                              (le cache ne se périme pas de lui-même).
+    """
+    repos_dir = Path(repos_dir or ConfigManager().get("NBQUERY_REPOSDIR"))
+    repos = []
+    for repo_file in sorted(repos_dir.glob("*.repo")):
+        parser = configparser.ConfigParser(interpolation=None)
+        try:
+            parser.read(repo_file, encoding="utf-8")
+        except configparser.Error as e:
+            logger.warning(f"Fichier de dépôt {repo_file} invalide : {str(e)}")
+            continue
+        for section in parser.sections():
+            repo = parser[section]
+            baseurl = repo.get("baseurl", "").strip()
+            if urlsplit(baseurl).scheme not in ("http", "https") or repo.get("enabled", "1") != "1":
+                continue
+            try:
+                priority = int(repo.get("priority", DEFAULT_PRIORITY))
+            except ValueError:
+                priority = DEFAULT_PRIORITY
+            autorefresh = repo.get("autorefresh", "0") == "1"
+            ttl = None
+            if autorefresh:
+                try:
+                    ttl = int(repo["metadata_expire"])
+                except (KeyError, ValueError):
+                    ttl = default_ttl()
+            repos.append({
+                "name": repo.get("name", section),
+                "baseurl": baseurl if baseurl.endswith("/") else baseurl + "/",
+                "priority": priority,
+                "autorefresh": autorefresh,
+                "ttl": ttl,
+            })
+    return repos
+
+
+class Mirror:
+    """Miroir d'un jeu de fichiers distants, avec sa santé mesurée."""
+
+    def __init__(self, baseurl: str, priority: int = DEFAULT_PRIORITY, name: Optional[str] = None,
+                 ttl: Optional[float] = None):
+        self.baseurl = baseurl if baseurl.endswith("/") else baseurl + "/"
+        self.priority = priority
+        self.name = name or urlsplit(self.baseurl).netloc
+        # Validité des réponses en cache (None : jusqu'à revalidation forcée)
+        self.ttl = ttl
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.down_until = 0.0
+
+    def url(self, path: str) -> str:
+        return urljoin(self.baseurl, path.lstrip("/"))
+
+    def available(self, now: float) -> bool:
+        return self.down_until <= now
+
+    def __repr__(self) -> str:
+        return f"Mirror({self.baseurl!r}, priority={self.priority}, latency={self.latency})"
+
+
+class MirrorSet:
+    """
+    Miroirs équivalents d'une même arborescence distante.
+
+    Les miroirs sont essayés par priorité croissante, puis par latence
+    mesurée ; un miroir jamais mesuré passe avant les autres de même
+    priorité pour être évalué. Un miroir en échec est mis de côté pour une
+    durée croissante, mais reste tenté en dernier recours.
+    """
+
+    _trees: Dict[str, "MirrorSet"] = {}
+    _trees_lock = threading.Lock()
+
+    def __init__(self, mirrors: Iterable[Mirror]):
+        self.mirrors = list(mirrors)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_repos(cls, repos: Iterable[Dict[str, Any]]) -> "MirrorSet":
+        return cls(Mirror(repo["baseurl"], repo["priority"], repo["name"], repo.get("ttl")) for repo in repos)
+
+    @classmethod
+    def pkgsrc_tree(cls, repos_dir: Optional[str] = None) -> "MirrorSet":
+        """
+        Miroirs de l'arbre pkgsrc (doc/CHANGES-*, distinfo, ...) déclarés dans repos.d.
+
+        Seuls les dépôts dont l'URL se termine par /pkgsrc/ exposent l'arbre
+        source ; le CDN NetBSD sert de repli si aucun n'est configuré. Le jeu
+        est partagé dans le processus pour conserver les latences mesurées.
+        """
+        repos_dir = str(repos_dir or ConfigManager().get("NBQUERY_REPOSDIR"))
+        with cls._trees_lock:
+            mirrors = cls._trees.get(repos_dir)
+            if mirrors is None:
+                repos = [repo for repo in load_remote_repos(repos_dir)
+                         if urlsplit(repo["baseurl"]).path.endswith("/pkgsrc/")]
+                if not repos:
+                    repos = [{"name": "NetBSD CDN", "baseurl": CDNSERVER + "current/pkgsrc/",
+                              "priority": DEFAULT_PRIORITY, "ttl": default_ttl()}]
+                mirrors = cls._trees[repos_dir] = cls.from_repos(repos)
+            return mirrors
+
+    def ordered(self) -> List[Mirror]:
+        now = time.monotonic()
+        with self._lock:
+            return sorted(self.mirrors, key=lambda m: (
+                not m.available(now), m.priority, m.latency if m.latency is not None else 0.0))
+
+    def record_success(self, mirror: Mirror, latency: float):
+        with self._lock:
+            if mirror.latency is None:
+                mirror.latency = latency
+            else:
+                mirror.latency += LATENCY_WEIGHT * (latency - mirror.latency)
+            mirror.failures = 0
+            mirror.down_until = 0.0
+
+    def record_failure(self, mirror: Mirror):
+        with self._lock:
+            mirror.failures += 1
+            delay = min(BACKOFF * 2 ** (mirror.failures - 1), MAX_BACKOFF)
+            mirror.down_until = time.monotonic() + delay
+
+
+class Fetcher:
+    """
+    Couche HTTP partagée des requêtes distantes.
+
+    Une session requests (connexions keep-alive) est gardée par hôte, avec un
+    pool de la taille du nombre de workers ; les requêtes groupées passent
+    par une fenêtre bornée de workers (scanner.scan).
+    """
+
+    _shared: Optional["Fetcher"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "Fetcher":
+        """Instance commune au processus, pour réutiliser les connexions."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def session(self, url: str) -> requests.Session:
+        """Session keep-alive de l'hôte de url, créée au premier appel."""
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount(key + "/", adapter)
+                self._sessions[key] = session
+            return session
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET via la session de l'hôte ; les codes d'erreur HTTP lèvent HTTPError."""
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session(url).get(url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def fetch(self, mirrors: MirrorSet, path: str, **kwargs) -> requests.Response:
+        """
+        Récupère path sur le meilleur miroir disponible, avec bascule automatique.
+
+        Une erreur réseau, un délai dépassé ou une erreur 5xx écarte le miroir et
+        fait passer au suivant ; un 404 passe au suivant sans pénaliser le
+        miroir (retard de synchronisation).
+
+        Raises:
+            NetworkError: Si aucun miroir n'a pu fournir le fichier.
+        """
+        errors = []
+        for mirror in mirrors.ordered():
+            url = mirror.url(path)
+            started = time.monotonic()
+            try:
+                response = self.get(url, **kwargs)
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code >= 500:
+                    mirrors.record_failure(mirror)
+                else:
+                    mirrors.record_success(mirror, time.monotonic() - started)
+                errors.append(f"{mirror.name}: {str(e)}")
+                continue
+            except requests.RequestException as e:
+                mirrors.record_failure(mirror)
+                logger.warning(f"Miroir {mirror.name} indisponible : {str(e)}")
+                errors.append(f"{mirror.name}: {str(e)}")
+                continue
+            mirrors.record_success(mirror, time.monotonic() - started)
+            return response
+        raise NetworkError(f"Impossible de récupérer {path} : {'; '.join(errors) or 'aucun miroir'}")
+
+    def fetch_many(self, mirrors: MirrorSet, paths: Iterable[str],
+                   **kwargs) -> Iterator[Tuple[str, Optional[requests.Response], Optional[str]]]:
+        """
+        Récupère plusieurs fichiers en parallèle (au plus max_workers à la fois).
+
+        Yields:
+            Tuple[str, Optional[Response], Optional[str]]: (chemin, réponse, erreur),
+                                                            dans l'ordre des chemins.
+        """
+        yield from scan(lambda path: self.fetch(mirrors, path, **kwargs), paths, jobs=self.max_workers)
+
+    def probe(self, mirrors: MirrorSet, path: str = "") -> List[Mirror]:
+        """Mesure en parallèle la latence (HEAD) de chaque miroir et retourne l'ordre obtenu."""
+        def head(mirror: Mirror):
+            started = time.monotonic()
+            try:
+                response = self.session(mirror.baseurl).head(mirror.url(path), timeout=self.timeout)
+            except requests.RequestException:
+                response = None
+            # Un miroir qui répond, même par une erreur 4xx, est joignable
+            if response is None or response.status_code >= 500:
+                mirrors.record_failure(mirror)
+            else:
+                mirrors.record_success(mirror, time.monotonic() - started)
+
+        for _ in scan(head, mirrors.mirrors, jobs=self.max_workers):
+            pass
+        return mirrors.ordered()
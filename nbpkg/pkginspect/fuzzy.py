@@ -0,0 +1,167 @@
+import threading
+from collections import Counter
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
+from nbpkg.common.logger import logger
+from nbpkg.pkginspect.pathmap import PackagePathMap
+from nbpkg.pkginspect.pkgdbsnap import PkgDBSnapshot, split_pkgname
+from nbpkg.pkginspect.pkgindex import PkgIndex
+
+# Similarité minimale d'une suggestion (même seuil par défaut que pg_trgm)
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_LIMIT = 5
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Trigrammes d'un nom, complété de deux espaces en tête et d'une en fin
+    (comme pg_trgm) pour que début et fin du mot pèsent davantage.
+    """
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Index de trigrammes des noms de paquets, pour les suggestions « vouliez-vous dire ».
+
+    Chaque trigramme renvoie à la liste des noms qui le contiennent ; une
+    requête additionne les occurrences communes de ses trigrammes et classe
+    les noms par similarité (coefficient de Jaccard sur les trigrammes).
+    """
+
+    _shared: Dict[Tuple, Tuple[Tuple, "TrigramIndex"]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._sizes: List[int] = []
+        self._ids: Dict[str, int] = {}
+        self._locations: List[List[str]] = []
+        self._postings: Dict[str, List[int]] = {}
+
+    def add(self, name: str, location: Optional[str] = None):
+        """Ajoute un nom (et l'emplacement où il a été trouvé) à l'index."""
+        if not name:
+            return
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = self._ids[name] = len(self._names)
+            grams = trigrams(name)
+            self._names.append(name)
+            self._sizes.append(len(grams))
+            self._locations.append([])
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(name_id)
+        if location and location not in self._locations[name_id]:
+            self._locations[name_id].append(location)
+
+    @classmethod
+    def from_sources(cls, pkgsrc_entries: Iterable[Tuple[str, Optional[str], str]] = (),
+                     installed: Iterable[str] = ()) -> "TrigramIndex":
+        """
+        Construit l'index à partir de l'arborescence pkgsrc et de pkgdb.
+
+        Args:
+            pkgsrc_entries: (nom du répertoire, PKGNAME, "category/package") de l'index pkgsrc
+                            (wip compris).
+            installed: Noms des paquets installés (pkgdb).
+        """
+        index = cls()
+        for name, pkgname, path in pkgsrc_entries:
+            index.add(name, path)
+            if pkgname:
+                # PKGNAME peut différer du répertoire (py-requests -> py311-requests)
+                index.add(split_pkgname(pkgname)[0], path)
+        for name in installed:
+            index.add(name, "pkgdb")
+        logger.debug(f"Index de trigrammes construit : {len(index)} noms, {len(index._postings)} trigrammes")
+        return index
+
+    @classmethod
+    def shared(cls, key: Tuple, version: Tuple, build) -> "TrigramIndex":
+        """
+        Index commun au processus pour key, construit par build() au premier
+        appel et reconstruit quand version (ex. mtimes des sources) change.
+        """
+        with cls._lock:
+            cached = cls._shared.get(key)
+            if cached is None or cached[0] != version:
+                cached = cls._shared[key] = (version, build())
+            return cached[1]
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._shared.clear()
+
+    def suggest(self, query: str, limit: int = DEFAULT_LIMIT,
+                threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Noms les plus proches de query.
+
+        Args:
+            query (str): Nom recherché, éventuellement mal orthographié (ex. "pyhton").
+            limit (int): Nombre maximal de suggestions.
+            threshold (float): Similarité minimale (0 à 1).
+
+        Returns:
+            List[Dict[str, Any]]: "name", "similarity" et "locations"
+                                  ("category/package" ou "pkgdb"), du plus proche au moins proche.
+        """
+        grams = trigrams(query)
+        counts: Counter = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings:
+                counts.update(postings)
+        size = len(grams)
+        scored = []
+        for name_id, common in counts.items():
+            similarity = common / (size + self._sizes[name_id] - common)
+            if similarity >= threshold:
+                scored.append((-similarity, abs(len(self._names[name_id]) - len(query)), self._names[name_id], name_id))
+        scored.sort()
+        return [
+            {"name": name, "similarity": round(-similarity, 3), "locations": list(self._locations[name_id])}
+            for similarity, _, name, name_id in scored[:limit]
+        ]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+def name_index(roots: Optional[List[str]] = None, pkg_db_path: Optional[str] = None) -> TrigramIndex:
+    """
+    Index de trigrammes des noms de pkgsrc (wip compris) et de pkgdb, partagé.
+
+    Les noms de l'arborescence viennent de l'index persistant s'il existe,
+    sinon de la table des chemins ; l'index de trigrammes est reconstruit
+    quand l'un ou l'autre change (mtime de l'index, de pkgdb).
+
+    Args:
+        roots (Optional[List[str]]): Racines pkgsrc (par défaut: dépôts locaux configurés).
+        pkg_db_path (Optional[str]): Répertoire pkgdb (par défaut: PKG_DBDIR).
+    """
+    pkg_index = PkgIndex(roots=roots)
+    try:
+        snapshot = PkgDBSnapshot.load(pkg_db_path)
+        installed_key = (snapshot.path, snapshot.pkgdb_mtime)
+    except (OSError, ValueError) as e:
+        logger.debug(f"pkgdb ignoré pour les suggestions : {str(e)}")
+        snapshot, installed_key = None, None
+    if pkg_index.exists():
+        version = ("index", pkg_index.index_path.stat().st_mtime_ns, installed_key)
+        entries = pkg_index.names
+    else:
+        path_map = PackagePathMap.for_roots(pkg_index.roots)
+        version = ("tree", id(path_map), installed_key)
+        entries = lambda: ((name, None, path) for name, path in path_map.entries())
+    installed = lambda: (split_pkgname(pkgname)[0] for pkgname in snapshot.names()) if snapshot else ()
+    try:
+        return TrigramIndex.shared((tuple(pkg_index.roots), pkg_db_path), version,
+                                   lambda: TrigramIndex.from_sources(entries(), installed()))
+    finally:
+        pkg_index.close()
@@ -0,0 +1,301 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+import requests
+from nbpkg.common.logger import logger
+from nbpkg.common.nberrors import NetworkError
+from nbpkg.config.__appconfig__ import NBQUERY_CACHE_SIZE
+from nbpkg.config.config import ConfigManager
+from nbpkg.pkginspect.fetch import Fetcher, Mirror, MirrorSet
+
+CACHE_DIRNAME = "http-cache"
+SCHEMA_VERSION = 1
+_WRITE_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+
+class CachedResponse:
+    """Réponse servie par HttpCache, depuis le disque ou le réseau."""
+
+    def __init__(self, url: str, path: Optional[Path], content_type: Optional[str], status: str,
+                 content: Optional[bytes] = None):
+        self.url = url
+        # None si la réponse n'a pu être mise en cache (contenu gardé en mémoire)
+        self.path = path
+        self.content_type = content_type
+        # "hit" (encore valide), "revalidated" (304), "stale" (hors ligne) ou "miss"
+        self.status = status
+        self._content = content
+
+    @property
+    def from_cache(self) -> bool:
+        return self.status != "miss"
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = self.path.read_bytes()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        encoding = "utf-8"
+        if self.content_type and "charset=" in self.content_type:
+            encoding = self.content_type.split("charset=", 1)[1].split(";")[0].strip()
+        return self.content.decode(encoding, errors="replace")
+
+
+class HttpCache:
+    """
+    Cache disque des requêtes distantes, revalidé par ETag/Last-Modified.
+
+    Une réponse est servie sans réseau tant qu'elle a moins que le ttl du
+    miroir qui l'a fournie (dérivé d'autorefresh dans repos.d) ; au-delà, un
+    GET conditionnel la revalide (304) ou la remplace. Si aucun miroir ne
+    répond, la copie périmée est servie. Le cache est borné en taille et
+    évince les réponses les moins récemment utilisées.
+
+    Si le répertoire du cache ne peut être créé ou ouvert, les réponses sont
+    récupérées directement, sans cache.
+    """
+
+    _shared: Optional["HttpCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size: Optional[int] = None,
+                 fetcher: Optional[Fetcher] = None):
+        config = ConfigManager()
+        self.cache_dir = Path(cache_dir or Path(config.get("NBQUERY_DBDIR")) / CACHE_DIRNAME)
+        if max_size is None:
+            try:
+                max_size = int(config.get("NBQUERY_CACHE_SIZE"))
+            except (TypeError, ValueError):
+                max_size = int(NBQUERY_CACHE_SIZE)
+        self.max_size = max_size
+        self.fetcher = fetcher or Fetcher.shared()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @classmethod
+    def shared(cls) -> "HttpCache":
+        """Cache commun au processus, adossé au Fetcher partagé."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.cache_dir / "index.db"), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] not in (0, SCHEMA_VERSION):
+                self._conn.execute("DROP TABLE IF EXISTS responses")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _lookup(self, mirrors: MirrorSet, path: str) -> Optional[Tuple[Mirror, sqlite3.Row]]:
+        # Une copie venant de n'importe quel miroir équivalent convient ;
+        # la plus récente l'emporte
+        found = None
+        with self._lock:
+            conn = self._connect()
+            for mirror in mirrors.mirrors:
+                row = conn.execute("SELECT * FROM responses WHERE url = ?", (mirror.url(path),)).fetchone()
+                if row is not None and (self.cache_dir / row["filename"]).exists():
+                    if found is None or row["fetched_at"] > found[1]["fetched_at"]:
+                        found = (mirror, row)
+        return found
+
+    def _serve(self, row: sqlite3.Row, status: str, revalidated: bool = False) -> CachedResponse:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    if revalidated:
+                        conn.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                                     (now, now, row["url"]))
+                    else:
+                        conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, row["url"]))
+        except sqlite3.Error as e:
+            # Base en lecture seule : la copie reste valable, seule sa date n'est pas mise à jour
+            logger.debug(f"Cache HTTP : date d'accès de {row['url']} non enregistrée : {str(e)}")
+        return CachedResponse(row["url"], self.cache_dir / row["filename"], row["content_type"], status)
+
+    def _store(self, url: str, response: requests.Response) -> CachedResponse:
+        filename = hashlib.sha256(url.encode()).hexdigest()
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        except OSError as e:
+            logger.debug(f"Cache HTTP {self.cache_dir} indisponible, {url} servi sans cache : {str(e)}")
+            return self._uncached(url, response)
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(_WRITE_CHUNK):
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp, self.cache_dir / filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        finally:
+            response.close()
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (url, filename, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                         response.headers.get("Content-Type"), size, now, now),
+                    )
+        except (OSError, sqlite3.Error) as e:
+            logger.debug(f"Cache HTTP : {url} non enregistré : {str(e)}")
+        else:
+            self.evict(keep=url)
+        return CachedResponse(url, self.cache_dir / filename, response.headers.get("Content-Type"), "miss")
+
+    @staticmethod
+    def _uncached(url: str, response: requests.Response) -> CachedResponse:
+        try:
+            return CachedResponse(url, None, response.headers.get("Content-Type"), "miss", content=response.content)
+        finally:
+            response.close()
+
+    @staticmethod
+    def _requested_url(response: requests.Response) -> str:
+        return response.history[0].url if response.history else response.url
+
+    def fetch(self, mirrors: MirrorSet, path: str, force: bool = False) -> CachedResponse:
+        """
+        Récupère path via le cache.
+
+        Args:
+            mirrors (MirrorSet): Miroirs équivalents fournissant path.
+            path (str): Chemin relatif aux miroirs (ex. doc/CHANGES-2024).
+            force (bool): Revalider même si la copie est encore dans son ttl.
+
+        Raises:
+            NetworkError: Si aucun miroir ne répond et que rien n'est en cache.
+        """
+        try:
+            entry = self._lookup(mirrors, path)
+        except (OSError, sqlite3.Error) as e:
+            logger.debug(f"Cache HTTP {self.cache_dir} indisponible, {path} récupéré sans cache : {str(e)}")
+            response = self.fetcher.fetch(mirrors, path, stream=True)
+            return self._uncached(self._requested_url(response), response)
+        if entry is not None:
+            mirror, row = entry
+            if not force and (mirror.ttl is None or time.time() - row["fetched_at"] < mirror.ttl):
+                return self._serve(row, "hit")
+            headers = {}
+            if row["etag"]:
+                headers["If-None-Match"] = row["etag"]
+            if row["last_modified"]:
+                headers["If-Modified-Since"] = row["last_modified"]
+            try:
+                response = self.fetcher.get(row["url"], headers=headers, stream=True)
+            except requests.RequestException as e:
+                logger.warning(f"Revalidation de {row['url']} impossible : {str(e)}")
+            else:
+                if response.status_code == 304:
+                    response.close()
+                    return self._serve(row, "revalidated", revalidated=True)
+                return self._store(row["url"], response)
+
+        try:
+            response = self.fetcher.fetch(mirrors, path, stream=True)
+        except NetworkError:
+            if entry is None:
+                raise
+            logger.warning(f"Miroirs injoignables, copie en cache de {path} servie")
+            return self._serve(entry[1], "stale")
+        return self._store(self._requested_url(response), response)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Évince les réponses les moins récemment utilisées au-delà de max_size.
+
+        Args:
+            keep (Optional[str]): URL à ne jamais évincer (la réponse en cours de service).
+
+        Returns:
+            int: Nombre de réponses évincées.
+        """
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_size:
+                return 0
+            evicted = []
+            for row in conn.execute("SELECT url, filename, size FROM responses ORDER BY accessed_at"):
+                if total <= self.max_size:
+                    break
+                if row["url"] == keep:
+                    continue
+                evicted.append(row)
+                total -= row["size"]
+            with conn:
+                conn.executemany("DELETE FROM responses WHERE url = ?", [(row["url"],) for row in evicted])
+        for row in evicted:
+            try:
+                (self.cache_dir / row["filename"]).unlink()
+            except FileNotFoundError:
+                pass
+        logger.debug(f"Cache HTTP : {len(evicted)} réponses évincées")
+        return len(evicted)
+
+    def invalidate(self, url: Optional[str] = None) -> int:
+        """Supprime une réponse, ou tout le cache si url est None."""
+        with self._lock:
+            conn = self._connect()
+            if url is None:
+                rows = conn.execute("SELECT filename FROM responses").fetchall()
+            else:
+                rows = conn.execute("SELECT filename FROM responses WHERE url = ?", (url,)).fetchall()
+            with conn:
+                if url is None:
+                    conn.execute("DELETE FROM responses")
+                else:
+                    conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+        for row in rows:
+            try:
+                (self.cache_dir / row["filename"]).unlink()
+            except FileNotFoundError:
+                pass
+        return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"responses": count, "size": size, "max_size": self.max_size}
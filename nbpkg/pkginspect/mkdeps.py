@@ -0,0 +1,98 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Set
+
+DEPENDS_KINDS = ("DEPENDS", "BUILD_DEPENDS", "TOOL_DEPENDS")
+
+_ASSIGN = re.compile(r"^(" + "|".join(DEPENDS_KINDS) + r")\s*[+?:!]?=\s*(.*)$")
+_INCLUDE = re.compile(r'^\.\s*[-s]?include\s+"([^"]+)"')
+
+
+def _logical_lines(path: Path) -> List[str]:
+    """Lit un Makefile en joignant les lignes continuées par "\\"."""
+    lines, current = [], ""
+    with path.open(errors="replace") as f:
+        for raw in f:
+            line = raw.rstrip("\n")
+            if line.endswith("\\"):
+                current += line[:-1] + " "
+                continue
+            lines.append((current + line).strip())
+            current = ""
+    if current:
+        lines.append(current.strip())
+    return lines
+
+
+def _relative_pkgpath(pkgsrc_dir: str, from_dir: str, target: str) -> str:
+    """Convertit "../../devel/foo" vu depuis from_dir en "devel/foo" (ou "" hors arbre)."""
+    if "$" in target:
+        return ""
+    full = os.path.normpath(os.path.join(from_dir, target))
+    rel = os.path.relpath(full, pkgsrc_dir)
+    if rel.startswith("..") or rel.count(os.sep) != 1:
+        return ""
+    return rel.replace(os.sep, "/")
+
+
+def parse_depends(pkgsrc_dir: str, pkgpath: str) -> Dict[str, List[str]]:
+    """
+    Extrait les dépendances déclarées d'un paquet pkgsrc sans invoquer make.
+
+    Les DEPENDS, BUILD_DEPENDS et TOOL_DEPENDS du Makefile et des fichiers
+    qu'il inclut (Makefile.common, options.mk, ...) sont collectés ; chaque
+    buildlink3.mk inclus compte comme une dépendance DEPENDS sur son paquet.
+    Les conditions .if ne sont pas évaluées : toutes les branches sont prises
+    en compte, ce qui surestime légèrement le graphe. Les fichiers de mk/ et
+    les chemins contenant des variables non résolues sont ignorés.
+
+    Args:
+        pkgsrc_dir (str): Racine pkgsrc.
+        pkgpath (str): Paquet sous la forme "category/package".
+
+    Returns:
+        Dict[str, List[str]]: Chemins "category/package" par type de dépendance,
+                              plus "unresolved" pour les entrées inexploitables.
+    """
+    pkgsrc_dir = os.path.normpath(pkgsrc_dir)
+    result: Dict[str, List[str]] = {kind: [] for kind in DEPENDS_KINDS}
+    result["unresolved"] = []
+    visited: Set[str] = set()
+    pending = [os.path.join(pkgsrc_dir, pkgpath, "Makefile")]
+    while pending:
+        makefile = os.path.normpath(pending.pop())
+        if makefile in visited or not os.path.isfile(makefile):
+            continue
+        visited.add(makefile)
+        from_dir = os.path.dirname(makefile)
+        for line in _logical_lines(Path(makefile)):
+            match = _ASSIGN.match(line)
+            if match:
+                kind, value = match.groups()
+                for word in value.split("#", 1)[0].split():
+                    _, sep, target = word.rpartition(":")
+                    dep = _relative_pkgpath(pkgsrc_dir, from_dir, target) if sep else ""
+                    (result[kind] if dep else result["unresolved"]).append(dep or word)
+                continue
+            match = _INCLUDE.match(line)
+            if not match:
+                continue
+            target = match.group(1)
+            if "$" in target:
+                result["unresolved"].append(target)
+                continue
+            included = os.path.normpath(os.path.join(from_dir, target))
+            if os.path.relpath(included, pkgsrc_dir).split(os.sep)[0] == "mk":
+                continue
+            name = os.path.basename(included)
+            if name == "buildlink3.mk":
+                dep = _relative_pkgpath(pkgsrc_dir, from_dir, os.path.dirname(target))
+                if dep:
+                    result["DEPENDS"].append(dep)
+            elif name != "builtin.mk":
+                pending.append(included)
+
+    for kind in DEPENDS_KINDS:
+        result[kind] = sorted(set(dep for dep in result[kind] if dep != pkgpath))
+    return result
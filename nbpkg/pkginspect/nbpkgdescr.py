@@ -1,16 +1,34 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Optional, List, Dict,Any
+from typing import Optional, List, Dict, Any, Iterator, Callable
 from functools import wraps
-import re
-import requests
-import hashlib
+import json
+import os
+import sqlite3
+import time
 from nbpkg.common.logger import logger
 from nbpkg.core.package import SourcePackage, BinaryPackage
 from nbpkg.core.pkgdb import PkgDB
 from nbpkg.common.nberrors import PackageParsingError
 from nbpkg.core.repository import RepositoryManager
 from nbpkg.config.__appconfig__ import PKGSRCDIR
+from nbpkg.pkginspect.pkgindex import PkgIndex, local_roots, scan_by_name, scan_by_maintainer, scan_packages
+from nbpkg.pkginspect.pathmap import PackagePathMap
+from nbpkg.pkginspect.pkgdbsnap import PkgDBSnapshot, split_pkgname
+from nbpkg.pkginspect.depgraph import DepGraph
+from nbpkg.pkginspect.mkdeps import DEPENDS_KINDS
+from nbpkg.pkginspect.distinfo import parse_distinfo, verify_entries, verify_tree
+from nbpkg.pkginspect.digestcache import DigestCache
+from nbpkg.pkginspect.distlint import DistLint, default_distdir
+from nbpkg.pkginspect.fetch import MirrorSet
+from nbpkg.pkginspect.httpcache import HttpCache
+from nbpkg.pkginspect.pkgsummary import SummaryIndex
+from nbpkg.pkginspect.dewey import version_key, compare_versions, dewey_cmp
+from nbpkg.pkginspect.binpkg import inspect_package, iter_inspect
+from nbpkg.pkginspect.remotepkg import inspect_remote
+from nbpkg.pkginspect.pkglog import PkgLog
+from nbpkg.pkginspect.fuzzy import name_index
+from nbpkg.pkginspect.pkgtable import DetailsTable
 
 # Décorateurs
 def log_operation(func):
@@ -41,26 +59,86 @@ def handle_package_errors(func):
             raise PackageParsingError(f"Erreur lors du traitement du paquet : {str(e)}")
     return wrapper
 
+class _LazyField:
+    """
+    Champ de PkgDetails résolu au premier accès par le chargeur enregistré
+    (voir PkgDetails.defer), puis mémorisé ; une affectation remplace le chargeur.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return None  # Valeur par défaut du champ pour dataclass
+        values = obj.__dict__
+        if self.name in values.get("_loaders", ()):
+            obj.resolve(self.name)
+        return values.get(self.name)
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+        loaders = obj.__dict__.get("_loaders")
+        if loaders:
+            loaders.pop(self.name, None)
+
+
 @dataclass
 class PkgDetails:
-    pkgname: Optional[str] = None
-    version: Optional[str] = None
-    comment: Optional[str] = None
-    description: Optional[str] = None
-    categories: Optional[List[str]] = None
-    size: Optional[str] = None
-    origin: Optional[str] = None
-    files: Optional[List[str]] = None
-    build_info: Optional[Dict[str, str]] = None
-    dependencies: Optional[List[str]] = None
-    build_deps: Optional[List[str]] = None  # Ajout pour build_deps
-    runtime_deps: Optional[List[str]] = None  # Ajout pour runtime_deps
-    error: Optional[str] = None
-    license: Optional[str] = None
-    has_man_pages: Optional[bool] = None
-    maintainer: Optional[str] = None
-    homepage: Optional[str] = None
-    master_sites: Optional[List[str]] = None  # Ajout pour master_sites
+    pkgname: Optional[str] = _LazyField()
+    version: Optional[str] = _LazyField()
+    comment: Optional[str] = _LazyField()
+    description: Optional[str] = _LazyField()
+    categories: Optional[List[str]] = _LazyField()
+    size: Optional[str] = _LazyField()
+    origin: Optional[str] = _LazyField()
+    files: Optional[List[str]] = _LazyField()
+    build_info: Optional[Dict[str, str]] = _LazyField()
+    dependencies: Optional[List[str]] = _LazyField()
+    build_deps: Optional[List[str]] = _LazyField()  # Ajout pour build_deps
+    runtime_deps: Optional[List[str]] = _LazyField()  # Ajout pour runtime_deps
+    error: Optional[str] = _LazyField()
+    license: Optional[str] = _LazyField()
+    has_man_pages: Optional[bool] = _LazyField()
+    maintainer: Optional[str] = _LazyField()
+    homepage: Optional[str] = _LazyField()
+    master_sites: Optional[List[str]] = _LazyField()  # Ajout pour master_sites
+
+    @property
+    def _loaders(self) -> Dict[str, Callable[[], Any]]:
+        return self.__dict__.setdefault("_loaders", {})
+
+    def defer(self, loaders: Dict[str, Callable[[], Any]], error: str = "Erreur lors du chargement des détails"):
+        """
+        Enregistre des chargeurs de champs, appelés au premier accès au champ.
+
+        Args:
+            loaders (Dict[str, Callable[[], Any]]): Chargeur de chaque champ.
+            error (str): Préfixe du message consigné dans error si un chargeur échoue
+                         (le champ reste alors à None).
+        """
+        for name, loader in loaders.items():
+            self._loaders[name] = (loader, error)
+
+    def resolve(self, *names: str):
+        """Charge les champs différés names (par défaut: tous ceux en attente)."""
+        for name in names or list(self._loaders):
+            pending = self._loaders.pop(name, None)
+            if pending is None:
+                continue
+            loader, error = pending
+            try:
+                self.__dict__[name] = loader()
+            except Exception as e:
+                self.__dict__[name] = None
+                if not self.__dict__.get("error"):
+                    self.__dict__["error"] = f"{error} : {str(e)}"
+                    self._loaders.pop("error", None)
+
+    @property
+    def pending(self) -> List[str]:
+        """Champs dont le chargeur n'a pas encore été appelé."""
+        return list(self._loaders)
 
 class PkgQuery:
     def __init__(self, package_name: str = None, binary: bool = False, binary_file: str = None):
@@ -70,10 +148,18 @@ class PkgQuery:
         self.details = PkgDetails()
         self._pkg = None
         self._pkg_path = None
+        self._suggestions: List[str] = []
+        self._located = False
+        self._fetch_done = False
+        self._fetch_error: Optional[Exception] = None
         self._pkgdb = PkgDB() if binary else None
         self._repo_manager = RepositoryManager()  # Initialiser RepositoryManager
         if package_name:
             if binary:
+                if binary_file and (os.path.isfile(binary_file) or binary_file.startswith(("http://", "https://"))):
+                    # Archive locale ou distante : seules les métadonnées de tête sont lues
+                    self._load_binary_archive()
+                    return
                 if binary_file:
                     self._pkg = BinaryPackage.from_file_or_url(binary_file)
                 else:
@@ -82,21 +168,31 @@ class PkgQuery:
             else:
                 self._pkg = SourcePackage(name=package_name, version="Inconnu")
                 self._load_source_details()
-                self._pkg_path = self._find_package_path()
 
     def _find_package_path(self) -> Optional[Path]:
-        # Utiliser les dépôts locaux configurés
-        local_repos = [repo for repo in self._repo_manager.repositories if repo["type"] == "local"]
-        for repo in local_repos:
-            base = Path(repo["path"])
-            if not base.exists():
-                continue
-            for category in base.iterdir():
-                if category.is_dir():
-                    pkg_path = category / self._package_name
-                    if pkg_path.exists() and pkg_path.is_dir():
-                        return pkg_path
-        return None
+        # Table nom -> chemin des dépôts locaux configurés, partagée entre instances
+        roots = local_roots(self._repo_manager)
+        path = PackagePathMap.for_roots(roots).lookup(self._package_name)
+        self._located = True
+        if path is None and self._package_name:
+            # Nom inconnu : suggestions par similarité (fautes de frappe)
+            self._suggestions = [item["name"] for item in name_index(roots).suggest(self._package_name)]
+            if self._suggestions:
+                logger.info(f"Paquet {self._package_name} introuvable ; vouliez-vous dire : {', '.join(self._suggestions)} ?")
+        return path
+
+    def _not_found(self) -> str:
+        message = f"Paquet {self._package_name} non trouvé dans /usr/pkgsrc"
+        if self._suggestions:
+            message += f" (vouliez-vous dire : {', '.join(self._suggestions)} ?)"
+        return message
+
+    @property
+    def suggestions(self) -> List[str]:
+        """Noms proches proposés quand le paquet n'a pas été trouvé dans pkgsrc."""
+        if not self._located and self._package_name and not self._binary:
+            self._pkg_path = self._find_package_path()
+        return self._suggestions
 
     @property
     def package_name(self) -> str:
@@ -106,51 +202,84 @@ class PkgQuery:
     def binary(self) -> bool:
         return self._binary
 
+    def _fetched(self, fetch: Callable[[], None]):
+        """
+        Paquet après le chargement de ses informations (Makefile pour les sources,
+        archive et pkgdb pour les binaires), effectué une seule fois : un échec
+        est mémorisé et relancé aux accès suivants.
+        """
+        if self._fetch_error is not None:
+            raise self._fetch_error
+        if not self._fetch_done:
+            try:
+                fetch()
+            except Exception as e:
+                self._fetch_error = e
+                raise
+            self._fetch_done = True
+        return self._pkg
+
     @log_operation
     @handle_package_errors
     def _load_source_details(self):
-        try:
-            self._pkg.fetch_source_info()
-            self.details.pkgname = self._pkg.name
-            self.details.version = self._pkg.version
-            self.details.comment = self._pkg.comment
-            self.details.description = self._pkg.description
-            self.details.dependencies = self._pkg.get_dependencies()
-            self.details.categories = self._pkg.categories
-            self.details.files = self._pkg.files
-            self.details.maintainer = self._pkg.maintainer
-            self.details.homepage = self._pkg.homepage
-            self.details.license = self._pkg.license
-            self.details.has_man_pages = self._pkg.has_man_pages
-            self.details.master_sites = self._pkg.get_master_sites()  # Récupérer les master_sites
-        except Exception as e:
-            self.details.error = f"Erreur lors du chargement des détails source : {str(e)}"
+        # Chaque champ est chargé au premier accès ; le Makefile n'est lu qu'une fois
+        pkg = lambda: self._fetched(self._pkg.fetch_source_info)
+        self.details.defer({
+            # error : échec de la lecture du Makefile, sans charger les autres champs
+            "error": lambda: pkg() and None,
+            "pkgname": lambda: pkg().name,
+            "version": lambda: pkg().version,
+            "comment": lambda: pkg().comment,
+            "description": lambda: pkg().description,
+            "dependencies": lambda: pkg().get_dependencies(),
+            "categories": lambda: pkg().categories,
+            "files": lambda: pkg().files,
+            "maintainer": lambda: pkg().maintainer,
+            "homepage": lambda: pkg().homepage,
+            "license": lambda: pkg().license,
+            "has_man_pages": lambda: pkg().has_man_pages,
+            "master_sites": lambda: pkg().get_master_sites(),  # Récupérer les master_sites
+        }, error="Erreur lors du chargement des détails source")
+
+    def _fetch_binary_info(self):
+        if self._binary_file:
+            self._pkg.fetch_binary_info()
+            self._pkg.sync_with_installed(self._pkgdb)
 
     @log_operation
     @handle_package_errors
     def _load_binary_details(self):
+        pkg = lambda: self._fetched(self._fetch_binary_info)
+        self.details.defer({
+            "error": lambda: pkg() and None,
+            "pkgname": lambda: pkg().name,
+            "version": lambda: pkg().version,
+            "comment": lambda: pkg().comment,
+            "description": lambda: pkg().description,
+            "dependencies": lambda: pkg().get_dependencies(),
+            "build_deps": lambda: pkg().build_deps,  # Ajout des build_deps
+            "runtime_deps": lambda: pkg().runtime_deps,  # Ajout des runtime_deps
+            "categories": lambda: pkg().categories,
+            "files": lambda: pkg().files,
+            "origin": lambda: pkg().origin,
+            "size": lambda: str(pkg().size) if pkg().size else None,
+            "build_info": lambda: pkg().build_info,
+            "maintainer": lambda: pkg().maintainer,
+            "homepage": lambda: pkg().homepage,
+            "license": lambda: pkg().license,
+            "has_man_pages": lambda: pkg().has_man_pages,
+            "master_sites": lambda: pkg().master_sites,  # Ajout des master_sites (peut être vide pour les binaires)
+        }, error="Erreur lors du chargement des détails binaires")
+
+    @log_operation
+    @handle_package_errors
+    def _load_binary_archive(self):
         try:
-            if self._binary_file:
-                self._pkg.fetch_binary_info()
-                self._pkg.sync_with_installed(self._pkgdb)
-            self.details.pkgname = self._pkg.name
-            self.details.version = self._pkg.version
-            self.details.comment = self._pkg.comment
-            self.details.description = self._pkg.description
-            self.details.dependencies = self._pkg.get_dependencies()
-            self.details.build_deps = self._pkg.build_deps  # Ajout des build_deps
-            self.details.runtime_deps = self._pkg.runtime_deps  # Ajout des runtime_deps
-            self.details.categories = self._pkg.categories
-            self.details.files = self._pkg.files
-            self.details.origin = self._pkg.origin
-            self.details.size = str(self._pkg.size) if self._pkg.size else None
-            self.details.build_info = self._pkg.build_info
-            self.details.maintainer = self._pkg.maintainer
-            self.details.homepage = self._pkg.homepage
-            self.details.license = self._pkg.license
-            self.details.has_man_pages = self._pkg.has_man_pages
-            self.details.master_sites = self._pkg.master_sites  # Ajout des master_sites (peut être vide pour les binaires)
+            self.details = PkgQuery.inspect_binary(self._binary_file)
+            self._pkg = BinaryPackage(name=self.details.pkgname or self._package_name,
+                                      version=self.details.version or "Inconnu")
         except Exception as e:
+            self._pkg = BinaryPackage(name=self._package_name, version="Inconnu")
             self.details.error = f"Erreur lors du chargement des détails binaires : {str(e)}"
 
     @log_operation
@@ -184,20 +313,12 @@ class PkgQuery:
     @handle_package_errors
     def search_by_maintainer(maintainer: str, by_email: bool = True) -> PkgDetails:
         details = PkgDetails()
-        base = Path("/usr/pkgsrc")
-        found = []
-        if base.exists():
-            for category in base.iterdir():
-                if category.is_dir():
-                    for pkg in category.iterdir():
-                        if pkg.is_dir():
-                            src_pkg = SourcePackage(name=pkg.name, version="Inconnu")
-                            src_pkg.fetch_source_info()
-                            maint_value = src_pkg.maintainer or ""
-                            if by_email and maintainer.lower() in maint_value.lower():
-                                found.append(f"{category.name}/{pkg.name}")
-                            elif not by_email and maint_value and maintainer.lower() in maint_value.split('@')[0].lower():
-                                found.append(f"{category.name}/{pkg.name}")
+        index = PkgIndex()
+        if index.try_ensure():
+            found = [item["path"] for item in index.search_maintainer(maintainer, by_email=by_email)]
+        else:
+            # Index impossible à construire : recherche directe dans l'arbre
+            found = sorted(item["path"] for item in scan_by_maintainer(index.roots, maintainer, by_email=by_email))
         details.files = found or ["Aucun paquet trouvé"]
         details.pkgname = f"Recherche pour {maintainer} ({'email' if by_email else 'nom'})"
         return details
@@ -206,29 +327,13 @@ class PkgQuery:
     @log_operation
     @handle_package_errors
     def search_by_name(package_name: str, category: str = None) -> PkgDetails:
-        repo_manager = RepositoryManager()
         details = PkgDetails()
-        found = []
-        local_repos = [repo for repo in repo_manager.repositories if repo["type"] == "local"]
-        for repo in local_repos:
-            base = Path(repo["path"])
-            if not base.exists():
-                continue
-            dirs = [base / category] if category else base.iterdir()
-            for cat in dirs:
-                if cat.is_dir():
-                    for pkg in cat.iterdir():
-                        if pkg.is_dir() and package_name.lower() in pkg.name.lower():
-                            src_pkg = SourcePackage(name=pkg.name, version="Inconnu")
-                            src_pkg.fetch_source_info()
-                            found.append({
-                                "path": f"{cat.name}/{pkg.name}",
-                                "version": src_pkg.version,
-                                "comment": src_pkg.comment,
-                                "category": cat.name,
-                                "name": pkg.name,
-                                "master_sites": src_pkg.get_master_sites()
-                            })
+        index = PkgIndex()
+        if index.try_ensure():
+            found = index.search_name(package_name, category=category)
+        else:
+            # Index impossible à construire : recherche directe dans l'arbre
+            found = sorted(scan_by_name(index.roots, package_name, category=category), key=lambda item: item["path"])
         if found:
             details.files = [f"{item['path']} (Version: {item['version']}, Commentaire: {item['comment']})" for item in found]
         else:
@@ -236,6 +341,281 @@ class PkgQuery:
         details.pkgname = f"Recherche pour {package_name}" + (f" dans {category}" if category else "")
         return details
 
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def search_text(query: str, limit: Optional[int] = 20, category: str = None) -> List[Dict[str, Any]]:
+        """
+        Recherche plein texte dans les noms, COMMENT et DESCR de l'arborescence pkgsrc.
+
+        Args:
+            query (str): Requête (ex. "postgres client library", "postg*").
+            limit (Optional[int]): Nombre maximal de résultats.
+            category (str): Limiter à une catégorie.
+
+        Returns:
+            List[Dict[str, Any]]: Entrées d'index classées ("path", "comment", "score", ...).
+        """
+        index = PkgIndex()
+        if not index.try_ensure():
+            # Index impossible à construire : postings calculés en mémoire depuis l'arbre
+            index.build_in_memory()
+        try:
+            return index.search_text(query, limit=limit, category=category)
+        finally:
+            index.close()
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def suggest(package_name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Noms de paquets proches de package_name (pkgsrc, wip et pkgdb), classés
+        par similarité de trigrammes : tolère les fautes de frappe ("pyhton").
+
+        Args:
+            package_name (str): Nom recherché.
+            limit (int): Nombre maximal de suggestions.
+
+        Returns:
+            List[Dict[str, Any]]: "name", "similarity" et "locations" de chaque suggestion.
+        """
+        return name_index(local_roots()).suggest(package_name, limit=limit)
+
+    @staticmethod
+    def iter_search_by_name(package_name: str, category: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Variante en flux de search_by_name : chaque paquet trouvé est produit
+        dès qu'il est lu, depuis l'index s'il existe, sinon depuis l'arbre.
+
+        Yields:
+            Dict[str, Any]: Entrée du paquet ("path", "name", "version", "comment", ...).
+        """
+        index = PkgIndex()
+        if index.exists():
+            yield from index.iter_name(package_name, category=category)
+        else:
+            logger.info("Index absent : recherche directe dans l'arbre (voir reindex)")
+            yield from scan_by_name(index.roots, package_name, category=category)
+
+    @staticmethod
+    def iter_search_by_maintainer(maintainer: str, by_email: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Variante en flux de search_by_maintainer (voir iter_search_by_name).
+
+        Yields:
+            Dict[str, Any]: Entrée du paquet ("path", "name", "maintainer", ...).
+        """
+        index = PkgIndex()
+        if index.exists():
+            yield from index.iter_maintainer(maintainer, by_email=by_email)
+        else:
+            logger.info("Index absent : recherche directe dans l'arbre (voir reindex)")
+            yield from scan_by_maintainer(index.roots, maintainer, by_email=by_email)
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def reindex(index_path: Optional[str] = None, incremental: bool = False,
+                jobs: Optional[int] = None, processes: bool = False) -> Dict[str, Any]:
+        """
+        Reconstruit ou rafraîchit l'index persistant de l'arborescence pkgsrc.
+
+        Args:
+            index_path (Optional[str]): Chemin du fichier d'index
+                                        (par défaut: NBQUERY_DBDIR de ConfigManager).
+            incremental (bool): Si True, ne relit que les paquets modifiés, ajoutés
+                                ou supprimés depuis le dernier passage (après un cvs/git update).
+            jobs (Optional[int]): Nombre de workers d'extraction (par défaut: NBQUERY_JOBS).
+            processes (bool): Répartir l'extraction sur des processus plutôt que des threads.
+
+        Returns:
+            Dict[str, Any]: Statistiques de la reconstruction (dont "rescanned").
+        """
+        index = PkgIndex(index_path=index_path, jobs=jobs, processes=processes)
+        return index.refresh() if incremental else index.reindex()
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def inspect_binary(path: str) -> PkgDetails:
+        """
+        Inspecte un paquet binaire sans décompresser son contenu installé.
+
+        Seuls les membres de tête (+CONTENTS, +COMMENT, +DESC, +BUILD_INFO,
+        +SIZE_*) sont lus ; gzip, bzip2, xz et zstd sont reconnus. Un paquet
+        distant est lu par requêtes HTTP Range, sans téléchargement complet.
+
+        Args:
+            path (str): Chemin ou URL http(s) de l'archive (.tgz, .tbz, .txz, .tzst).
+
+        Returns:
+            PkgDetails: Détails du paquet.
+        """
+        if path.startswith(("http://", "https://")):
+            record = inspect_remote(path)
+            record.pop("ranged")
+        else:
+            record = inspect_package(path)
+        record.pop("bytes_read")
+        return PkgDetails(**record)
+
+    @staticmethod
+    def iter_inspect(sources: List[str], jobs: Optional[int] = None) -> Iterator[PkgDetails]:
+        """
+        Inspecte un lot de paquets binaires sur un pool de processus.
+
+        Args:
+            sources (List[str]): Répertoires, motifs glob ou fichiers de paquets.
+            jobs (Optional[int]): Nombre de processus (par défaut: NBQUERY_JOBS).
+
+        Yields:
+            PkgDetails: Détails de chaque paquet ; error (préfixé du chemin de
+                        l'archive) est renseigné en cas d'échec.
+        """
+        for path, record, error in iter_inspect(sources, jobs=jobs):
+            if error:
+                yield PkgDetails(error=f"{path} : {error}")
+                continue
+            record.pop("bytes_read")
+            yield PkgDetails(**record)
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def inspect_batch(sources: List[str], output: str, jobs: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Inspecte un lot de paquets binaires et écrit les détails dans un seul fichier.
+
+        Chaque paquet produit une ligne JSON (champs de PkgDetails plus "path"),
+        écrite dès que son résultat est disponible.
+
+        Args:
+            sources (List[str]): Répertoires, motifs glob ou fichiers de paquets.
+            output (str): Fichier de sortie (JSON Lines).
+            jobs (Optional[int]): Nombre de processus (par défaut: NBQUERY_JOBS).
+
+        Returns:
+            Dict[str, Any]: Statistiques ("packages", "errors", "duration").
+        """
+        stats = {"packages": 0, "errors": 0}
+        start = time.monotonic()
+        with open(output, "w", encoding="utf-8") as out:
+            for path, record, error in iter_inspect(sources, jobs=jobs):
+                if error:
+                    stats["errors"] += 1
+                    logger.warning(f"Inspection impossible de {path} : {error}")
+                    record = asdict(PkgDetails(error=error))
+                else:
+                    record.pop("bytes_read")
+                    stats["packages"] += 1
+                out.write(json.dumps({"path": path, **record}, ensure_ascii=False) + "\n")
+        stats["duration"] = round(time.monotonic() - start, 3)
+        return stats
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def inspect_table(sources: List[str], jobs: Optional[int] = None) -> DetailsTable:
+        """
+        Inspecte un lot de paquets binaires et conserve les détails en colonnes.
+
+        Variante en mémoire de inspect_batch pour les gros lots : chaînes et
+        listes répétées partagées, une vue PkgDetails par paquet (voir DetailsTable).
+
+        Args:
+            sources (List[str]): Répertoires, motifs glob ou fichiers de paquets.
+            jobs (Optional[int]): Nombre de processus (par défaut: NBQUERY_JOBS).
+
+        Returns:
+            DetailsTable: Une ligne par paquet, error renseigné en cas d'échec.
+        """
+        table = DetailsTable(PkgDetails)
+        for path, record, error in iter_inspect(sources, jobs=jobs):
+            table.append({"error": f"{path} : {error}"} if error else record)
+        return table
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def tree_table(category: str = None, index_path: Optional[str] = None) -> DetailsTable:
+        """
+        Détails de tous les paquets de l'arborescence pkgsrc indexée, en colonnes.
+
+        Args:
+            category (str): Limiter à une catégorie.
+            index_path (Optional[str]): Chemin du fichier d'index (par défaut: NBQUERY_DBDIR).
+
+        Returns:
+            DetailsTable: Une ligne par paquet ; origin contient "category/package".
+        """
+        index = PkgIndex(index_path=index_path)
+        if index.try_ensure():
+            entries = index.packages()
+        else:
+            # Index impossible à construire : parcours direct de l'arbre
+            entries = sorted(scan_packages(index.roots, category=category), key=lambda entry: entry["path"])
+        table = DetailsTable(PkgDetails)
+        try:
+            for entry in entries:
+                if category and entry["category"] != category:
+                    continue
+                table.append({
+                    "pkgname": split_pkgname(entry["pkgname"])[0] if entry["pkgname"] else entry["name"],
+                    "version": entry["version"],
+                    "comment": entry["comment"],
+                    "categories": entry["categories"],
+                    "maintainer": entry["maintainer"],
+                    "homepage": entry["homepage"],
+                    "master_sites": entry["master_sites"],
+                    "origin": entry["path"],
+                })
+        finally:
+            index.close()
+        return table
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def refresh_remote(repo_url: str, force: bool = False, index_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Met à jour l'index local du pkg_summary d'un dépôt binaire distant.
+
+        Args:
+            repo_url (str): URL du répertoire contenant pkg_summary.{xz,bz2,gz}
+                            (ex. .../packages/NetBSD/x86_64/10.0/All/).
+            force (bool): Revalider et relire le pkg_summary même s'il semble inchangé.
+            index_path (Optional[str]): Chemin du fichier d'index (par défaut: sous NBQUERY_DBDIR).
+
+        Returns:
+            Dict[str, Any]: Statistiques de l'ingestion (added, updated, removed, ...).
+        """
+        return SummaryIndex(repo_url, index_path=index_path).refresh(force=force)
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def search_remote(query: str, repo_url: str, field: str = "name",
+                      index_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Recherche dans le pkg_summary indexé d'un dépôt binaire distant.
+
+        L'index est construit au premier appel, puis seulement relu.
+
+        Args:
+            query (str): Texte recherché.
+            repo_url (str): URL du dépôt binaire (voir refresh_remote).
+            field (str): "name", "comment", "category" ou "depends".
+            index_path (Optional[str]): Chemin du fichier d'index (par défaut: sous NBQUERY_DBDIR).
+
+        Returns:
+            List[Dict[str, Any]]: Paquets correspondants (pkgname, version, pkgpath, comment, ...).
+        """
+        index = SummaryIndex(repo_url, index_path=index_path)
+        if not index.exists():
+            index.refresh()
+        return index.search(query, field=field)
+
     @staticmethod
     @log_operation
     @handle_package_errors
@@ -259,7 +639,7 @@ class PkgQuery:
 
         Args:
             pkg_db_path (str, optional): Chemin vers la base de données des packages.
-                                         Si non spécifié, utilise le chemin par défaut de PkgDB.
+                                         Si non spécifié, utilise PKG_DBDIR de ConfigManager.
             sort_order (str): Ordre de tri des packages ("asc" pour ascendant, "desc" pour descendant).
             sort_by (str): Critère de tri ("name", "version", ou "comment").
 
@@ -277,67 +657,33 @@ class PkgQuery:
             sort_by = "name"
 
         try:
-            # Initialiser PkgDB avec le chemin spécifié ou la valeur par défaut
-            pkg_db = PkgDB(db_path=pkg_db_path)
-        except FileNotFoundError as e:
+            # Snapshot projeté en mémoire de pkgdb (chemin spécifié ou valeur par défaut)
+            snapshot = PkgDBSnapshot.load(pkg_db_path)
+        except OSError as e:
             logger.error(str(e))
             return [{"error": str(e)}]
 
-        results = []
-        # Lister les packages installés
-        installed_pkgs = pkg_db.list_installed()
-        if installed_pkgs == ["Aucun paquet installé"]:
+        if not len(snapshot):
             return [{"message": "Aucun package binaire installé trouvé."}]
 
         # Pour chaque package, récupérer les informations (nom, version, comment, etc.)
-        for pkg_name in installed_pkgs:
-            try:
-                info = pkg_db.get_info(pkg_name)
-                results.append({
-                    "name": info["name"].rsplit("-", 1)[0] if info["version"] != "Inconnu" else info["name"],
-                    "version": info["version"] if info["version"] != "Inconnu" else "unknown",
-                    "comment": info["comment"] if info["comment"] else "Aucun commentaire disponible",
-                    "master_sites": []  # Pas de master_sites pour les binaires installés
-                })
-            except ValueError as e:
-                logger.error(f"Erreur lors de la récupération des informations pour {pkg_name}: {str(e)}")
-                results.append({"name": pkg_name, "error": str(e)})
-            except Exception as e:
-                logger.error(f"Erreur inattendue lors de la récupération des informations pour {pkg_name}: {str(e)}")
-                results.append({"name": pkg_name, "error": str(e)})
+        results = []
+        for info in snapshot.packages():
+            results.append({
+                "name": info["name"],
+                "version": info["version"] or "unknown",
+                "comment": info["comment"] or "Aucun commentaire disponible",
+                "master_sites": []  # Pas de master_sites pour les binaires installés
+            })
 
         # Trier les résultats selon le critère spécifié
         if sort_by == "name":
             results.sort(key=lambda x: x["name"].lower(), reverse=(sort_order == "desc"))
         elif sort_by == "version":
-            def version_key(pkg):
-                ver = pkg["version"]
-                if ver == "unknown":
-                    return (0, 0, 0, "", 0)  # Valeur par défaut pour versions invalides
-
-                # Séparer la version principale du suffixe (ex. "2.40nb2" -> "2.40", "nb2")
-                match = re.match(r"^(.*?)(nb\d+)?$", ver)
-                if not match:
-                    return (0, 0, 0, "", 0)
-
-                main_ver, suffix = match.groups()
-                suffix = suffix if suffix else ""
-
-                # Convertir la version principale en tuple pour comparaison numérique
-                try:
-                    ver_parts = [int(x) for x in main_ver.split(".") if x.isdigit()]
-                    # Remplir avec des zéros si moins de 3 parties (ex. "1.2" -> [1, 2, 0])
-                    ver_parts.extend([0] * (3 - len(ver_parts)))
-                except ValueError:
-                    ver_parts = [0, 0, 0]
-
-                # Extraire le numéro du suffixe (ex. "nb2" -> 2)
-                suffix_num = int(suffix.replace("nb", "")) if suffix.startswith("nb") else 0
-
-                # Retourner un tuple pour comparaison : (parties de version, suffixe, numéro de suffixe)
-                return (*ver_parts, suffix, suffix_num)
-
-            results.sort(key=version_key, reverse=(sort_order == "desc"))
+            # Ordre dewey de pkg_install (alpha/beta/rc/pl, révisions nbN) ;
+            # les versions inconnues passent en premier
+            results.sort(key=lambda x: (x["version"] != "unknown", version_key(x["version"])),
+                         reverse=(sort_order == "desc"))
         elif sort_by == "comment":
             results.sort(key=lambda x: x["comment"].lower(), reverse=(sort_order == "desc"))
 
@@ -358,24 +704,20 @@ class PkgQuery:
         Returns:
             List[Dict[str, Any]]: Liste des fichiers ou un message d'erreur.
         """
-        # Initialiser PkgDB avec le chemin spécifié ou la valeur par défaut
-        pkg_db = PkgDB(db_path=pkg_db_path)
+        # Snapshot projeté en mémoire de pkgdb (chemin spécifié ou valeur par défaut)
+        try:
+            snapshot = PkgDBSnapshot.load(pkg_db_path)
+        except OSError as e:
+            logger.error(str(e))
+            return [{"error": str(e)}]
 
         # Vérifier si le paquet est installé
-        installed_pkgs = pkg_db.list_installed()
-        if package_name not in installed_pkgs and f"{package_name}-" not in [pkg.rsplit('-', 1)[0] for pkg in installed_pkgs if '-' in pkg]:
+        package_info = snapshot.get(package_name)
+        if package_info is None:
             logger.warning(f"Le paquet '{package_name}' n'est pas installé.")
             return [{"message": f"Le paquet '{package_name}' n'est pas installé."}]
 
-        # Récupérer les informations du paquet
-        try:
-            package_info = pkg_db.get_info(package_name)
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des informations pour {package_name}: {str(e)}")
-            return [{"error": f"Erreur lors de la récupération des informations pour {package_name}: {str(e)}"}]
-
-        # Extraire la liste des fichiers (supposons que get_info retourne une clé "files")
-        files = package_info.get("files", [])
+        files = package_info["files"]
         if not files:
             logger.warning(f"Aucun fichier trouvé pour le paquet '{package_name}'.")
             return [{"message": f"Aucun fichier trouvé pour le paquet '{package_name}'."}]
@@ -383,6 +725,37 @@ class PkgQuery:
         logger.debug(f"Fichiers trouvés pour {package_name} : {files}")
         return [{"file": f} for f in files]
 
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def whoowns(path: str, pkg_db_path: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Identifie le ou les paquets installés propriétaires d'un fichier.
+
+        Args:
+            path (str): Chemin exact, préfixe terminé par "/" ou motif glob
+                        (ex. /usr/pkg/bin/perl, /usr/pkg/lib/perl5/, /usr/pkg/bin/py*).
+            pkg_db_path (Optional[str]): Chemin vers la base de données des paquets.
+
+        Returns:
+            List[Dict[str, str]]: Liste de dictionnaires {"file", "package"} ou un message.
+        """
+        try:
+            snapshot = PkgDBSnapshot.load(pkg_db_path)
+        except OSError as e:
+            logger.error(str(e))
+            return [{"error": str(e)}]
+
+        if any(c in path for c in "*?[") or path.endswith("/"):
+            matches = snapshot.owners(path)
+        else:
+            path = os.path.normpath(os.path.abspath(path))
+            owner = snapshot.owner(path)
+            matches = [(path, owner)] if owner else []
+        if not matches:
+            return [{"message": f"Aucun paquet installé ne contient {path}"}]
+        return [{"file": file, "package": package} for file, package in matches]
+
     @staticmethod
     @log_operation
     @handle_package_errors
@@ -453,13 +826,12 @@ class PkgQuery:
                 logger.error(f"Erreur lors de la lecture du fichier {changelog_file} : {str(e)}")
                 return [{"error": f"Erreur lors de la lecture du fichier local : {str(e)}"}]
 
-        # Si non trouvé localement, tenter de récupérer depuis le web
-        url = f"https://cdn.netbsd.org/pub/pkgsrc/current/pkgsrc/doc/CHANGES-{year}"
+        # Si non trouvé localement, tenter de récupérer depuis les miroirs de repos.d,
+        # via le cache HTTP (revalidation conditionnelle)
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            response = HttpCache.shared().fetch(MirrorSet.pkgsrc_tree(), f"doc/CHANGES-{year}")
             content = response.text.strip()
-            return [{"source": "web", "content": content.splitlines()}]
+            return [{"source": "cache" if response.from_cache else "web", "content": content.splitlines()}]
         except Exception as e:
             logger.error(f"Erreur lors de la récupération du changelog depuis le web : {str(e)}")
             return [{"error": f"Erreur lors de la récupération du changelog : {str(e)}"}]
@@ -467,14 +839,25 @@ class PkgQuery:
     @staticmethod
     @log_operation
     @handle_package_errors
-    def verify_distfiles(package: str, category: str, pkgsrc_dir: str = "/usr/pkgsrc") -> List[Dict[str, str]]:
+    def verify_distfiles(package: str, category: str, pkgsrc_dir: str = "/usr/pkgsrc",
+                         distdir: Optional[str] = None, jobs: Optional[int] = None,
+                         use_cache: bool = True, rehash: bool = False) -> List[Dict[str, str]]:
         """
         Vérifie les fichiers de distribution d'un package.
 
+        Tous les algorithmes listés dans distinfo (BLAKE2s, SHA512, ..., Size)
+        sont contrôlés, en une seule lecture par fichier, plusieurs fichiers
+        étant vérifiés en parallèle.
+
         Args:
             package (str): Nom du paquet (ex. py-six).
             category (str): Catégorie du paquet (ex. lang).
             pkgsrc_dir (str): Chemin vers le répertoire pkgsrc (par défaut: /usr/pkgsrc).
+            distdir (Optional[str]): Répertoire des distfiles (par défaut: DISTDIR s'il est défini, sinon <pkgsrc_dir>/distfiles).
+            jobs (Optional[int]): Nombre de fichiers vérifiés simultanément.
+            use_cache (bool): Réutiliser les empreintes déjà calculées pour un fichier
+                              inchangé (même périphérique, inode, taille et mtime).
+            rehash (bool): Forcer le recalcul et rafraîchir le cache.
 
         Returns:
             List[Dict[str, str]]: Liste de dictionnaires contenant les résultats de la vérification.
@@ -489,51 +872,81 @@ class PkgQuery:
         if not distinfo_file.exists():
             return [{"error": f"Fichier distinfo non trouvé pour {category}/{package}"}]
 
-        distfiles = []
-        checksums = {}
         try:
-            with distinfo_file.open() as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith("SHA1 ("):
-                        parts = line.split(" = ")
-                        if len(parts) != 2:
-                            continue
-                        filename = parts[0].replace("SHA1 (", "").rstrip(")")
-                        checksum = parts[1]
-                        distfiles.append(filename)
-                        checksums[filename] = checksum
+            entries = parse_distinfo(distinfo_file)
         except Exception as e:
             logger.error(f"Erreur lors de la lecture du fichier distinfo {distinfo_file} : {str(e)}")
             return [{"error": f"Erreur lors de la lecture du fichier distinfo : {str(e)}"}]
 
+        distdir = distdir or default_distdir(pkgsrc_dir)
         results = []
-        for distfile in distfiles:
-            distfile_path = Path(pkgsrc_dir) / "distfiles" / distfile
-            if not distfile_path.exists():
-                results.append({"file": distfile, "status": "Fichier non trouvé"})
-                continue
-
-            try:
-                sha1 = hashlib.sha1()
-                with distfile_path.open("rb") as f:
-                    for chunk in iter(lambda: f.read(4096), b""):
-                        sha1.update(chunk)
-                computed_checksum = sha1.hexdigest()
-                expected_checksum = checksums[distfile]
-
-                if computed_checksum == expected_checksum:
-                    results.append({"file": distfile, "status": "Checksum valide"})
-                else:
-                    results.append({"file": distfile, "status": f"Checksum invalide (attendu: {expected_checksum}, calculé: {computed_checksum})"})
-            except Exception as e:
-                logger.error(f"Erreur lors de la vérification du fichier {distfile_path} : {str(e)}")
-                results.append({"file": distfile, "status": f"Erreur de vérification : {str(e)}"})
+        cache = DigestCache() if use_cache else None
+        for result in verify_entries(entries.items(), distdir, jobs=jobs, cache=cache, force=rehash):
+            if result["status"] == "error":
+                logger.error(f"Erreur lors de la vérification du fichier {result['file']} : {result['message']}")
+            results.append({"file": result["file"], "status": result["message"],
+                            "algorithms": ", ".join(result.get("algorithms", []))})
 
         if not results:
             results.append({"message": "Aucun fichier de distribution à vérifier."})
         return results
 
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def verify_all_distfiles(pkgsrc_dir: str = "/usr/pkgsrc", distdir: Optional[str] = None,
+                             jobs: Optional[int] = None, use_cache: bool = True,
+                             rehash: bool = False) -> List[Dict[str, str]]:
+        """
+        Vérifie tous les fichiers de distribution référencés par l'arbre pkgsrc.
+
+        Args:
+            pkgsrc_dir (str): Chemin vers le répertoire pkgsrc (par défaut: /usr/pkgsrc).
+            distdir (Optional[str]): Répertoire des distfiles (par défaut: DISTDIR s'il est défini, sinon <pkgsrc_dir>/distfiles).
+            jobs (Optional[int]): Nombre de fichiers vérifiés simultanément.
+            use_cache (bool): Réutiliser les empreintes des fichiers inchangés.
+            rehash (bool): Forcer le recalcul et rafraîchir le cache.
+
+        Returns:
+            List[Dict[str, str]]: Résultats en anomalie (fichier, paquet, statut).
+        """
+        distdir = distdir or default_distdir(pkgsrc_dir)
+        results = [
+            {"file": result["file"], "package": result["package"], "status": result["message"]}
+            for result in verify_tree(pkgsrc_dir, distdir, jobs=jobs,
+                                      cache=DigestCache() if use_cache else None, force=rehash)
+            if result["status"] != "ok"
+        ]
+        return results or [{"message": "Tous les fichiers de distribution sont valides."}]
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def distlint(pkgsrc_dir: str = PKGSRCDIR, distdir: Optional[str] = None, jobs: Optional[int] = None,
+                 checksums: bool = True, use_cache: bool = True, rehash: bool = False) -> Dict[str, Any]:
+        """
+        Audite DISTDIR contre tous les distinfo de l'arbre pkgsrc en un seul passage.
+
+        Args:
+            pkgsrc_dir (str): Chemin vers le répertoire pkgsrc (par défaut: /usr/pkgsrc).
+            distdir (Optional[str]): Répertoire des distfiles (par défaut: DISTDIR s'il est défini, sinon <pkgsrc_dir>/distfiles).
+            jobs (Optional[int]): Nombre de fichiers vérifiés simultanément.
+            checksums (bool): Contrôler les sommes ; sinon seules présence et taille sont vérifiées.
+            use_cache (bool): Réutiliser les empreintes des fichiers inchangés.
+            rehash (bool): Forcer le recalcul et rafraîchir le cache.
+
+        Returns:
+            Dict[str, Any]: "issues" (fichiers manquants, invalides ou orphelins)
+                            et "stats" (compteurs et octets récupérables).
+        """
+        lint = DistLint(pkgsrc_dir, distdir, jobs=jobs, checksums=checksums,
+                        cache=DigestCache() if use_cache else None, force=rehash)
+        issues = [
+            {key: result.get(key) for key in ("file", "package", "status", "message", "size")}
+            for result in lint.run()
+        ]
+        return {"issues": issues, "stats": lint.stats}
+
     @log_operation
     @handle_package_errors
     def depends(self) -> PkgDetails:
@@ -547,30 +960,81 @@ class PkgQuery:
         if not self._pkg:
             self.details.error = f"Paquet {self._package_name} non initialisé"
             return self.details
-        self.details.files = self._pkg.files or ["Aucun fichier trouvé"]
+        self.details.files = self.details.files or ["Aucun fichier trouvé"]
         self.details.pkgname = self._package_name
         return self.details
 
     @log_operation
     @handle_package_errors
-    def revdepends(self) -> PkgDetails:
+    def revdepends(self, transitive: bool = False) -> PkgDetails:
         if not self._binary or not self._pkg:
             self.details.error = "Non implémenté pour les sources ou paquet non initialisé"
             return self.details
-        self.details.files = self._pkgdb.get_reverse_dependencies(self._package_name)
+        graph = DepGraph.installed()
+        if self._package_name not in graph:
+            self.details.error = f"Le paquet '{self._package_name}' n'est pas installé."
+            return self.details
+        self.details.files = graph.revdepends(self._package_name, transitive=transitive)
         self.details.pkgname = self._package_name
         return self.details
 
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def revdepends_many(package_names: List[str], transitive: bool = True,
+                        pkg_db_path: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Dépendants inverses d'une liste de paquets installés (analyse d'impact).
+
+        Args:
+            package_names (List[str]): Noms des paquets (nom de base ou "nom-version").
+            transitive (bool): Inclure les dépendants indirects.
+            pkg_db_path (Optional[str]): Chemin vers la base de données des paquets.
+
+        Returns:
+            Dict[str, List[str]]: Dépendants par paquet ; les paquets non installés
+                                  sont regroupés sous la clé "error".
+        """
+        graph = DepGraph.installed(pkg_db_path)
+        missing = [name for name in package_names if name not in graph]
+        results = graph.revdepends_many([name for name in package_names if name in graph], transitive=transitive)
+        if missing:
+            results["error"] = [f"Paquet non installé : {name}" for name in missing]
+        return results
+
     @log_operation
     @handle_package_errors
     def outdated(self) -> PkgDetails:
         if not self._binary or not self._pkg:
             self.details.error = "Non implémenté pour les sources ou paquet non initialisé"
             return self.details
-        # Placeholder : À implémenter avec core/web/cdnpkg.py pour comparer les versions
-        installed_info = self._pkgdb.get_info(self._package_name)
-        self.details.version = installed_info.get("version", "Inconnu")
-        self.details.comment = "Comparaison avec la version distante non implémentée (nécessite core/web/cdnpkg.py)"
+        try:
+            installed = PkgDBSnapshot.load().get(self._package_name, with_files=False)
+        except OSError as e:
+            logger.error(str(e))
+            self.details.error = str(e)
+            return self.details
+        if installed is None:
+            self.details.error = f"Le package {self._package_name} n'est pas installé"
+            return self.details
+        self.details.version = installed["version"] or "Inconnu"
+
+        # Version disponible dans l'arbre pkgsrc indexé, comparée selon dewey
+        index = PkgIndex()
+        index.try_ensure()
+        # Comparaison sur le PKGNAME : py311-requests est construit depuis py-requests
+        available = [entry["version"] for entry in index.iter_pkgbase(installed["name"])]
+        if not available or not installed["version"]:
+            self.details.comment = "Version pkgsrc introuvable pour comparaison"
+            return self.details
+        latest = max(available, key=version_key)
+        comparison = dewey_cmp(installed["version"], latest)
+        if comparison < 0:
+            self.details.comment = f"Obsolète : {latest} disponible dans pkgsrc"
+        elif comparison == 0:
+            self.details.comment = "À jour"
+        else:
+            self.details.comment = f"Plus récent que pkgsrc ({latest})"
         return self.details
 
     @log_operation
@@ -596,14 +1060,34 @@ class PkgQuery:
 
     @log_operation
     @handle_package_errors
-    def history(self) -> PkgDetails:
+    def history(self, limit: int = 10, log_path: Optional[str] = None) -> PkgDetails:
+        """
+        Derniers événements du paquet dans le journal des paquets (NBQUERY_PKGLOG).
+
+        Le journal est indexé par nom de paquet (index complété à chaque appel
+        depuis la dernière position lue) ; le nom est comparé exactement. Si
+        l'index ne peut être ouvert, le journal est lu depuis la fin.
+
+        Args:
+            limit (int): Nombre d'événements à conserver.
+            log_path (Optional[str]): Journal à lire (par défaut: NBQUERY_PKGLOG).
+
+        Returns:
+            PkgDetails: Lignes du journal dans files, de la plus ancienne à la plus récente.
+        """
         if not self._binary or not self._pkg:
             self.details.error = "Non implémenté pour les sources ou paquet non initialisé"
             return self.details
-        log = Path("/var/log/pkg.log")
+        log = PkgLog(log_path=log_path)
         if log.exists():
-            with log.open() as f:
-                self.details.files = [line.strip() for line in f if self._package_name in line][-10:] or ["Aucun historique"]
+            try:
+                events = log.history(self._package_name, limit=limit)
+            except (OSError, sqlite3.Error) as e:
+                logger.debug(f"Index du journal {log.index_path} indisponible, lecture directe : {str(e)}")
+                events = log.tail(limit, name=self._package_name)
+            finally:
+                log.close()
+            self.details.files = [event["line"] for event in events] or ["Aucun historique"]
         else:
             self.details.error = "Journal non trouvé"
         return self.details
@@ -636,7 +1120,7 @@ class PkgQuery:
         if not self._pkg_path:
             self._pkg_path = self._find_package_path()
             if not self._pkg_path:
-                return [f"Paquet {self._package_name} non trouvé dans /usr/pkgsrc"]
+                return [self._not_found()]
         patches_dir = self._pkg_path / "patches"
         if not patches_dir.exists():
             return ["Aucun patch trouvé"]
@@ -651,7 +1135,7 @@ class PkgQuery:
         if not self._pkg_path:
             self._pkg_path = self._find_package_path()
             if not self._pkg_path:
-                return f"Paquet {self._package_name} non trouvé dans /usr/pkgsrc"
+                return self._not_found()
         return "Analyse des différences entre patches non implémentée (nécessite deux versions)"
 
     @log_operation
@@ -662,7 +1146,7 @@ class PkgQuery:
         if not self._pkg_path:
             self._pkg_path = self._find_package_path()
             if not self._pkg_path:
-                return {"Nombre de patches": 0, "Message": f"Paquet {self._package_name} non trouvé dans /usr/pkgsrc"}
+                return {"Nombre de patches": 0, "Message": self._not_found()}
         patches_dir = self._pkg_path / "patches"
         if not patches_dir.exists():
             return {"Nombre de patches": 0}
@@ -677,7 +1161,7 @@ class PkgQuery:
         if not self._pkg_path:
             self._pkg_path = self._find_package_path()
             if not self._pkg_path:
-                return {"Message": f"Paquet {self._package_name} non trouvé dans /usr/pkgsrc"}
+                return {"Message": self._not_found()}
         patches_dir = self._pkg_path / "patches"
         if not patches_dir.exists():
             return {"Message": "Aucun patch trouvé"}
@@ -700,7 +1184,8 @@ class PkgQuery:
         Compare les versions des packages installés avec celles dans pkgsrc.
 
         Args:
-            show_all (bool): Si True, inclut tous les packages installés, même ceux à jour.
+            show_all (bool): Si True, inclut tous les packages installés, même ceux à jour
+                             ou plus récents que pkgsrc.
             pkgsrc_dir (str): Chemin vers le répertoire pkgsrc (par défaut: /usr/pkgsrc).
 
         Returns:
@@ -708,69 +1193,96 @@ class PkgQuery:
         """
         results = []
 
-        # Étape 1 : Lister les packages installés avec PkgDB
-        pkg_db = PkgDB()
-        installed_packages = {}
+        # Étape 1 : Lister les packages installés depuis le snapshot de pkgdb
         try:
-            installed_list = pkg_db.list_installed()
-            for pkg in installed_list:
-                if '-' not in pkg:
-                    continue
-                pkg_name, pkg_version = pkg.rsplit('-', 1)
-                installed_packages[pkg_name] = pkg_version
+            snapshot = PkgDBSnapshot.load()
+            installed_packages = {info["name"]: info["version"] for info in snapshot.packages() if info["version"]}
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des packages installés : {str(e)}")
             return [{"error": f"Erreur lors de la récupération des packages installés : {str(e)}"}]
 
-        # Étape 2 : Parcourir pkgsrc pour trouver les versions disponibles
+        # Étape 2 : Consulter l'index pkgsrc pour trouver les versions disponibles
         pkgsrc_base = Path(pkgsrc_dir)
         if not pkgsrc_base.exists():
             logger.error(f"Le répertoire {pkgsrc_dir} n'existe pas.")
             return [{"error": f"Le répertoire {pkgsrc_dir} n'existe pas."}]
 
-        for category_dir in pkgsrc_base.iterdir():
-            if not category_dir.is_dir():
+        index = PkgIndex.for_root(pkgsrc_dir)
+        if index.try_ensure():
+            entries = index.packages(root=pkgsrc_dir)
+        else:
+            # Index impossible à construire : parcours direct de l'arbre
+            entries = scan_packages([pkgsrc_dir])
+        candidates = []
+        for entry in entries:
+            if not entry["version"]:
+                if entry["name"] in installed_packages:
+                    logger.warning(f"Version pkgsrc inconnue pour {entry['name']}")
                 continue
-            category = category_dir.name
-            for pkg_dir in category_dir.iterdir():
-                if not pkg_dir.is_dir():
-                    continue
-                pkg_name = pkg_dir.name
-                if pkg_name not in installed_packages:
-                    continue
-
-                # Utiliser SourcePackage pour extraire la version
-                try:
-                    src_pkg = SourcePackage(name=pkg_name, version="Inconnu")
-                    src_pkg.fetch_source_info()
-                    pkgsrc_version = src_pkg.version()
-                    installed_version = installed_packages[pkg_name]
-
-                    # Comparaison simplifiée des versions
-                    if pkgsrc_version != installed_version:
-                        results.append({
-                            "name": pkg_name,
-                            "category": category,
-                            "installed_version": installed_version,
-                            "pkgsrc_version": pkgsrc_version,
-                            "status": "Obsolète"
-                        })
-                    elif show_all:
-                        results.append({
-                            "name": pkg_name,
-                            "category": category,
-                            "installed_version": installed_version,
-                            "pkgsrc_version": pkgsrc_version,
-                            "status": "À jour"
-                        })
-                except Exception as e:
-                    logger.warning(f"Erreur lors de la récupération des informations pour {pkg_name} : {str(e)}")
-                    continue
+            # Nom installé = PKGNAME sans version, qui peut différer du répertoire
+            # (py-requests -> py311-requests, php -> php83)
+            pkg_name = split_pkgname(entry["pkgname"])[0] if entry["pkgname"] else entry["name"]
+            if pkg_name in installed_packages:
+                candidates.append((pkg_name, entry))
+
+        # Comparaison dewey de toutes les paires (installée, pkgsrc) en un lot
+        comparisons = compare_versions(
+            (installed_packages[pkg_name], entry["version"]) for pkg_name, entry in candidates
+        )
+        for (pkg_name, entry), comparison in zip(candidates, comparisons):
+            if comparison < 0:
+                status = "Obsolète"
+            elif not show_all:
+                continue
+            else:
+                status = "À jour" if comparison == 0 else "Plus récent que pkgsrc"
+            results.append({
+                "name": pkg_name,
+                "category": entry["category"],
+                "installed_version": installed_packages[pkg_name],
+                "pkgsrc_version": entry["version"],
+                "status": status
+            })
 
         if not results:
             results.append({"message": "Tous les packages installés sont à jour."})
         return results
 
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def build_order(packages: Optional[List[str]] = None, pkgsrc_dir: str = PKGSRCDIR,
+                    kinds: Optional[List[str]] = None, jobs: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Calcule l'ordre de construction de l'arbre pkgsrc ou d'un sous-ensemble.
+
+        Args:
+            packages (Optional[List[str]]): Paquets "category/package" ; tout l'arbre si None.
+            pkgsrc_dir (str): Chemin vers le répertoire pkgsrc (par défaut: /usr/pkgsrc).
+            kinds (Optional[List[str]]): Types de dépendances (DEPENDS, BUILD_DEPENDS, TOOL_DEPENDS).
+            jobs (Optional[int]): Nombre de workers d'analyse des Makefile.
+
+        Returns:
+            Dict[str, Any]: "levels" (lots constructibles en parallèle, dans l'ordre),
+                            "cycles" et "blocked" (paquets en attente d'un cycle).
+        """
+        graph = DepGraph.from_source_tree(pkgsrc_dir, packages=packages, kinds=kinds or DEPENDS_KINDS, jobs=jobs)
+        levels, blocked = graph.build_levels()
+        return {"levels": levels, "cycles": graph.cycles(), "blocked": blocked}
+
+    @staticmethod
+    @log_operation
+    @handle_package_errors
+    def source_depends(pkgpath: str, transitive: bool = True, pkgsrc_dir: str = PKGSRCDIR,
+                       kinds: Optional[List[str]] = None) -> PkgDetails:
+        """
+        Dépendances source (fermeture transitive par défaut) d'un paquet "category/package".
+        """
+        details = PkgDetails(pkgname=pkgpath)
+        graph = DepGraph.from_source_tree(pkgsrc_dir, packages=[pkgpath], kinds=kinds or DEPENDS_KINDS)
+        details.dependencies = graph.depends(pkgpath, transitive=transitive)
+        return details
+
     @staticmethod
     @log_operation
     @handle_package_errors
@@ -784,11 +1296,9 @@ class PkgQuery:
         Returns:
             Dict[str, List[Dict[str, str]]]: Résultats filtrés contenant uniquement les packages installés.
         """
-        # Lister les packages installés avec PkgDB
-        pkg_db = PkgDB()
+        # Lister les packages installés depuis le snapshot de pkgdb
         try:
-            installed_list = pkg_db.list_installed()
-            installed_pkgs = {pkg.rsplit('-', 1)[0] for pkg in installed_list if '-' in pkg}
+            installed_pkgs = {info["name"] for info in PkgDBSnapshot.load().packages() if info["version"]}
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des packages installés : {str(e)}")
             return {"error": f"Erreur lors de la récupération des packages installés : {str(e)}"}
@@ -0,0 +1,77 @@
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Iterator
+from nbpkg.common.logger import logger
+from nbpkg.pkginspect.treewalk import walk_tree
+
+
+class PackagePathMap:
+    """
+    Table nom de paquet -> répertoires pkgsrc, construite une fois par jeu de
+    racines et partagée entre les instances de PkgQuery.
+
+    Un même nom peut exister dans plusieurs catégories (typiquement pkgsrc et
+    wip) : les candidats hors wip sont alors proposés en premier.
+    """
+
+    _shared: Dict[Tuple[str, ...], "PackagePathMap"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, roots: List[str]):
+        self.roots = tuple(str(Path(root)) for root in roots)
+        self._paths: Dict[str, List[Tuple[str, Path]]] = {}
+        for root in self.roots:
+            for category, name, path in walk_tree(root):
+                self._paths.setdefault(name, []).append((category, Path(path)))
+        for candidates in self._paths.values():
+            if len(candidates) > 1:
+                candidates.sort(key=lambda item: (item[0] == "wip", item[0]))
+        logger.debug(f"Table des chemins construite : {len(self._paths)} noms pour {len(self.roots)} racine(s)")
+
+    @classmethod
+    def for_roots(cls, roots: List[str]) -> "PackagePathMap":
+        """Retourne la table partagée pour ce jeu de racines, construite au premier appel."""
+        key = tuple(str(Path(root)) for root in roots)
+        with cls._lock:
+            path_map = cls._shared.get(key)
+            if path_map is None:
+                path_map = cls._shared[key] = cls(list(key))
+            return path_map
+
+    @classmethod
+    def invalidate(cls):
+        """Oublie les tables partagées (après une mise à jour de pkgsrc)."""
+        with cls._lock:
+            cls._shared.clear()
+
+    def candidates(self, name: str) -> List[str]:
+        """Retourne tous les emplacements "category/package" connus pour ce nom."""
+        return [f"{category}/{name}" for category, _ in self._paths.get(name, [])]
+
+    def lookup(self, name: str) -> Optional[Path]:
+        """Résout le répertoire d'un paquet en temps constant."""
+        candidates = self._paths.get(name)
+        if not candidates:
+            return None
+        if len(candidates) > 1:
+            logger.warning(
+                f"Paquet {name} présent à plusieurs emplacements ({', '.join(self.candidates(name))}), "
+                f"utilisation de {candidates[0][0]}/{name}"
+            )
+        return candidates[0][1]
+
+    def entries(self) -> Iterator[Tuple[str, str]]:
+        """Produit les couples (nom, "category/package") de la table."""
+        for name, candidates in self._paths.items():
+            for category, _ in candidates:
+                yield name, f"{category}/{name}"
+
+    def collisions(self) -> Dict[str, List[str]]:
+        """Retourne les noms présents dans plusieurs catégories (ex. pkgsrc et wip)."""
+        return {name: self.candidates(name) for name, candidates in self._paths.items() if len(candidates) > 1}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._paths
+
+    def __len__(self) -> int:
+        return len(self._paths)
@@ -0,0 +1,365 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+from nbpkg.common.logger import logger
+from nbpkg.config.config import ConfigManager
+
+SNAPSHOT_MAGIC = b"NBPKGDB\0"
+SNAPSHOT_VERSION = 1
+
+# En-tête : magic, version, mtime_ns de pkgdb, nb paquets, nb fichiers,
+# puis les décalages des sections paquets, fichiers, fichiers par paquet, chaînes
+_HEADER = struct.Struct("<8sIqIIQQQQ")
+# Paquet : (décalage, longueur) du nom, de la version, du commentaire et des
+# dépendances, puis premier indice et nombre de fichiers dans la section
+# fichiers-par-paquet
+_PKG = struct.Struct("<10I")
+# Fichier : (décalage, longueur) du chemin, indice du paquet propriétaire
+_FILE = struct.Struct("<3I")
+_INDEX = struct.Struct("<I")
+
+
+def split_pkgname(pkgname: str) -> Tuple[str, str]:
+    """Sépare "nom-version" en (nom, version) ; version vide si absente."""
+    if "-" not in pkgname:
+        return pkgname, ""
+    name, version = pkgname.rsplit("-", 1)
+    return name, version
+
+
+def parse_contents(text: str) -> Dict[str, List[str]]:
+    """
+    Analyse un fichier +CONTENTS de pkg_install.
+
+    Returns:
+        Dict[str, List[str]]: "files" (chemins absolus), "depends" (@pkgdep)
+                              et "build_depends" (@blddep).
+    """
+    cwd = "/"
+    ignore_next = False
+    files, depends, build_depends = [], [], []
+    for line in text.splitlines():
+        if not line:
+            continue
+        if line[0] != "@":
+            # Le fichier qui suit @ignore (+BUILD_INFO, ...) n'est pas installé
+            if not ignore_next:
+                files.append(os.path.join(cwd, line))
+            ignore_next = False
+            continue
+        keyword, _, arg = line.partition(" ")
+        arg = arg.strip()
+        if keyword == "@ignore":
+            ignore_next = True
+        elif keyword in ("@cwd", "@cd"):
+            cwd = arg or "/"
+        elif keyword == "@pkgdep":
+            depends.append(arg)
+        elif keyword == "@blddep":
+            build_depends.append(arg)
+    return {"files": files, "depends": depends, "build_depends": build_depends}
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(errors="replace")
+    except OSError:
+        return ""
+
+
+def read_pkgdb(pkg_db_path: str) -> Iterator[Dict[str, Any]]:
+    """Lit les paquets installés directement depuis les fichiers de pkgdb."""
+    with os.scandir(pkg_db_path) as entries:
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            pkg_dir = Path(entry.path)
+            contents = parse_contents(_read(pkg_dir / "+CONTENTS"))
+            name, version = split_pkgname(entry.name)
+            yield {
+                "name": name,
+                "version": version,
+                "comment": _read(pkg_dir / "+COMMENT").strip(),
+                "depends": contents["depends"],
+                "files": contents["files"],
+            }
+
+
+def pkgdb_mtime(pkg_db_path: str) -> int:
+    return os.stat(pkg_db_path).st_mtime_ns
+
+
+def build_snapshot(pkg_db_path: str) -> bytes:
+    """Construit le snapshot binaire de pkgdb, en mémoire."""
+    mtime = pkgdb_mtime(pkg_db_path)
+    packages = sorted(read_pkgdb(pkg_db_path), key=lambda p: (p["name"], p["version"]))
+
+    strings = bytearray()
+    interned: Dict[str, Tuple[int, int]] = {}
+
+    def add(value: str) -> Tuple[int, int]:
+        ref = interned.get(value)
+        if ref is None:
+            data = value.encode("utf-8", "surrogateescape")
+            ref = interned[value] = (len(strings), len(data))
+            strings.extend(data)
+        return ref
+
+    files = sorted((path, pkg_id) for pkg_id, pkg in enumerate(packages) for path in pkg["files"])
+    pkg_files: List[List[int]] = [[] for _ in packages]
+    for file_id, (_, pkg_id) in enumerate(files):
+        pkg_files[pkg_id].append(file_id)
+
+    pkg_section, pkgfiles_section = bytearray(), bytearray()
+    for pkg_id, pkg in enumerate(packages):
+        start = len(pkgfiles_section) // _INDEX.size
+        for file_id in pkg_files[pkg_id]:
+            pkgfiles_section += _INDEX.pack(file_id)
+        pkg_section += _PKG.pack(*add(pkg["name"]), *add(pkg["version"]), *add(pkg["comment"]),
+                                 *add("\n".join(pkg["depends"])), start, len(pkg_files[pkg_id]))
+    file_section = bytearray()
+    for path, pkg_id in files:
+        file_section += _FILE.pack(*add(path), pkg_id)
+
+    off_pkgs = _HEADER.size
+    off_files = off_pkgs + len(pkg_section)
+    off_pkgfiles = off_files + len(file_section)
+    off_strings = off_pkgfiles + len(pkgfiles_section)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, mtime, len(packages), len(files),
+                          off_pkgs, off_files, off_pkgfiles, off_strings)
+    return b"".join((header, pkg_section, file_section, pkgfiles_section, strings))
+
+
+def write_snapshot(pkg_db_path: str, snapshot_path: str, data: Optional[bytes] = None) -> int:
+    """
+    Construit le snapshot binaire de pkgdb (sauf si data est fourni) et l'écrit
+    de façon atomique.
+
+    Returns:
+        int: Nombre de paquets enregistrés.
+    """
+    if data is None:
+        data = build_snapshot(pkg_db_path)
+    npkgs, nfiles = _HEADER.unpack_from(data, 0)[3:5]
+    snapshot_path = Path(snapshot_path)
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot_path.with_name(f".{snapshot_path.name}.{os.getpid()}")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, snapshot_path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    logger.info(f"Snapshot pkgdb écrit : {npkgs} paquets, {nfiles} fichiers ({snapshot_path})")
+    return npkgs
+
+
+class PkgDBSnapshot:
+    """
+    Vue en lecture seule, projetée en mémoire (mmap), d'un snapshot de pkgdb.
+
+    Le snapshot contient les noms, versions, commentaires, dépendances et la
+    table fichier -> paquet triée par chemin, qui sert d'index inverse pour
+    whoowns (recherche exacte, par préfixe ou par glob). Il est reconstruit dès que le mtime du
+    répertoire pkgdb diffère de celui enregistré dans l'en-tête.
+    """
+
+    _opened: Dict[str, "PkgDBSnapshot"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, snapshot_path: str, data: Optional[bytes] = None):
+        """
+        Args:
+            snapshot_path (str): Fichier du snapshot, projeté en mémoire.
+            data (Optional[bytes]): Contenu du snapshot déjà construit ; le
+                                    fichier n'est alors pas lu (NBQUERY_DBDIR
+                                    non accessible en écriture).
+        """
+        self.path = str(snapshot_path)
+        if data is None:
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = data
+        (magic, version, self.pkgdb_mtime, self.npkgs, self.nfiles, self._off_pkgs,
+         self._off_files, self._off_pkgfiles, self._off_strings) = _HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Snapshot pkgdb invalide : {self.path}")
+
+    @staticmethod
+    def default_path(pkg_db_path: str) -> Path:
+        digest = hashlib.sha1(str(Path(pkg_db_path)).encode()).hexdigest()[:12]
+        return Path(ConfigManager().get("NBQUERY_DBDIR")) / f"pkgdb-{digest}.snapshot"
+
+    @classmethod
+    def load(cls, pkg_db_path: Optional[str] = None, snapshot_path: Optional[str] = None) -> "PkgDBSnapshot":
+        """
+        Retourne un snapshot à jour de pkgdb, reconstruit si nécessaire.
+
+        Un snapshot déjà projeté par ce processus est réutilisé tant que le
+        mtime de pkgdb n'a pas changé : le coût d'un appel est alors un stat().
+        Si le snapshot ne peut pas être écrit (utilisateur sans droits sur
+        NBQUERY_DBDIR), il est conservé en mémoire pour le processus.
+
+        Raises:
+            FileNotFoundError: Si le répertoire pkgdb n'existe pas.
+        """
+        pkg_db_path = pkg_db_path or ConfigManager().get("PKG_DBDIR")
+        if not os.path.isdir(pkg_db_path):
+            raise FileNotFoundError(f"Base de données des paquets introuvable : {pkg_db_path}")
+        snapshot_path = str(snapshot_path or cls.default_path(pkg_db_path))
+        mtime = pkgdb_mtime(pkg_db_path)
+        with cls._lock:
+            snapshot = cls._opened.get(snapshot_path)
+            if snapshot is not None and snapshot.pkgdb_mtime == mtime:
+                return snapshot
+            # Le snapshot sur disque a pu être reconstruit par un autre processus
+            snapshot = None
+            if os.path.exists(snapshot_path):
+                try:
+                    snapshot = cls(snapshot_path)
+                except (ValueError, OSError, struct.error) as e:
+                    logger.warning(f"Snapshot pkgdb illisible, reconstruction : {str(e)}")
+            if snapshot is None or snapshot.pkgdb_mtime != mtime:
+                data = build_snapshot(pkg_db_path)
+                try:
+                    write_snapshot(pkg_db_path, snapshot_path, data=data)
+                    snapshot = cls(snapshot_path)
+                except OSError as e:
+                    logger.info(f"Snapshot pkgdb non enregistré ({str(e)}), conservé en mémoire")
+                    snapshot = cls(snapshot_path, data=data)
+            cls._opened[snapshot_path] = snapshot
+            return snapshot
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def _str(self, offset: int, length: int) -> str:
+        start = self._off_strings + offset
+        return self._map[start:start + length].decode("utf-8", "surrogateescape")
+
+    def _pkg_record(self, pkg_id: int) -> tuple:
+        return _PKG.unpack_from(self._map, self._off_pkgs + pkg_id * _PKG.size)
+
+    def _file_record(self, file_id: int) -> tuple:
+        return _FILE.unpack_from(self._map, self._off_files + file_id * _FILE.size)
+
+    def _name(self, pkg_id: int) -> str:
+        return self._str(*self._pkg_record(pkg_id)[0:2])
+
+    def _path(self, file_id: int) -> str:
+        return self._str(*self._file_record(file_id)[0:2])
+
+    def _package(self, pkg_id: int, with_files: bool = False) -> Dict[str, Any]:
+        record = self._pkg_record(pkg_id)
+        deps = self._str(*record[6:8])
+        name, version = self._str(*record[0:2]), self._str(*record[2:4])
+        info = {
+            "name": name,
+            "version": version,
+            "pkgname": f"{name}-{version}" if version else name,
+            "comment": self._str(*record[4:6]),
+            "depends": deps.split("\n") if deps else [],
+        }
+        if with_files:
+            info["files"] = self._files(record[8], record[9])
+        return info
+
+    def _files(self, start: int, count: int) -> List[str]:
+        base = self._off_pkgfiles + start * _INDEX.size
+        return [self._path(_INDEX.unpack_from(self._map, base + i * _INDEX.size)[0]) for i in range(count)]
+
+    def _find_id(self, name: str) -> Optional[int]:
+        # Recherche dichotomique sur les noms triés, puis sur "nom-version"
+        for candidate, version in ((name, None), split_pkgname(name)):
+            lo, hi = 0, self.npkgs
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._name(mid) < candidate:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            while lo < self.npkgs and self._name(lo) == candidate:
+                record = self._pkg_record(lo)
+                if version is None or self._str(*record[2:4]) == version:
+                    return lo
+                lo += 1
+        return None
+
+    def names(self) -> List[str]:
+        """Noms complets ("nom-version") des paquets installés, triés."""
+        return [self._package(pkg_id)["pkgname"] for pkg_id in range(self.npkgs)]
+
+    def packages(self, with_files: bool = False) -> Iterator[Dict[str, Any]]:
+        for pkg_id in range(self.npkgs):
+            yield self._package(pkg_id, with_files=with_files)
+
+    def get(self, name: str, with_files: bool = True) -> Optional[Dict[str, Any]]:
+        """Informations d'un paquet installé, par nom de base ou "nom-version"."""
+        pkg_id = self._find_id(name)
+        return self._package(pkg_id, with_files=with_files) if pkg_id is not None else None
+
+    def _lower_bound(self, path: str) -> int:
+        # Premier indice de la table des fichiers dont le chemin est >= path
+        lo, hi = 0, self.nfiles
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._path(mid) < path:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def owner(self, path: str) -> Optional[str]:
+        """Paquet ("nom-version") propriétaire d'un fichier installé."""
+        file_id = self._lower_bound(path)
+        if file_id < self.nfiles and self._path(file_id) == path:
+            return self._package(self._file_record(file_id)[2])["pkgname"]
+        return None
+
+    def owners(self, pattern: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        Fichiers installés correspondant à un préfixe ou à un motif glob.
+
+        Seule la plage de la table triée qui partage le préfixe littéral du
+        motif (la partie avant le premier caractère spécial) est parcourue.
+
+        Args:
+            pattern (str): Préfixe (ex. /usr/pkg/lib/perl5/) ou glob (ex. /usr/pkg/bin/py*).
+            limit (Optional[int]): Nombre maximal de résultats.
+
+        Returns:
+            List[Tuple[str, str]]: Couples (chemin, paquet "nom-version").
+        """
+        wildcard = min((i for i, c in enumerate(pattern) if c in "*?["), default=None)
+        prefix = pattern if wildcard is None else pattern[:wildcard]
+        results, pkgnames = [], {}
+        file_id = self._lower_bound(prefix)
+        while file_id < self.nfiles and (limit is None or len(results) < limit):
+            path = self._path(file_id)
+            if not path.startswith(prefix):
+                break
+            if wildcard is None or fnmatchcase(path, pattern):
+                pkg_id = self._file_record(file_id)[2]
+                if pkg_id not in pkgnames:
+                    pkgnames[pkg_id] = self._package(pkg_id)["pkgname"]
+                results.append((path, pkgnames[pkg_id]))
+            file_id += 1
+        return results
+
+    def __contains__(self, name: str) -> bool:
+        return self._find_id(name) is not None
+
+    def __len__(self) -> int:
+        return self.npkgs
@@ -0,0 +1,595 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator
+from nbpkg.common.logger import logger
+from nbpkg.core.package import SourcePackage
+from nbpkg.core.repository import RepositoryManager
+from nbpkg.config.config import ConfigManager
+from nbpkg.pkginspect.pathmap import PackagePathMap
+from nbpkg.pkginspect.scanner import scan
+from nbpkg.pkginspect.treewalk import iter_categories, iter_packages, walk_tree
+from nbpkg.pkginspect.textindex import MIN_PREFIX, PREFIX_WEIGHT, document_terms, parse_query, rank
+
+INDEX_FILENAME = "pkgsrc-index.db"
+SCHEMA_VERSION = 4
+
+# Fichiers dont la date de modification invalide l'entrée d'un paquet
+STAMP_FILES = ("Makefile", "DESCR", "distinfo", "PLIST")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS packages (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    pkgname TEXT,
+    version TEXT,
+    comment TEXT,
+    maintainer TEXT,
+    homepage TEXT,
+    categories TEXT,
+    master_sites TEXT,
+    stamp TEXT,
+    doclen INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS packages_name ON packages (name);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL,
+    path TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    doclen INTEGER NOT NULL,
+    PRIMARY KEY (term, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS terms_path ON terms (path);
+CREATE TABLE IF NOT EXISTS dirs (
+    root TEXT NOT NULL,
+    category TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    PRIMARY KEY (root, category)
+);
+CREATE TABLE IF NOT EXISTS failed (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    stamp TEXT,
+    error TEXT
+);
+"""
+
+_COLUMNS = ("path", "root", "category", "name", "pkgname", "version", "comment",
+            "maintainer", "homepage", "categories", "master_sites", "stamp", "doclen")
+
+
+def local_roots(repo_manager: RepositoryManager = None) -> List[str]:
+    """
+    Retourne les racines des dépôts locaux configurés, sans doublons.
+
+    Une racine incluse dans une autre (ex. /usr/pkgsrc/wip sous /usr/pkgsrc)
+    est écartée : elle est déjà parcourue comme catégorie.
+    """
+    repo_manager = repo_manager or RepositoryManager()
+    roots = []
+    for repo in repo_manager.repositories:
+        if repo["type"] != "local":
+            continue
+        root = str(Path(repo["path"]))
+        if root not in roots:
+            roots.append(root)
+    return [root for root in roots
+            if not any(other != root and Path(other) in Path(root).parents for other in roots)]
+
+
+def extract_package(pkg_dir: Path) -> Dict[str, Any]:
+    """
+    Extrait les métadonnées indexées d'un répertoire de paquet pkgsrc.
+
+    Args:
+        pkg_dir (Path): Répertoire du paquet (ex. /usr/pkgsrc/lang/python311).
+
+    Returns:
+        Dict[str, Any]: Champs de l'index (sans root/path), avec le texte du
+                        DESCR pour l'index plein texte.
+    """
+    src_pkg = SourcePackage(name=pkg_dir.name, version="Inconnu")
+    src_pkg.fetch_source_info()
+    version = src_pkg.version if src_pkg.version != "Inconnu" else None
+    try:
+        descr = (pkg_dir / "DESCR").read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        descr = None
+    return {
+        "category": pkg_dir.parent.name,
+        "name": pkg_dir.name,
+        "pkgname": f"{src_pkg.name}-{version}" if version else src_pkg.name,
+        "version": version,
+        "comment": src_pkg.comment,
+        "maintainer": src_pkg.maintainer,
+        "homepage": src_pkg.homepage,
+        "categories": src_pkg.categories or [],
+        "master_sites": src_pkg.get_master_sites() or [],
+        "descr": descr,
+    }
+
+
+def package_stamp(pkg_dir: Path) -> Optional[str]:
+    """
+    Calcule l'empreinte (mtime) d'un répertoire de paquet et de ses fichiers clés.
+
+    Returns:
+        Optional[str]: Empreinte, ou None si le répertoire a disparu.
+    """
+    try:
+        parts = [str(os.stat(pkg_dir).st_mtime_ns)]
+    except OSError:
+        return None
+    for filename in STAMP_FILES:
+        try:
+            parts.append(str(os.stat(pkg_dir / filename).st_mtime_ns))
+        except OSError:
+            parts.append("-")
+    return ":".join(parts)
+
+
+def maintainer_matches(value: Optional[str], maintainer: str, by_email: bool = True) -> bool:
+    """Teste si MAINTAINER contient maintainer (adresse complète ou partie locale)."""
+    if not value:
+        return False
+    value = value if by_email else value.split("@")[0]
+    return maintainer.lower() in value.lower()
+
+
+def _scan_tree(roots: List[str], keep_dir, keep_info, categories: Optional[List[str]] = None,
+               jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    seen = set()
+
+    def candidates():
+        for root in roots:
+            for category, name, path in walk_tree(root, categories=categories):
+                key = f"{category}/{name}"
+                if key not in seen and keep_dir(name):
+                    seen.add(key)
+                    yield root, Path(path)
+
+    def extract(item):
+        return extract_package(item[1])
+
+    for (root, pkg_dir), info, error in scan(extract, candidates(), jobs=jobs):
+        key = f"{pkg_dir.parent.name}/{pkg_dir.name}"
+        if error is not None:
+            logger.warning(f"Impossible de lire {key} : {error}")
+            continue
+        if keep_info(info):
+            info["categories"] = info.get("categories") or []
+            info["master_sites"] = info.get("master_sites") or []
+            yield dict(info, root=root, path=key)
+
+
+def scan_by_name(roots: List[str], package_name: str, category: Optional[str] = None,
+                 jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Recherche par nom sans index : chaque correspondance est produite dès
+    que son Makefile a été lu, sans attendre la fin du parcours.
+    """
+    needle = package_name.lower()
+    return _scan_tree(roots, lambda name: needle in name.lower(), lambda info: True,
+                      categories=[category] if category else None, jobs=jobs)
+
+
+def scan_by_maintainer(roots: List[str], maintainer: str, by_email: bool = True,
+                       jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Recherche par mainteneur sans index, produite au fil du parcours de l'arbre."""
+    return _scan_tree(roots, lambda name: True,
+                      lambda info: maintainer_matches(info.get("maintainer"), maintainer, by_email), jobs=jobs)
+
+
+def scan_packages(roots: List[str], category: Optional[str] = None,
+                  jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Tous les paquets de l'arbre sans index (repli des requêtes quand l'index est indisponible)."""
+    return _scan_tree(roots, lambda name: True, lambda info: True,
+                      categories=[category] if category else None, jobs=jobs)
+
+
+class PkgIndex:
+    """
+    Index persistant (SQLite) de l'arborescence pkgsrc.
+
+    L'index est construit une fois par reindex(), tenu à jour par refresh()
+    après une mise à jour de pkgsrc, puis interrogé par les recherches de
+    PkgQuery sans relire les Makefile des paquets. L'extraction des
+    métadonnées est répartie sur un pool de workers (voir scanner.scan).
+    """
+
+    def __init__(self, roots: Optional[List[str]] = None, index_path: Optional[str] = None,
+                 jobs: Optional[int] = None, processes: bool = False):
+        self.roots = [str(Path(root)) for root in roots] if roots is not None else local_roots()
+        if index_path is None:
+            filename = INDEX_FILENAME
+            if roots is not None:
+                # Un jeu de racines explicite dispose de son propre fichier d'index
+                digest = hashlib.sha1("\0".join(self.roots).encode()).hexdigest()[:12]
+                filename = f"pkgsrc-index-{digest}.db"
+            index_path = Path(ConfigManager().get("NBQUERY_DBDIR")) / filename
+        self.index_path = Path(index_path)
+        self.jobs = jobs
+        self.processes = processes
+        self._conn = None
+        self._writable = False
+        self._memory = False
+
+    @classmethod
+    def for_root(cls, root: str) -> "PkgIndex":
+        """Retourne l'index par défaut s'il couvre root, sinon un index dédié."""
+        index = cls()
+        if str(Path(root)) in index.roots:
+            return index
+        return cls(roots=[root])
+
+    def _connect(self, write: bool = False) -> sqlite3.Connection:
+        """
+        Connexion à l'index.
+
+        Les requêtes ouvrent l'index existant en lecture seule, sans rien créer
+        sous NBQUERY_DBDIR ; un index absent ou d'un autre schéma est alors vu
+        vide (base en mémoire). Seule la reconstruction (write=True) crée ou
+        migre le fichier, sauf après build_in_memory().
+        """
+        if self._conn is not None and (self._writable or not write):
+            return self._conn
+        self.close()
+        if write:
+            if self._memory:
+                conn = sqlite3.connect(":memory:")
+            else:
+                self.index_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.index_path))
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                logger.warning(f"Schéma d'index obsolète ({version}), reconstruction nécessaire")
+                conn.executescript(
+                    "DROP TABLE IF EXISTS packages; DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS dirs; "
+                    "DROP TABLE IF EXISTS terms; DROP TABLE IF EXISTS failed;"
+                )
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        else:
+            conn = None
+            if self.index_path.exists():
+                conn = sqlite3.connect(f"{self.index_path.resolve().as_uri()}?mode=ro", uri=True)
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version != SCHEMA_VERSION:
+                    logger.warning(f"Schéma d'index obsolète ({version}), reconstruction nécessaire")
+                    conn.close()
+                    conn = None
+            if conn is None:
+                conn = sqlite3.connect(":memory:")
+                conn.executescript(_SCHEMA)
+        conn.row_factory = sqlite3.Row
+        self._conn, self._writable = conn, write
+        return conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._writable = False
+
+    def exists(self) -> bool:
+        """Indique si l'index a déjà été construit pour les racines courantes."""
+        if not self.index_path.exists():
+            return False
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'roots'").fetchone()
+        return row is not None and json.loads(row["value"]) == self.roots
+
+    def _iter_package_dirs(self, known_dirs: Dict[tuple, int], known_paths: Dict[tuple, List[str]], dir_mtimes: Dict[tuple, int]):
+        """
+        Parcourt les répertoires de paquets des racines.
+
+        Une catégorie dont le mtime n'a pas changé depuis le dernier passage
+        n'est pas relue : sa liste de paquets est reprise de l'index (paquets
+        indexés et paquets en échec).
+        """
+        for root in self.roots:
+            for category in iter_categories(root):
+                key = (root, category.name)
+                mtime = category.stat().st_mtime_ns
+                dir_mtimes[key] = mtime
+                category_path = Path(category.path)
+                if known_dirs.get(key) == mtime and key in known_paths:
+                    for name in known_paths[key]:
+                        yield root, category_path / name
+                    continue
+                for pkg in iter_packages(category.path):
+                    yield root, category_path / pkg.name
+
+    @staticmethod
+    def _row(root: str, pkg_dir: Path, info: Dict[str, Any], stamp: str) -> tuple:
+        record = dict(info, root=root, path=f"{pkg_dir.parent.name}/{pkg_dir.name}", stamp=stamp)
+        record["categories"] = json.dumps(record.get("categories") or [])
+        record["master_sites"] = json.dumps(record.get("master_sites") or [])
+        return tuple(record.get(column) for column in _COLUMNS)
+
+    def _scan(self, incremental: bool) -> Dict[str, Any]:
+        start = time.monotonic()
+        conn = self._connect(write=True)
+        known_stamps, known_failed, known_dirs, known_paths = {}, {}, {}, {}
+        if incremental:
+            for row in conn.execute("SELECT path, root, category, name, stamp FROM packages"):
+                known_stamps[row["path"]] = row["stamp"]
+                known_paths.setdefault((row["root"], row["category"]), []).append(row["name"])
+            # Paquets dont l'extraction a échoué : relus dès que leurs fichiers changent
+            for row in conn.execute("SELECT path, root, category, name, stamp FROM failed"):
+                known_failed[row["path"]] = row["stamp"]
+                known_paths.setdefault((row["root"], row["category"]), []).append(row["name"])
+            for row in conn.execute("SELECT root, category, mtime FROM dirs"):
+                known_dirs[(row["root"], row["category"])] = row["mtime"]
+
+        seen, dir_mtimes, stamps, failures = set(), {}, {}, []
+        counters = {"scanned": 0}
+
+        def candidates():
+            for root, pkg_dir in self._iter_package_dirs(known_dirs, known_paths, dir_mtimes):
+                key = f"{pkg_dir.parent.name}/{pkg_dir.name}"
+                if key in seen:
+                    continue
+                seen.add(key)
+                counters["scanned"] += 1
+                stamp = package_stamp(pkg_dir)
+                if stamp is None:
+                    seen.discard(key)
+                    continue
+                if incremental and stamp in (known_stamps.get(key), known_failed.get(key)):
+                    continue
+                stamps[pkg_dir] = (root, stamp)
+                yield pkg_dir
+
+        rows, postings, added = [], [], 0
+        for pkg_dir, info, error in scan(extract_package, candidates(), jobs=self.jobs, processes=self.processes):
+            root, stamp = stamps.pop(pkg_dir)
+            key = f"{pkg_dir.parent.name}/{pkg_dir.name}"
+            if error is not None:
+                failures.append({"path": key, "error": error, "root": root, "stamp": stamp})
+                logger.warning(f"Impossible d'indexer {key} : {error}")
+                continue
+            terms, info["doclen"] = document_terms(info["name"], info.get("comment"), info.get("descr"))
+            postings.extend((term, key, tf, info["doclen"]) for term, tf in terms.items())
+            rows.append(self._row(root, pkg_dir, info, stamp))
+            if key not in known_stamps:
+                added += 1
+
+        removed = [(path,) for path in known_stamps if path not in seen]
+        gone = removed + [(path,) for path in known_failed if path not in seen]
+        with conn:
+            if not incremental:
+                conn.execute("DELETE FROM packages")
+                conn.execute("DELETE FROM terms")
+                conn.execute("DELETE FROM failed")
+            conn.executemany("DELETE FROM packages WHERE path = ?", removed)
+            conn.executemany("DELETE FROM failed WHERE path = ?", gone + [(row[0],) for row in rows])
+            conn.executemany(
+                "INSERT OR REPLACE INTO failed (path, root, category, name, stamp, error) VALUES (?, ?, ?, ?, ?, ?)",
+                [(item["path"], item["root"], *item["path"].split("/", 1), item["stamp"], str(item["error"]))
+                 for item in failures],
+            )
+            conn.executemany("DELETE FROM terms WHERE path = ?", removed + [(row[0],) for row in rows])
+            conn.executemany("INSERT INTO terms (term, path, tf, doclen) VALUES (?, ?, ?, ?)", postings)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO packages ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                rows,
+            )
+            conn.execute("DELETE FROM dirs")
+            conn.executemany(
+                "INSERT INTO dirs (root, category, mtime) VALUES (?, ?, ?)",
+                [(root, category, mtime) for (root, category), mtime in dir_mtimes.items()],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("roots", json.dumps(self.roots)), ("built_at", str(int(time.time())))],
+            )
+            # Les paquets en échec sont écartés du décompte
+            indexed = conn.execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+        if added or removed:
+            PackagePathMap.invalidate()
+        return {
+            "packages": indexed,
+            "scanned": counters["scanned"],
+            "rescanned": len(rows) + len(failures),
+            "added": added,
+            "removed": len(removed),
+            "errors": len(failures),
+            "failures": [{"path": item["path"], "error": item["error"]} for item in failures],
+            "duration": round(time.monotonic() - start, 3),
+        }
+
+    def reindex(self) -> Dict[str, Any]:
+        """
+        Reconstruit entièrement l'index à partir de l'arborescence pkgsrc.
+
+        Returns:
+            Dict[str, Any]: Statistiques (paquets indexés, erreurs, durée en secondes).
+        """
+        stats = self._scan(incremental=False)
+        logger.info(f"Index pkgsrc reconstruit : {stats['packages']} paquets, {stats['errors']} erreurs")
+        return stats
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Met à jour l'index après un cvs/git update de pkgsrc.
+
+        Seuls les paquets dont le répertoire, le Makefile, le DESCR, le distinfo
+        ou le PLIST ont changé, ainsi que les paquets ajoutés, sont relus ; les
+        paquets supprimés sont retirés de l'index.
+
+        Returns:
+            Dict[str, Any]: Statistiques (rescanned, added, removed, errors, durée).
+        """
+        if not self.exists():
+            return self.reindex()
+        stats = self._scan(incremental=True)
+        logger.info(
+            f"Index pkgsrc rafraîchi : {stats['rescanned']} paquets relus, "
+            f"{stats['added']} ajoutés, {stats['removed']} supprimés"
+        )
+        return stats
+
+    def ensure(self):
+        """Construit l'index s'il n'existe pas encore."""
+        if not self.exists():
+            logger.info(f"Index absent ({self.index_path}), construction initiale")
+            self.reindex()
+
+    def try_ensure(self) -> bool:
+        """
+        Comme ensure, sans échouer : False si l'index ne peut être ni lu ni
+        construit (NBQUERY_DBDIR non accessible en écriture, ...).
+        """
+        try:
+            self.ensure()
+            return True
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Index pkgsrc indisponible ({self.index_path}) : {str(e)}")
+            self.close()
+            return False
+
+    def build_in_memory(self) -> Dict[str, Any]:
+        """
+        Construit l'index en mémoire, par un parcours complet de l'arbre, sans
+        rien écrire : repli des requêtes quand try_ensure() échoue. L'index est
+        perdu à close().
+
+        Returns:
+            Dict[str, Any]: Statistiques, comme reindex().
+        """
+        self.close()
+        self._memory = True
+        stats = self._scan(incremental=False)
+        logger.info(f"Index pkgsrc construit en mémoire : {stats['packages']} paquets (voir reindex)")
+        return stats
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["categories"] = json.loads(record["categories"] or "[]")
+        record["master_sites"] = json.loads(record["master_sites"] or "[]")
+        return record
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Retourne l'entrée d'index d'un paquet ("category/package")."""
+        row = self._connect().execute("SELECT * FROM packages WHERE path = ?", (path,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def iter_name(self, package_name: str, category: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Comme search_name, mais produit les entrées au fil de la lecture de l'index."""
+        query = "SELECT * FROM packages WHERE instr(lower(name), ?) > 0"
+        params = [package_name.lower()]
+        if category:
+            query += " AND category = ?"
+            params.append(category)
+        for row in self._connect().execute(query + " ORDER BY path", params):
+            yield self._to_dict(row)
+
+    def iter_pkgbase(self, base: str) -> Iterator[Dict[str, Any]]:
+        """
+        Entrées dont le PKGNAME, sans version, vaut exactement base, quel que
+        soit le répertoire (py311-requests se trouve sous www/py-requests).
+        """
+        rows = self._connect().execute(
+            "SELECT * FROM packages WHERE version IS NOT NULL AND pkgname = ? || '-' || version ORDER BY path", (base,)
+        )
+        for row in rows:
+            yield self._to_dict(row)
+
+    def search_name(self, package_name: str, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recherche insensible à la casse d'une sous-chaîne dans le nom du répertoire."""
+        return list(self.iter_name(package_name, category=category))
+
+    def names(self) -> Iterator[tuple]:
+        """Produit (nom du répertoire, PKGNAME, "category/package") de chaque paquet indexé."""
+        yield from self._connect().execute("SELECT name, pkgname, path FROM packages ORDER BY path")
+
+    def search_text(self, query: str, limit: Optional[int] = 20,
+                    category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Recherche plein texte dans les noms, COMMENT et DESCR des paquets.
+
+        Chaque terme de la requête est cherché tel quel et, s'il compte au
+        moins MIN_PREFIX lettres, comme préfixe d'autres termes (avec un poids
+        moindre) ; "terme*" demande un préfixe explicite. Les paquets couvrant
+        le plus de termes passent devant, puis le score BM25 départage.
+
+        Args:
+            query (str): Requête (ex. "postgres client library").
+            limit (Optional[int]): Nombre maximal de résultats (None : tous).
+            category (Optional[str]): Limiter à une catégorie.
+
+        Returns:
+            List[Dict[str, Any]]: Entrées d'index, avec "score" et "matched"
+                                  (nombre de termes couverts), de la meilleure à la moins bonne.
+        """
+        terms = parse_query(query)
+        if not terms:
+            return []
+        conn = self._connect()
+        total, avgdl = conn.execute("SELECT COUNT(*), AVG(doclen) FROM packages").fetchone()
+        # Longueur du document recopiée dans chaque occurrence : pas de jointure
+        select = "SELECT path, tf, doclen FROM terms WHERE "
+        suffix, extra = "", []
+        if category:
+            suffix, extra = " AND path >= ? AND path < ?", [f"{category}/", f"{category}0"]
+        postings_by_term, doclens = [], {}
+        for term, explicit in terms:
+            postings, lookups = [], []
+            if explicit:
+                lookups.append(("term >= ? AND term < ?", [term, term + "\uffff"], 1.0))
+            else:
+                lookups.append(("term = ?", [term], 1.0))
+                if len(term) >= MIN_PREFIX:
+                    lookups.append(("term > ? AND term < ?", [term, term + "\uffff"], PREFIX_WEIGHT))
+            for condition, params, weight in lookups:
+                for path, tf, doclen in conn.execute(select + condition + suffix, params + extra):
+                    postings.append((path, tf, weight))
+                    doclens[path] = doclen
+            postings_by_term.append(postings)
+        results = []
+        for path, matched, score in rank(postings_by_term, doclens, total, avgdl, limit=limit):
+            record = self.get(path)
+            record.update(score=round(score, 4), matched=matched)
+            results.append(record)
+        return results
+
+    def iter_maintainer(self, maintainer: str, by_email: bool = True) -> Iterator[Dict[str, Any]]:
+        """Comme search_maintainer, mais produit les entrées au fil de la lecture de l'index."""
+        rows = self._connect().execute(
+            "SELECT * FROM packages WHERE instr(lower(maintainer), ?) > 0 ORDER BY path", (maintainer.lower(),)
+        )
+        for row in rows:
+            if maintainer_matches(row["maintainer"], maintainer, by_email):
+                yield self._to_dict(row)
+
+    def search_maintainer(self, maintainer: str, by_email: bool = True) -> List[Dict[str, Any]]:
+        """Recherche par mainteneur (adresse complète ou partie locale de l'adresse)."""
+        return list(self.iter_maintainer(maintainer, by_email=by_email))
+
+    def packages(self, root: Optional[str] = None):
+        """Itère sur les entrées de l'index, éventuellement restreintes à une racine."""
+        query, params = "SELECT * FROM packages", []
+        if root is not None:
+            query += " WHERE root = ?"
+            params.append(str(Path(root)))
+        for row in self._connect().execute(query + " ORDER BY path", params):
+            yield self._to_dict(row)
+
+    def __iter__(self):
+        return self.packages()
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM packages").fetchone()[0]
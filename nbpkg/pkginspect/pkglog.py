@@ -0,0 +1,273 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+from nbpkg.common.logger import logger
+from nbpkg.config.config import ConfigManager
+from nbpkg.pkginspect.pkgdbsnap import split_pkgname
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    name TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    PRIMARY KEY (name, offset)
+) WITHOUT ROWID;
+"""
+
+# Horodatage en tête de ligne : ISO 8601, entre crochets, ou préfixe syslog
+# ("Mar  3 12:00:00 hôte programme[pid]:")
+_TIMESTAMP = re.compile(
+    r"^(?:\[(?P<bracketed>[^\]]+)\]"
+    r"|(?P<iso>\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}\S*)"
+    r"|(?P<syslog>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) \S+ [^\s:]+:)\s+"
+)
+_ACTIONS = {
+    "installed": "installed", "registered": "installed", "reinstalled": "reinstalled",
+    "deinstalled": "deinstalled", "removed": "deinstalled", "deleted": "deinstalled",
+    "upgraded": "upgraded", "updated": "upgraded", "downgraded": "downgraded",
+}
+_VERBS = "|".join(_ACTIONS)
+# "perl5 upgraded: 5.36.0 -> 5.38.2", "perl5 upgraded from 5.36.0 to 5.38.2"
+_UPGRADE = re.compile(
+    rf"^(?P<name>\S+) (?P<action>{_VERBS}):?(?: from)? (?P<old>\S+) (?:->|to) (?P<new>\S+)"
+)
+# "perl5-5.36.0 upgraded to perl5-5.38.2"
+_UPGRADE_TO = re.compile(rf"^(?P<pkg>\S+) (?P<action>{_VERBS}) to (?P<new>\S+)")
+# "perl5-5.38.2 installed" ou "installed perl5-5.38.2"
+_PKG_LAST = re.compile(rf"^(?P<action>{_VERBS}):? (?P<pkg>\S+)")
+_PKG_FIRST = re.compile(rf"^(?P<pkg>\S+) (?P<action>{_VERBS})\b")
+
+# Taille des blocs lus depuis la fin du journal
+_REVERSE_BLOCK = 64 * 1024
+# Octets de tête hachés pour détecter une rotation du journal
+_HEAD_SIZE = 256
+
+
+def parse_event(line: str, offset: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    Analyse une ligne du journal des paquets.
+
+    Args:
+        line (str): Ligne du journal (sans fin de ligne).
+        offset (int): Position de la ligne dans le fichier.
+
+    Returns:
+        Optional[Dict[str, Any]]: Événement ("offset", "timestamp", "action",
+                                  "name", "version", "old_version", "line"),
+                                  ou None si la ligne n'est pas reconnue.
+    """
+    line = line.rstrip("\r\n")
+    message, timestamp = line, None
+    match = _TIMESTAMP.match(line)
+    if match:
+        timestamp = match.group("bracketed") or match.group("iso") or match.group("syslog")
+        message = line[match.end():]
+    old_version = None
+    match = _UPGRADE.match(message)
+    if match:
+        name, version, old_version = match.group("name"), match.group("new"), match.group("old")
+    else:
+        match = _UPGRADE_TO.match(message)
+        if match:
+            name, old_version = split_pkgname(match.group("pkg"))
+            version = split_pkgname(match.group("new"))[1]
+        else:
+            match = _PKG_FIRST.match(message) or _PKG_LAST.match(message)
+            if not match:
+                return None
+            name, version = split_pkgname(match.group("pkg"))
+    return {
+        "offset": offset,
+        "timestamp": timestamp,
+        "action": _ACTIONS[match.group("action")],
+        "name": name,
+        "version": version or None,
+        "old_version": old_version,
+        "line": line,
+    }
+
+
+def reverse_lines(path: str, block_size: int = _REVERSE_BLOCK) -> Iterator[Tuple[int, str]]:
+    """
+    Parcourt un fichier texte de la fin vers le début, par blocs.
+
+    Yields:
+        Tuple[int, str]: (position de la ligne, ligne sans fin de ligne).
+    """
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        tail = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            data = f.read(size) + tail
+            lines = data.split(b"\n")
+            # La première ligne du bloc peut commencer dans le bloc précédent
+            tail = lines.pop(0)
+            end = position + len(data)
+            for line in reversed(lines):
+                end -= len(line) + 1
+                if line:
+                    yield end + 1, line.decode("utf-8", errors="replace")
+        if tail:
+            yield 0, tail.decode("utf-8", errors="replace")
+
+
+class PkgLog:
+    """
+    Historique des paquets tiré du journal pkg.log, avec index persistant.
+
+    L'index (SQLite) associe à chaque nom de paquet les positions de ses
+    événements dans le journal. Il est complété à partir de la dernière
+    position indexée ; une rotation ou une troncature du journal (inode, tête
+    du fichier ou taille) provoque une reconstruction.
+    """
+
+    def __init__(self, log_path: Optional[str] = None, index_path: Optional[str] = None):
+        config = ConfigManager()
+        self.log_path = str(log_path or config.get("NBQUERY_PKGLOG"))
+        if index_path is None:
+            digest = hashlib.sha1(self.log_path.encode()).hexdigest()[:12]
+            index_path = Path(config.get("NBQUERY_DBDIR")) / f"pkglog-{digest}.db"
+        self.index_path = Path(index_path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] not in (0, SCHEMA_VERSION):
+                self._conn.executescript("DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS events;")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.log_path)
+
+    @staticmethod
+    def _head(f, size: int) -> str:
+        f.seek(0)
+        return hashlib.sha1(f.read(size)).hexdigest()
+
+    def update(self) -> Dict[str, Any]:
+        """
+        Indexe les lignes ajoutées au journal depuis le dernier passage.
+
+        Seules les lignes complètes sont indexées ; une ligne en cours
+        d'écriture le sera au passage suivant.
+
+        Returns:
+            Dict[str, Any]: "events" (événements ajoutés), "offset" (position
+                            indexée) et "rebuilt" (index reconstruit).
+        """
+        with self._lock:
+            conn = self._connect()
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            with open(self.log_path, "rb") as f:
+                st = os.fstat(f.fileno())
+                identity = f"{st.st_dev}:{st.st_ino}"
+                offset = int(meta.get("offset", 0))
+                head_size = int(meta.get("head_size", 0))
+                rebuilt = (meta.get("identity") != identity or st.st_size < offset
+                           or self._head(f, head_size) != meta.get("head"))
+                if rebuilt:
+                    offset = 0
+                rows = []
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    event = parse_event(raw.decode("utf-8", errors="replace"), offset)
+                    if event:
+                        rows.append((event["name"], offset, event["action"]))
+                    offset += len(raw)
+                head_size = min(offset, _HEAD_SIZE)
+                head = self._head(f, head_size)
+            with conn:
+                if rebuilt:
+                    conn.execute("DELETE FROM events")
+                conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?)", rows)
+                conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                 [("identity", identity), ("offset", str(offset)),
+                                  ("head_size", str(head_size)), ("head", head)])
+        if rebuilt and meta:
+            logger.info(f"Journal {self.log_path} remplacé ou tronqué : index reconstruit")
+        return {"events": len(rows), "offset": offset, "rebuilt": rebuilt}
+
+    def _read_events(self, offsets: List[int]) -> List[Dict[str, Any]]:
+        events = []
+        with open(self.log_path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                event = parse_event(f.readline().decode("utf-8", errors="replace"), offset)
+                if event:
+                    events.append(event)
+        return events
+
+    def history(self, name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Événements d'un paquet, du plus ancien au plus récent.
+
+        Le nom est comparé exactement (perl ne correspond pas à perl5).
+
+        Args:
+            name (str): Nom du paquet, sans version.
+            limit (Optional[int]): Ne garder que les limit derniers événements.
+
+        Returns:
+            List[Dict[str, Any]]: Événements (voir parse_event).
+        """
+        self.update()
+        query = "SELECT offset FROM events WHERE name = ? ORDER BY offset DESC"
+        params: Tuple = (name,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (name, limit)
+        with self._lock:
+            offsets = [row[0] for row in self._connect().execute(query, params)]
+        return self._read_events(sorted(offsets))
+
+    def packages(self) -> List[str]:
+        """Noms des paquets présents dans le journal."""
+        self.update()
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT DISTINCT name FROM events ORDER BY name")]
+
+    def tail(self, limit: int = 10, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Derniers événements du journal, lus depuis la fin sans passer par l'index.
+
+        Args:
+            limit (int): Nombre d'événements.
+            name (Optional[str]): Limiter à ce paquet.
+
+        Returns:
+            List[Dict[str, Any]]: Événements, du plus ancien au plus récent.
+        """
+        events = []
+        for offset, line in reverse_lines(self.log_path):
+            if len(events) >= limit:
+                break
+            event = parse_event(line, offset)
+            if event and (name is None or event["name"] == name):
+                events.append(event)
+        return events[::-1]
@@ -0,0 +1,375 @@
+import bz2
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import sqlite3
+import time
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator, IO, Tuple
+from nbpkg.common.logger import logger
+from nbpkg.common.nberrors import NetworkError
+from nbpkg.config.config import ConfigManager
+from nbpkg.pkginspect.depgraph import expand_alternatives, pattern_base
+from nbpkg.pkginspect.dewey import version_key
+from nbpkg.pkginspect.fetch import Mirror, MirrorSet, default_ttl
+from nbpkg.pkginspect.httpcache import HttpCache
+from nbpkg.pkginspect.pkgdbsnap import split_pkgname
+
+SCHEMA_VERSION = 1
+
+# Variantes publiées par les dépôts binaires, de la plus compacte à la plus courante
+SUMMARY_FILES = ("pkg_summary.xz", "pkg_summary.bz2", "pkg_summary.gz")
+
+# Variables pouvant apparaître plusieurs fois dans un enregistrement
+MULTI_VALUED = ("DEPENDS", "CONFLICTS", "DESCRIPTION", "PROVIDES", "REQUIRES", "SUPERSEDES")
+
+_READ_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS packages (
+    pkgname TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    version TEXT,
+    pkgpath TEXT,
+    comment TEXT,
+    categories TEXT,
+    homepage TEXT,
+    license TEXT,
+    file_size INTEGER,
+    size_pkg INTEGER,
+    depends TEXT,
+    description TEXT,
+    record_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_name ON packages (name);
+CREATE TABLE IF NOT EXISTS categories (
+    pkgname TEXT NOT NULL,
+    category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS categories_category ON categories (category);
+CREATE INDEX IF NOT EXISTS categories_pkgname ON categories (pkgname);
+CREATE TABLE IF NOT EXISTS depends (
+    pkgname TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    base TEXT NOT NULL,
+    is_glob INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS depends_base ON depends (base);
+CREATE INDEX IF NOT EXISTS depends_pkgname ON depends (pkgname);
+"""
+
+
+def open_summary(path: Path) -> IO[str]:
+    """
+    Ouvre un pkg_summary en texte, décompressé à la volée (xz, bzip2, gzip ou brut).
+
+    Le format est reconnu à sa signature, pas à l'extension.
+    """
+    raw = open(path, "rb")
+    magic = raw.read(6)
+    raw.seek(0)
+    if magic.startswith(b"\xfd7zXZ"):
+        stream = lzma.open(raw)
+    elif magic.startswith(b"BZh"):
+        stream = bz2.open(raw)
+    elif magic.startswith(b"\x1f\x8b"):
+        stream = gzip.open(raw)
+    else:
+        stream = raw
+    return io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+
+
+def parse_summary(lines: IO[str]) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """
+    Découpe un pkg_summary en enregistrements (séparés par une ligne vide).
+
+    Yields:
+        Tuple[Dict[str, Any], str]: (variables de l'enregistrement, les
+                                    variables de MULTI_VALUED étant des listes ;
+                                    empreinte du texte brut de l'enregistrement).
+    """
+    record: Dict[str, Any] = {}
+    digest = hashlib.sha1()
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line:
+            if record:
+                yield record, digest.hexdigest()
+            record, digest = {}, hashlib.sha1()
+            continue
+        digest.update(line.encode("utf-8", errors="replace"))
+        digest.update(b"\n")
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        if key in MULTI_VALUED:
+            record.setdefault(key, []).append(value)
+        else:
+            record[key] = value
+    if record:
+        yield record, digest.hexdigest()
+
+
+def _glob_name(pattern: str) -> str:
+    """Retire la partie version d'un motif glob ("libffi-[0-9]*" -> "libffi")."""
+    depth, last_dash = 0, -1
+    for i, c in enumerate(pattern):
+        if c == "[":
+            depth += 1
+        elif c == "]":
+            depth = max(depth - 1, 0)
+        elif c == "-" and depth == 0:
+            last_dash = i
+    if last_dash > 0 and pattern[last_dash + 1:last_dash + 2] in tuple("0123456789[*?"):
+        return pattern[:last_dash]
+    return pattern
+
+
+def depends_bases(pattern: str) -> List[Tuple[str, bool]]:
+    """
+    Noms de base visés par un motif de dépendance.
+
+    Returns:
+        List[Tuple[str, bool]]: (nom, True si le nom reste un motif glob).
+    """
+    bases = []
+    for alternative in expand_alternatives(pattern):
+        base, is_glob = pattern_base(alternative)
+        if is_glob:
+            base = _glob_name(base)
+            is_glob = any(c in base for c in "*?[")
+        bases.append((base, is_glob))
+    return bases
+
+
+class SummaryIndex:
+    """
+    Index SQLite du pkg_summary d'un dépôt binaire.
+
+    L'ingestion lit le pkg_summary en flux ; chaque enregistrement est
+    identifié par l'empreinte de son texte, si bien qu'un rafraîchissement
+    ne réécrit que les paquets ajoutés, modifiés ou retirés.
+    """
+
+    def __init__(self, repo_url: str, index_path: Optional[str] = None):
+        self.repo_url = repo_url if repo_url.endswith("/") else repo_url + "/"
+        if index_path is None:
+            digest = hashlib.sha1(self.repo_url.encode()).hexdigest()[:12]
+            index_path = Path(ConfigManager().get("NBQUERY_DBDIR")) / f"summary-{digest}.db"
+        self.index_path = Path(index_path)
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.index_path))
+            self._conn.row_factory = sqlite3.Row
+            # Motifs glob des DEPENDS ("p5-*>=1.0") évalués dans les requêtes
+            self._conn.create_function("fnmatchcase", 2, fnmatchcase, deterministic=True)
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                logger.warning(f"Schéma d'index obsolète ({version}), reconstruction nécessaire")
+                self._conn.executescript(
+                    "DROP TABLE IF EXISTS packages; DROP TABLE IF EXISTS meta; "
+                    "DROP TABLE IF EXISTS categories; DROP TABLE IF EXISTS depends;"
+                )
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def exists(self) -> bool:
+        """Indique si un pkg_summary a déjà été ingéré."""
+        if not self.index_path.exists():
+            return False
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'digest'").fetchone()
+        return row is not None
+
+    @staticmethod
+    def _file_digest(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _row(record: Dict[str, Any], record_hash: str) -> tuple:
+        pkgname = record["PKGNAME"]
+        name, version = split_pkgname(pkgname)
+
+        def integer(key):
+            try:
+                return int(record[key])
+            except (KeyError, ValueError):
+                return None
+
+        return (pkgname, name, version, record.get("PKGPATH"), record.get("COMMENT"),
+                json.dumps(record.get("CATEGORIES", "").split()), record.get("HOMEPAGE"),
+                record.get("LICENSE"), integer("FILE_SIZE"), integer("SIZE_PKG"),
+                json.dumps(record.get("DEPENDS", [])), "\n".join(record.get("DESCRIPTION", [])),
+                record_hash)
+
+    def ingest(self, summary_path: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Ingère un pkg_summary local, compressé ou non, en ne réécrivant que la différence.
+
+        Args:
+            summary_path (str): Fichier pkg_summary(.gz|.bz2|.xz).
+            force (bool): Relire le fichier même si son empreinte n'a pas changé.
+
+        Returns:
+            Dict[str, Any]: Statistiques (packages, added, updated, removed, unchanged, duration).
+        """
+        started = time.monotonic()
+        summary_path = Path(summary_path)
+        stats = {"packages": 0, "added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        conn = self._connect()
+        digest = self._file_digest(summary_path)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'digest'").fetchone()
+        if row is not None and row["value"] == digest and not force:
+            stats["packages"] = len(self)
+            stats["unchanged"] = stats["packages"]
+            stats["duration"] = round(time.monotonic() - started, 3)
+            return stats
+
+        known = dict(conn.execute("SELECT pkgname, record_hash FROM packages"))
+        with conn:
+            with open_summary(summary_path) as lines:
+                for record, record_hash in parse_summary(lines):
+                    pkgname = record.get("PKGNAME")
+                    if not pkgname:
+                        continue
+                    stats["packages"] += 1
+                    previous = known.pop(pkgname, None)
+                    if previous == record_hash:
+                        stats["unchanged"] += 1
+                        continue
+                    stats["updated" if previous is not None else "added"] += 1
+                    if previous is not None:
+                        self._delete(conn, pkgname)
+                    conn.execute("INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 self._row(record, record_hash))
+                    conn.executemany("INSERT INTO categories VALUES (?, ?)",
+                                     [(pkgname, category) for category in record.get("CATEGORIES", "").split()])
+                    conn.executemany("INSERT INTO depends VALUES (?, ?, ?, ?)", [
+                        (pkgname, pattern, base, int(is_glob))
+                        for pattern in record.get("DEPENDS", [])
+                        for base, is_glob in depends_bases(pattern)
+                    ])
+            for pkgname in known:
+                self._delete(conn, pkgname)
+            stats["removed"] = len(known)
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+                ("digest", digest), ("repo_url", self.repo_url), ("updated_at", str(int(time.time()))),
+            ])
+        stats["duration"] = round(time.monotonic() - started, 3)
+        logger.info(
+            f"pkg_summary de {self.repo_url} : {stats['added']} ajoutés, {stats['updated']} modifiés, "
+            f"{stats['removed']} retirés en {stats['duration']} s"
+        )
+        return stats
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, pkgname: str):
+        for table in ("packages", "categories", "depends"):
+            conn.execute(f"DELETE FROM {table} WHERE pkgname = ?", (pkgname,))
+
+    def refresh(self, force: bool = False, cache: Optional[HttpCache] = None) -> Dict[str, Any]:
+        """
+        Télécharge (via le cache HTTP) puis ingère le pkg_summary du dépôt.
+
+        Une réponse revalidée par 304 a la même empreinte que la précédente
+        ingestion : le rafraîchissement s'arrête alors sans relire le fichier.
+
+        Args:
+            force (bool): Revalider le fichier distant et le relire intégralement.
+            cache (Optional[HttpCache]): Cache HTTP (par défaut: cache partagé).
+
+        Raises:
+            NetworkError: Si aucune variante de pkg_summary n'est disponible.
+        """
+        cache = cache or HttpCache.shared()
+        mirrors = MirrorSet([Mirror(self.repo_url, ttl=default_ttl())])
+        errors = []
+        for filename in SUMMARY_FILES:
+            try:
+                response = cache.fetch(mirrors, filename, force=force)
+            except NetworkError as e:
+                errors.append(str(e))
+                continue
+            return self.ingest(str(response.path), force=force)
+        raise NetworkError(f"Aucun pkg_summary disponible sur {self.repo_url} : {'; '.join(errors)}")
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        del record["record_hash"]
+        record["categories"] = json.loads(record["categories"] or "[]")
+        record["depends"] = json.loads(record["depends"] or "[]")
+        return record
+
+    def _select(self, where: str, params: tuple) -> Iterator[Dict[str, Any]]:
+        for row in self._connect().execute(f"SELECT * FROM packages WHERE {where} ORDER BY pkgname", params):
+            yield self._to_dict(row)
+
+    def get(self, pkgname: str) -> Optional[Dict[str, Any]]:
+        """
+        Entrée d'un paquet, par nom complet (nom-version) ou nom de base ;
+        pour un nom de base, la version la plus récente selon dewey (1.10 après 1.9).
+        """
+        rows = self._connect().execute(
+            "SELECT * FROM packages WHERE pkgname = ? OR name = ?", (pkgname, pkgname)
+        ).fetchall()
+        if not rows:
+            return None
+        return self._to_dict(max(rows, key=lambda row: version_key(row["version"] or "")))
+
+    def iter_name(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Paquets dont le nom contient name (insensible à la casse)."""
+        return self._select("instr(lower(name), ?) > 0", (name.lower(),))
+
+    def iter_comment(self, text: str) -> Iterator[Dict[str, Any]]:
+        """Paquets dont le COMMENT contient tous les mots de text (insensible à la casse)."""
+        words = text.lower().split()
+        if not words:
+            return iter(())
+        return self._select(" AND ".join(["instr(lower(comment), ?) > 0"] * len(words)), tuple(words))
+
+    def iter_category(self, category: str) -> Iterator[Dict[str, Any]]:
+        """Paquets rattachés à une catégorie (CATEGORIES)."""
+        return self._select("pkgname IN (SELECT pkgname FROM categories WHERE category = ?)", (category,))
+
+    def iter_depends(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Paquets dont un DEPENDS vise le paquet name (nom de base)."""
+        # Sous-requête plutôt qu'un IN (?, ...) par paquet trouvé : pas de
+        # limite sur le nombre de paramètres SQLite
+        yield from self._select(
+            "pkgname IN (SELECT pkgname FROM depends WHERE base = ? "
+            "UNION SELECT pkgname FROM depends WHERE is_glob = 1 AND fnmatchcase(?, base))",
+            (name, name),
+        )
+
+    def search(self, query: str, field: str = "name") -> List[Dict[str, Any]]:
+        """
+        Recherche dans l'index selon field : "name", "comment", "category" ou "depends".
+        """
+        searches = {"name": self.iter_name, "comment": self.iter_comment,
+                    "category": self.iter_category, "depends": self.iter_depends}
+        if field not in searches:
+            raise ValueError(f"Champ de recherche inconnu : {field} (attendu : {', '.join(searches)})")
+        return list(searches[field](query))
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM packages").fetchone()[0]
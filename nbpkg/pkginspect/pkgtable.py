@@ -0,0 +1,166 @@
+from dataclasses import fields
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Union
+
+_SCALAR, _LIST, _DICT = 0, 1, 2
+# Champs propres à chaque paquet : convertis en tuples mais pas partagés
+# (les mettre en commun coûterait une entrée de table par valeur)
+UNIQUE_FIELDS = ("description", "files")
+
+
+class DetailsTable:
+    """
+    Résultats en colonnes (une liste par champ) pour les requêtes de masse.
+
+    Une colonne n'est créée qu'à la première valeur non nulle de son champ ;
+    les chaînes répétées (catégories, mainteneurs, licences, ...) et les listes
+    identiques sont partagées au sein de la table (sauf pour les champs de
+    unique, propres à chaque paquet). Les listes sont conservées
+    en tuples et les dictionnaires (build_info) en tuples de paires.
+
+    Chaque ligne est accessible par une vue (DetailsView) qui se lit comme un
+    PkgDetails, sans objet par paquet tant qu'elle n'est pas demandée.
+    """
+
+    def __init__(self, record_type, unique: Iterable[str] = UNIQUE_FIELDS):
+        self._type = record_type
+        self._unique = frozenset(unique)
+        self._fields = tuple(field.name for field in fields(record_type))
+        self._columns: Dict[str, List[Any]] = {}
+        self._kinds: Dict[str, int] = {}
+        self._pool: Dict[Any, Any] = {}
+        self._size = 0
+
+    @property
+    def field_names(self) -> tuple:
+        return self._fields
+
+    def _intern(self, value: Any, shared: bool = True) -> Any:
+        if isinstance(value, str):
+            return self._pool.setdefault(value, value) if shared else value
+        if isinstance(value, dict):
+            value = tuple((self._intern(key, shared), self._intern(item, shared)) for key, item in value.items())
+        elif isinstance(value, (list, tuple)):
+            value = tuple(self._intern(item, shared) for item in value)
+        else:
+            return value
+        if not shared:
+            return value
+        try:
+            return self._pool.setdefault(value, value)
+        except TypeError:
+            return value  # Élément non hachable : conservé tel quel
+
+    def _store(self, row: int, name: str, value: Any):
+        column = self._columns.get(name)
+        if column is None:
+            if value is None:
+                return
+            column = self._columns[name] = [None] * self._size
+            self._kinds[name] = _DICT if isinstance(value, dict) else _LIST if isinstance(value, list) else _SCALAR
+        value = self._intern(value, shared=name not in self._unique)
+        if row == len(column):
+            column.append(value)
+        else:
+            column[row] = value
+
+    def append(self, record: Union[Any, Dict[str, Any]]):
+        """
+        Ajoute une ligne.
+
+        Args:
+            record: PkgDetails (ou objet équivalent) ou dictionnaire de ses champs ;
+                    les champs absents valent None.
+        """
+        get = record.get if isinstance(record, dict) else lambda name: getattr(record, name, None)
+        row = self._size
+        for name in self._fields:
+            self._store(row, name, get(name))
+        self._size += 1
+
+    def extend(self, records: Iterable[Union[Any, Dict[str, Any]]]) -> "DetailsTable":
+        for record in records:
+            self.append(record)
+        return self
+
+    def value(self, row: int, name: str) -> Any:
+        """Valeur d'un champ pour une ligne, sous la forme d'un champ de PkgDetails."""
+        if name not in self._fields:
+            raise AttributeError(name)
+        column = self._columns.get(name)
+        value = column[row] if column is not None else None
+        if value is None:
+            return None
+        kind = self._kinds[name]
+        if kind == _LIST:
+            return list(value)
+        if kind == _DICT:
+            return dict(value)
+        return value
+
+    def set(self, row: int, name: str, value: Any):
+        if name not in self._fields:
+            raise AttributeError(name)
+        self._store(row, name, value)
+
+    def column(self, name: str) -> List[Any]:
+        """
+        Colonne brute d'un champ (sans copie) : chaînes partagées, tuples pour
+        les listes, tuples de paires pour les dictionnaires, None si absent.
+        """
+        if name not in self._fields:
+            raise KeyError(name)
+        return self._columns.get(name) or [None] * self._size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, row: int) -> "DetailsView":
+        if row < 0:
+            row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError(row)
+        return DetailsView(self, row)
+
+    def __iter__(self) -> Iterator["DetailsView"]:
+        for row in range(self._size):
+            yield DetailsView(self, row)
+
+    def to_details(self, row: int):
+        """Copie autonome d'une ligne (record_type, ex. PkgDetails)."""
+        return self._type(**{name: self.value(row, name) for name in self._fields})
+
+    def to_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Lignes sous forme de dictionnaires (export JSON), une à la fois."""
+        for row in range(self._size):
+            yield {name: self.value(row, name) for name in self._fields}
+
+
+class DetailsView:
+    """Ligne d'une DetailsTable, lue et modifiée comme un PkgDetails."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: DetailsTable, row: int):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_row", row)
+
+    def __getattr__(self, name: str) -> Any:
+        return self._table.value(self._row, name)
+
+    def __setattr__(self, name: str, value: Any):
+        self._table.set(self._row, name, value)
+
+    def to_details(self):
+        return self._table.to_details(self._row)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self._table.value(self._row, name) for name in self._table.field_names}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DetailsView):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={value!r}" for name, value in self.to_dict().items() if value is not None)
+        return f"DetailsView({values})"
@@ -0,0 +1,135 @@
+import io
+from typing import Optional, Dict, Any
+import requests
+from nbpkg.common.logger import logger
+from nbpkg.common.nberrors import NetworkError
+from nbpkg.pkginspect.binpkg import read_metadata, package_record
+from nbpkg.pkginspect.fetch import Fetcher
+
+# Première requête de plage : les métadonnées tiennent en général dans 64 ko
+RANGE_CHUNK = 64 * 1024
+# Taille maximale d'une requête (doublée à chaque plage, pour un +CONTENTS volumineux)
+MAX_RANGE_CHUNK = 4 * 1024 * 1024
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Lecture séquentielle d'un fichier distant par requêtes HTTP Range.
+
+    Si le serveur ignore l'en-tête Range (réponse 200), la réponse est lue en
+    flux ; close() l'interrompt, le reste du fichier n'est pas téléchargé.
+    """
+
+    def __init__(self, url: str, fetcher: Optional[Fetcher] = None, chunk_size: int = RANGE_CHUNK):
+        self.url = url
+        self.fetcher = fetcher or Fetcher.shared()
+        self.chunk_size = chunk_size
+        self.ranged: Optional[bool] = None
+        self.bytes_read = 0
+        self.requests = 0
+        self._position = 0
+        self._pending = b""
+        self._response: Optional[requests.Response] = None
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def _get(self, headers: Dict[str, str]) -> requests.Response:
+        self.requests += 1
+        try:
+            return self.fetcher.session(self.url).get(self.url, headers=headers, stream=True,
+                                                      timeout=self.fetcher.timeout)
+        except requests.RequestException as e:
+            raise NetworkError(f"Impossible de lire {self.url} : {str(e)}")
+
+    def _next_range(self):
+        end = self._position + self.chunk_size - 1
+        response = self._get({"Range": f"bytes={self._position}-{end}"})
+        if response.status_code == 206:
+            content_range = response.headers.get("Content-Range", "")
+            start = content_range[6:].split("-", 1)[0] if content_range.startswith("bytes ") else ""
+            if not start.isdigit() or int(start) != self._position:
+                response.close()
+                raise NetworkError(f"Impossible de lire {self.url} : plage inattendue "
+                                   f"({content_range or 'sans Content-Range'}, attendu {self._position}-)")
+            self.ranged = True
+            # Octets bruts, comme en lecture en flux : les positions sont celles de l'archive
+            self._pending = response.raw.read(decode_content=False)
+            response.close()
+            self.chunk_size = min(self.chunk_size * 2, MAX_RANGE_CHUNK)
+            if not self._pending:
+                self._eof = True
+        elif response.status_code == 416:
+            response.close()
+            self._eof = True
+        elif response.status_code == 200:
+            # Plages non prises en charge : lecture en flux, abandonnée à close()
+            if self.ranged is None:
+                logger.info(f"Requêtes Range non prises en charge par {self.url} : lecture en flux")
+            self.ranged = False
+            self._response = response
+            skipped = 0
+            while skipped < self._position:
+                data = response.raw.read(min(self._position - skipped, 1024 * 1024), decode_content=False)
+                if not data:
+                    break
+                skipped += len(data)
+                self.bytes_read += len(data)
+        else:
+            response.close()
+            raise NetworkError(f"Impossible de lire {self.url} : HTTP {response.status_code}")
+
+    def readinto(self, buffer) -> int:
+        if not self._pending and not self._eof:
+            if self._response is not None:
+                data = self._response.raw.read(len(buffer), decode_content=False)
+                buffer[:len(data)] = data
+                self.bytes_read += len(data)
+                self._position += len(data)
+                return len(data)
+            self._next_range()
+            if self._response is not None:
+                return self.readinto(buffer)
+        if not self._pending:
+            return 0
+        data, self._pending = self._pending[:len(buffer)], self._pending[len(buffer):]
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+        super().close()
+
+
+def inspect_remote(url: str, fetcher: Optional[Fetcher] = None) -> Dict[str, Any]:
+    """
+    Extrait les métadonnées d'un paquet binaire distant sans le télécharger.
+
+    Seul le début de l'archive est récupéré, par requêtes Range ou, à défaut,
+    par un téléchargement en flux interrompu après les membres de tête.
+
+    Args:
+        url (str): URL du paquet (http ou https).
+        fetcher (Optional[Fetcher]): Couche HTTP (par défaut: instance partagée).
+
+    Returns:
+        Dict[str, Any]: Champs de PkgDetails, plus "bytes_read" (octets
+                        récupérés) et "ranged" (requêtes Range utilisées).
+
+    Raises:
+        NetworkError: Si le paquet ne peut pas être lu.
+    """
+    reader = RangeReader(url, fetcher=fetcher)
+    try:
+        members = read_metadata(io.BufferedReader(reader, buffer_size=RANGE_CHUNK))
+    finally:
+        reader.close()
+    record = package_record(members, filename=url.rsplit("/", 1)[-1])
+    record["bytes_read"] = reader.bytes_read
+    record["ranged"] = reader.ranged
+    return record
@@ -0,0 +1,68 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Any
+from nbpkg.config.config import ConfigManager
+
+# Nombre maximal de tâches en vol par worker, pour borner la mémoire
+_WINDOW_PER_WORKER = 4
+
+
+def default_jobs() -> int:
+    """Nombre de workers configuré (NBQUERY_JOBS), par défaut le nombre de CPU."""
+    value = ConfigManager().get("NBQUERY_JOBS")
+    try:
+        jobs = int(value) if value else 0
+    except ValueError:
+        jobs = 0
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def _call(func: Callable, item: Any) -> Tuple[Any, Optional[str]]:
+    # Fonction de module pour rester sérialisable par ProcessPoolExecutor
+    try:
+        return func(item), None
+    except Exception as e:
+        return None, str(e)
+
+
+def scan(func: Callable, items: Iterable, jobs: Optional[int] = None,
+         processes: bool = False) -> Iterator[Tuple[Any, Any, Optional[str]]]:
+    """
+    Applique func à chaque élément sur un pool de workers.
+
+    Les résultats sont produits dans l'ordre des éléments ; une exception
+    levée pour un élément est rapportée avec lui sans interrompre le parcours.
+
+    Args:
+        func (Callable): Fonction d'extraction (ex. extract_package).
+        items (Iterable): Éléments à traiter (ex. répertoires de paquets).
+        jobs (Optional[int]): Nombre de workers (par défaut: NBQUERY_JOBS).
+        processes (bool): Utiliser des processus plutôt que des threads.
+
+    Yields:
+        Tuple[Any, Any, Optional[str]]: (élément, résultat, message d'erreur).
+    """
+    jobs = jobs or default_jobs()
+    if jobs == 1:
+        for item in items:
+            result, error = _call(func, item)
+            yield item, result, error
+        return
+
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=jobs) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append((item, executor.submit(_call, func, item)))
+                if len(pending) >= jobs * _WINDOW_PER_WORKER:
+                    item, future = pending.popleft()
+                    yield (item, *future.result())
+            while pending:
+                item, future = pending.popleft()
+                yield (item, *future.result())
+        finally:
+            # Consommateur arrêté avant la fin : abandonner les tâches non démarrées
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,43 @@
+import os
+import sys
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO
+
+
+def format_match(item: Dict[str, Any]) -> str:
+    """Ligne de sortie d'un résultat de recherche, au format de search_by_name."""
+    return f"{item['path']} (Version: {item.get('version')}, Commentaire: {item.get('comment')})"
+
+
+def stream_results(results: Iterable[Dict[str, Any]], out: Optional[TextIO] = None,
+                   formatter: Callable[[Dict[str, Any]], str] = format_match) -> int:
+    """
+    Affiche les résultats au fur et à mesure qu'ils sont produits.
+
+    Chaque ligne est vidée immédiatement. Si le lecteur ferme le tube
+    (ex. "nbquery search ... | head"), le générateur est fermé, ce qui
+    interrompt le parcours de l'arbre en cours.
+
+    Args:
+        results (Iterable[Dict[str, Any]]): Générateur de résultats (ex. iter_search_by_name).
+        out (Optional[TextIO]): Flux de sortie (par défaut: sys.stdout).
+        formatter (Callable): Mise en forme d'un résultat.
+
+    Returns:
+        int: Nombre de résultats affichés.
+    """
+    out = out or sys.stdout
+    count = 0
+    try:
+        for item in results:
+            out.write(formatter(item) + "\n")
+            out.flush()
+            count += 1
+    except BrokenPipeError:
+        if out is sys.stdout:
+            # Éviter une seconde erreur lors du vidage de stdout à la sortie
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        close = getattr(results, "close", None)
+        if close is not None:
+            close()
+    return count
@@ -0,0 +1,122 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Optional, List, Dict, Tuple, Iterable
+
+# Poids des champs dans la fréquence d'un terme : nom > COMMENT > DESCR
+FIELD_WEIGHTS = {"name": 3, "comment": 2, "descr": 1}
+# Paramètres BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Poids d'un terme trouvé par extension de préfixe ("postgres" -> "postgresql")
+PREFIX_WEIGHT = 0.5
+# Longueur minimale d'un terme de requête pour l'extension implicite de préfixe
+MIN_PREFIX = 3
+
+_WORD = re.compile(r"[a-z0-9]+")
+_ALPHA = re.compile(r"[a-z]{2,}")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can for from has have in into is it its of on or that the this
+to was which will with you your it's not but all also more than other such these they
+""".split())
+
+
+def normalize(word: str) -> str:
+    """Réduit un mot à une forme commune (pluriels anglais courants)."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Découpe un texte en termes indexés.
+
+    Le texte est mis en minuscules et découpé sur les caractères non
+    alphanumériques ; les mots vides sont écartés. Un mot mêlant lettres et
+    chiffres ("python311", "postgresql16") produit aussi sa partie alphabétique.
+    """
+    terms = []
+    for word in _WORD.findall((text or "").lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        terms.append(normalize(word))
+        if not word.isalpha() and not word.isdigit():
+            terms.extend(normalize(part) for part in _ALPHA.findall(word))
+    return terms
+
+
+def document_terms(name: Optional[str], comment: Optional[str], descr: Optional[str]) -> Tuple[Dict[str, int], int]:
+    """
+    Termes pondérés d'un paquet.
+
+    Returns:
+        Tuple[Dict[str, int], int]: (fréquence pondérée par terme, longueur pondérée).
+    """
+    frequencies: Counter = Counter()
+    for field, text in (("name", (name or "").replace("-", " ")), ("comment", comment), ("descr", descr)):
+        weight = FIELD_WEIGHTS[field]
+        for term in tokenize(text):
+            frequencies[term] += weight
+    return dict(frequencies), sum(frequencies.values())
+
+
+def parse_query(query: str) -> List[Tuple[str, bool]]:
+    """
+    Analyse une requête : termes séparés par des espaces, "terme*" pour un préfixe.
+
+    Returns:
+        List[Tuple[str, bool]]: (terme normalisé, préfixe explicite), sans doublons.
+    """
+    parsed: List[Tuple[str, bool]] = []
+    for word in query.lower().split():
+        prefix = word.endswith("*")
+        tokens = _WORD.findall(word)
+        if not tokens:
+            continue
+        for i, token in enumerate(tokens):
+            explicit = prefix and i == len(tokens) - 1
+            term = token if explicit else normalize(token)
+            if (term, explicit) not in parsed and (explicit or term not in STOPWORDS):
+                parsed.append((term, explicit))
+    return parsed
+
+
+def rank(postings_by_term: Iterable[List[Tuple[str, int, float]]], doclens: Dict[str, int],
+         total: int, avgdl: float, limit: Optional[int] = None) -> List[Tuple[str, int, float]]:
+    """
+    Classe les documents trouvés (BM25).
+
+    Un document qui couvre plus de termes de la requête passe devant ; à
+    couverture égale, le score BM25 cumulé départage.
+
+    Args:
+        postings_by_term: Pour chaque terme de requête, ses occurrences
+                          (chemin, tf, poids de l'extension).
+        doclens: Longueur pondérée de chaque document trouvé.
+        total: Nombre de documents indexés.
+        avgdl: Longueur moyenne des documents.
+        limit: Nombre de documents à retenir (None : tous).
+
+    Returns:
+        List[Tuple[str, int, float]]: (chemin, termes couverts, score), du meilleur au moins bon.
+    """
+    avgdl = avgdl or 1.0
+    norms = {path: BM25_K1 * (1 - BM25_B + BM25_B * doclen / avgdl) for path, doclen in doclens.items()}
+    scores: Dict[str, float] = {}
+    covered: Dict[str, int] = {}
+    for postings in postings_by_term:
+        paths = {path for path, _, _ in postings}
+        df = len(paths)
+        idf = math.log(1 + (total - df + 0.5) / (df + 0.5)) * (BM25_K1 + 1)
+        for path, tf, weight in postings:
+            scores[path] = scores.get(path, 0.0) + weight * idf * tf / (tf + norms[path])
+        for path in paths:
+            covered[path] = covered.get(path, 0) + 1
+    key = lambda path: (-covered[path], -scores[path], path)
+    best = sorted(scores, key=key) if limit is None else heapq.nsmallest(limit, scores, key=key)
+    return [(path, covered[path], scores[path]) for path in best]
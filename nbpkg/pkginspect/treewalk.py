@@ -0,0 +1,70 @@
+import os
+from typing import Iterator, Iterable, Optional, Tuple
+
+# Répertoires de premier niveau de pkgsrc qui ne sont pas des catégories
+SKIP_DIRS = frozenset({"CVS", "doc", "mk", "distfiles", "packages", "bootstrap", "licenses"})
+
+
+def iter_categories(base: str, categories: Optional[Iterable[str]] = None) -> Iterator[os.DirEntry]:
+    """
+    Itère sur les répertoires de catégories d'une racine pkgsrc.
+
+    Le type de chaque entrée est lu depuis le d_type renvoyé par readdir(),
+    sans stat() supplémentaire (sauf liens symboliques ou systèmes de
+    fichiers qui ne le fournissent pas).
+
+    Args:
+        base (str): Racine pkgsrc (ex. /usr/pkgsrc).
+        categories (Optional[Iterable[str]]): Restreindre à ces catégories.
+    """
+    wanted = set(categories) if categories else None
+    try:
+        with os.scandir(base) as entries:
+            for entry in entries:
+                name = entry.name
+                if name in SKIP_DIRS or name.startswith("."):
+                    continue
+                if wanted is not None and name not in wanted:
+                    continue
+                if entry.is_dir():
+                    yield entry
+    except (FileNotFoundError, NotADirectoryError):
+        return
+
+
+def iter_packages(category_path: str) -> Iterator[os.DirEntry]:
+    """Itère sur les répertoires de paquets d'une catégorie."""
+    try:
+        with os.scandir(category_path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name == "CVS" or name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    yield entry
+    except (FileNotFoundError, NotADirectoryError):
+        return
+
+
+def walk_tree(base: str, categories: Optional[Iterable[str]] = None,
+              package: Optional[str] = None) -> Iterator[Tuple[str, str, str]]:
+    """
+    Parcours paresseux d'une arborescence pkgsrc en une seule passe.
+
+    Args:
+        base (str): Racine pkgsrc (ex. /usr/pkgsrc).
+        categories (Optional[Iterable[str]]): Restreindre à ces catégories.
+        package (Optional[str]): Ne produire que ce paquet ; la catégorie n'est
+                                 alors pas listée, un seul stat() par catégorie.
+
+    Yields:
+        Tuple[str, str, str]: (catégorie, paquet, chemin du paquet).
+    """
+    for category in iter_categories(base, categories):
+        if package is not None:
+            path = os.path.join(category.path, package)
+            if os.path.isdir(path):
+                yield category.name, package, path
+            continue
+        for entry in iter_packages(category.path):
+            yield category.name, entry.name, entry.path
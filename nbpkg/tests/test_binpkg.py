@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+from nbpkg.pkginspect import binpkg
+from nbpkg.pkginspect.binpkg import find_packages, inspect_package, read_metadata
+from nbpkg.pkginspect.nbpkgdescr import PkgQuery
+
+CONTENTS = (
+    "@comment $NetBSD$\n@name zstd-1.5.6\n@pkgdep xxhash>=0.8\n@blddep gmake-4.4.1\n"
+    "@cwd /usr/pkg\n@ignore\n+BUILD_INFO\nbin/zstd\nman/man1/zstd.1\n"
+)
+BUILD_INFO = (
+    "CATEGORIES=archivers\nHOMEPAGE=https://facebook.github.io/zstd/\n"
+    "LICENSE=modified-bsd\nMAINTAINER=pkgsrc-users@NetBSD.org\nPKGPATH=archivers/zstd\n"
+)
+METADATA = {
+    "+CONTENTS": CONTENTS,
+    "+COMMENT": "Fast real-time compression algorithm\n",
+    "+DESC": "Zstandard is a real-time compression algorithm.\n",
+    "+BUILD_INFO": BUILD_INFO,
+    "+SIZE_PKG": "3145728\n",
+}
+PAYLOAD_SIZE = 3 * 1024 * 1024
+
+
+def build_package(path, compression):
+    """Paquet minimal : métadonnées puis un contenu incompressible de 3 Mo."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        members = list(METADATA.items()) + [("bin/zstd", os.urandom(PAYLOAD_SIZE))]
+        for name, data in members:
+            data = data.encode() if isinstance(data, str) else data
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    Path(path).write_bytes(compression(buffer.getvalue()))
+
+
+class TestBinPkg(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_package(self, suffix, compression):
+        path = self.base / f"zstd-1.5.6.{suffix}"
+        build_package(path, compression)
+        record = inspect_package(str(path))
+        self.assertEqual((record["pkgname"], record["version"]), ("zstd", "1.5.6"))
+        self.assertEqual(record["comment"], "Fast real-time compression algorithm")
+        self.assertEqual(record["categories"], ["archivers"])
+        self.assertEqual(record["origin"], "archivers/zstd")
+        self.assertEqual(record["size"], "3145728")
+        self.assertEqual(record["files"], ["/usr/pkg/bin/zstd", "/usr/pkg/man/man1/zstd.1"])
+        self.assertEqual(record["runtime_deps"], ["xxhash>=0.8"])
+        self.assertEqual(record["build_deps"], ["gmake-4.4.1"])
+        self.assertTrue(record["has_man_pages"])
+        # Le contenu installé n'est pas décompressé (bzip2 : un bloc de 900 ko au plus)
+        self.assertLess(record["bytes_read"], path.stat().st_size // 2)
+
+    def test_gzip(self):
+        import gzip
+        self.check_package("tgz", gzip.compress)
+
+    def test_bzip2(self):
+        import bz2
+        self.check_package("tbz", bz2.compress)
+
+    def test_xz(self):
+        import lzma
+        self.check_package("txz", lzma.compress)
+
+    @unittest.skipUnless(binpkg._zstd is not None, "module zstd absent")
+    def test_zstd(self):
+        self.check_package("tzst", binpkg._zstd.compress)
+
+    def test_signed_package(self):
+        import gzip
+        tarball = self.base / "zstd-1.5.6.tgz"
+        build_package(tarball, gzip.compress)
+        data = tarball.read_bytes()
+        signed = io.BytesIO()
+        signed.write(b"!<arch>\n")
+        for name, content in (("+PKG_HASH", b"pkgsrc signature\n"), ("zstd-1.5.6.tgz", data)):
+            signed.write(f"{name + '/':<16}{0:<12}{0:<6}{0:<6}{'644':<8}{len(content):<10}`\n".encode())
+            signed.write(content + (b"\n" if len(content) & 1 else b""))
+        signed.seek(0)
+        self.assertEqual(set(read_metadata(signed)), set(METADATA))
+
+    def test_pkgquery(self):
+        import gzip
+        path = self.base / "zstd-1.5.6.tgz"
+        build_package(path, gzip.compress)
+        details = PkgQuery.inspect_binary(str(path))
+        self.assertEqual(details.homepage, "https://facebook.github.io/zstd/")
+        query = PkgQuery("zstd", binary=True, binary_file=str(path))
+        self.assertEqual(query.details.license, "modified-bsd")
+        self.assertEqual(query.show()[0]["runtime_deps"], ["xxhash>=0.8"])
+
+    def test_find_packages(self):
+        (self.base / "All").mkdir()
+        for name in ("a-1.0.tgz", "b-2.0.txz", "pkg_summary.gz"):
+            (self.base / "All" / name).write_bytes(b"")
+        found = find_packages([str(self.base / "All"), str(self.base / "All" / "*.tgz")])
+        self.assertEqual([Path(path).name for path in found], ["a-1.0.tgz", "b-2.0.txz"])
+
+    def test_inspect_batch(self):
+        import gzip
+        import lzma
+        build_package(self.base / "zstd-1.5.6.tgz", gzip.compress)
+        build_package(self.base / "zstd-1.5.6.txz", lzma.compress)
+        (self.base / "broken-1.0.tgz").write_bytes(b"not a package")
+        output = self.base / "inspect.jsonl"
+        stats = PkgQuery.inspect_batch([str(self.base)], str(output), jobs=2)
+        self.assertEqual((stats["packages"], stats["errors"]), (2, 1))
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        self.assertEqual([Path(record["path"]).name for record in records],
+                         ["broken-1.0.tgz", "zstd-1.5.6.tgz", "zstd-1.5.6.txz"])
+        self.assertIsNotNone(records[0]["error"])
+        self.assertEqual(records[2]["origin"], "archivers/zstd")
+        details = list(PkgQuery.iter_inspect([str(self.base / "zstd-*")], jobs=1))
+        self.assertEqual([pkg.version for pkg in details], ["1.5.6", "1.5.6"])
+
+
+if __name__ == "__main__":
+    unittest.main()
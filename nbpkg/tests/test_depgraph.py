@@ -0,0 +1,102 @@
+import unittest
+import tempfile
+from pathlib import Path
+from nbpkg.pkginspect.depgraph import DepGraph, expand_alternatives, pattern_base
+from nbpkg.pkginspect.mkdeps import parse_depends
+
+
+class FakeSnapshot:
+    def __init__(self, packages):
+        self._packages = packages
+
+    def packages(self):
+        for pkgname, depends in self._packages:
+            name, version = pkgname.rsplit("-", 1)
+            yield {"name": name, "version": version, "pkgname": pkgname, "depends": depends}
+
+
+class TestDepGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = DepGraph.from_snapshot(FakeSnapshot([
+            ("libiconv-1.17", []),
+            ("gettext-lib-0.22.5", ["libiconv>=1.9"]),
+            ("perl-5.40.1", ["{gettext-lib,gettext-lite}>=0.14"]),
+            ("p5-Locale-gettext-1.07nb9", ["perl>=5.40.0<5.42", "gettext-lib-[0-9]*"]),
+            ("git-base-2.47.1", ["p5-Locale-gettext>=1.0", "curl>=7.0"]),
+        ]))
+
+    def test_patterns(self):
+        self.assertEqual(expand_alternatives("{a,b}-{1,2}"), ["a-1", "a-2", "b-1", "b-2"])
+        self.assertEqual(pattern_base("perl>=5.40.0<5.42"), ("perl", False))
+        self.assertEqual(pattern_base("gettext-lib-[0-9]*"), ("gettext-lib-[0-9]*", True))
+        self.assertEqual(pattern_base("libiconv-1.17"), ("libiconv", False))
+
+    def test_direct_and_transitive(self):
+        self.assertEqual(self.graph.depends("perl"), ["gettext-lib-0.22.5"])
+        self.assertEqual(self.graph.revdepends("libiconv"), ["gettext-lib-0.22.5"])
+        self.assertEqual(self.graph.revdepends("libiconv-1.17", transitive=True),
+                         ["gettext-lib-0.22.5", "git-base-2.47.1", "p5-Locale-gettext-1.07nb9", "perl-5.40.1"])
+        self.assertEqual(self.graph.depends("git-base", transitive=True),
+                         ["gettext-lib-0.22.5", "libiconv-1.17", "p5-Locale-gettext-1.07nb9", "perl-5.40.1"])
+        self.assertEqual(self.graph.edge_count, 5)
+
+    def test_batch(self):
+        batch = self.graph.revdepends_many(["perl", "gettext-lib"], transitive=False)
+        self.assertEqual(batch["perl"], ["p5-Locale-gettext-1.07nb9"])
+        self.assertEqual(batch["gettext-lib"], ["p5-Locale-gettext-1.07nb9", "perl-5.40.1"])
+        self.assertEqual(self.graph.impact(["perl", "gettext-lib"]), ["git-base-2.47.1", "p5-Locale-gettext-1.07nb9"])
+        with self.assertRaises(KeyError):
+            self.graph.depends("curl")
+
+
+MAKEFILES = {
+    "converters/libiconv": "DISTNAME= libiconv-1.17\n",
+    "devel/gettext-lib": "DISTNAME= gettext-0.22.5\n.include \"../../converters/libiconv/buildlink3.mk\"\n",
+    "devel/gmake": "TOOL_DEPENDS+=\tgettext-lib>=0.14:../../devel/gettext-lib\n",
+    "lang/perl5": ".include \"Makefile.common\"\n.include \"../../mk/bsd.pkg.mk\"\n",
+    "misc/cycle-a": "DEPENDS+= cycle-b-[0-9]*:../../misc/cycle-b\n",
+    "misc/cycle-b": "DEPENDS+= cycle-a-[0-9]*:../../misc/cycle-a\n",
+    "misc/after-cycle": "DEPENDS+= cycle-a-[0-9]*:../../misc/cycle-a\n",
+}
+
+
+class TestSourceGraph(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = self.tmp.name
+        for pkgpath, content in MAKEFILES.items():
+            (Path(self.base) / pkgpath).mkdir(parents=True)
+            (Path(self.base) / pkgpath / "Makefile").write_text(content)
+        (Path(self.base) / "lang/perl5/Makefile.common").write_text(
+            "BUILD_DEPENDS+=\tgmake>=3.81:../../devel/gmake \\\n"
+            "\t\tgettext-lib>=0.14:../../devel/gettext-lib\n"
+            "DEPENDS+= ${PYPKGPREFIX}-foo>=1:../../devel/py-foo\n"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_depends(self):
+        depends = parse_depends(self.base, "lang/perl5")
+        self.assertEqual(depends["BUILD_DEPENDS"], ["devel/gettext-lib", "devel/gmake"])
+        self.assertEqual(depends["DEPENDS"], ["devel/py-foo"])
+        self.assertEqual(parse_depends(self.base, "devel/gettext-lib")["DEPENDS"], ["converters/libiconv"])
+        self.assertEqual(parse_depends(self.base, "devel/gmake")["TOOL_DEPENDS"], ["devel/gettext-lib"])
+
+    def test_build_levels_and_cycles(self):
+        graph = DepGraph.from_source_tree(self.base, jobs=2)
+        levels, blocked = graph.build_levels()
+        self.assertEqual(levels[0], ["converters/libiconv", "devel/py-foo"])
+        self.assertEqual(levels[1:], [["devel/gettext-lib"], ["devel/gmake"], ["lang/perl5"]])
+        self.assertEqual(blocked, ["misc/after-cycle", "misc/cycle-a", "misc/cycle-b"])
+        self.assertEqual(graph.cycles(), [["misc/cycle-a", "misc/cycle-b"]])
+
+    def test_subset_closure(self):
+        graph = DepGraph.from_source_tree(self.base, packages=["devel/gmake"], kinds=["TOOL_DEPENDS", "DEPENDS"])
+        self.assertEqual(graph.labels, ["converters/libiconv", "devel/gettext-lib", "devel/gmake"])
+        self.assertEqual(graph.depends("devel/gmake", transitive=True), ["converters/libiconv", "devel/gettext-lib"])
+        self.assertEqual(graph.build_order(), ["converters/libiconv", "devel/gettext-lib", "devel/gmake"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import random
+import unittest
+from nbpkg.pkginspect.dewey import dewey_cmp, dewey_components, compare_versions, version_key
+
+
+def reference_cmp(version1, version2):
+    # vtest() de pkg_install : composantes complétées par des zéros, puis nbN
+    (v1, nb1), (v2, nb2) = dewey_components(version1), dewey_components(version2)
+    for i in range(max(len(v1), len(v2))):
+        a = v1[i] if i < len(v1) else 0
+        b = v2[i] if i < len(v2) else 0
+        if a != b:
+            return (a > b) - (a < b)
+    return (nb1 > nb2) - (nb1 < nb2)
+
+
+class TestDewey(unittest.TestCase):
+    def test_components(self):
+        self.assertEqual(dewey_components("1.2"), ([1, 0, 2], 0))
+        self.assertEqual(dewey_components("2.40nb2"), ([2, 0, 40], 2))
+        self.assertEqual(dewey_components("1.0rc1"), ([1, 0, 0, -1, 1], 0))
+        self.assertEqual(dewey_components("1.0a"), ([1, 0, 0, 0, 1], 0))
+
+    def test_ordering(self):
+        ordered = ["1.0alpha1", "1.0beta1", "1.0beta2", "1.0rc1", "1.0", "1.0nb1", "1.0nb2",
+                   "1.0.1", "1.0.2pre1", "1.0.2", "1.9", "1.10", "2.0alpha", "2.0"]
+        for lower, higher in zip(ordered, ordered[1:]):
+            self.assertEqual(dewey_cmp(lower, higher), -1, (lower, higher))
+            self.assertEqual(dewey_cmp(higher, lower), 1, (higher, lower))
+        self.assertEqual(sorted(reversed(ordered), key=version_key), ordered)
+
+    def test_equivalences(self):
+        for version1, version2 in [("1.2", "1.2.0"), ("1.0pl1", "1.0.1"), ("1.0a", "1.0.1"),
+                                   ("1.0_1", "1.0.1"), ("1.0RC1", "1.0rc1"), ("1.0pre1", "1.0rc1")]:
+            self.assertEqual(dewey_cmp(version1, version2), 0, (version1, version2))
+            self.assertEqual(version_key(version1), version_key(version2))
+
+    def test_matches_reference(self):
+        rng = random.Random(17)
+        parts = ["0", "1", "2", "10", ".", ".", "alpha", "beta", "rc", "pl", "_", "a", "z", "nb1", "nb3"]
+        versions = ["".join(rng.choice(parts) for _ in range(rng.randint(1, 7))) for _ in range(400)]
+        pairs = [(rng.choice(versions), rng.choice(versions)) for _ in range(4000)]
+        self.assertEqual(compare_versions(pairs), [reference_cmp(a, b) for a, b in pairs])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import hashlib
+import unittest
+import tempfile
+from pathlib import Path
+import os
+from unittest import mock
+from nbpkg.pkginspect.digestcache import DigestCache
+from nbpkg.pkginspect.distinfo import parse_distinfo, digest_file, verify_distfile, verify_tree
+from nbpkg.pkginspect.distlint import DistLint
+
+DATA = b"pkgsrc distfile\n" * 1000
+
+
+def distinfo_for(filename, data, size=None):
+    return (
+        "$NetBSD$\n\n"
+        f"BLAKE2s ({filename}) = {hashlib.blake2s(data).hexdigest()}\n"
+        f"SHA512 ({filename}) = {hashlib.sha512(data).hexdigest()}\n"
+        f"Size ({filename}) = {len(data) if size is None else size} bytes\n"
+        "SHA1 (patch-Makefile) = 0123456789abcdef0123456789abcdef01234567\n"
+    )
+
+
+class TestDistinfo(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.distdir = self.base / "distfiles"
+        (self.distdir / "six").mkdir(parents=True)
+        (self.distdir / "six" / "six-1.16.0.tar.gz").write_bytes(DATA)
+        (self.distdir / "bad-1.0.tar.gz").write_bytes(DATA[:-1] + b"X")
+        packages = {
+            "lang/py-six": distinfo_for("six/six-1.16.0.tar.gz", DATA),
+            "devel/bad": distinfo_for("bad-1.0.tar.gz", DATA),
+            "devel/short": distinfo_for("bad-1.0.tar.gz", DATA, size=10),
+            "devel/missing": distinfo_for("missing-2.0.tar.xz", DATA),
+            "devel/shared": distinfo_for("six/six-1.16.0.tar.gz", DATA),
+        }
+        for pkgpath, content in packages.items():
+            (self.base / pkgpath).mkdir(parents=True)
+            (self.base / pkgpath / "distinfo").write_text(content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_distinfo_skips_patches(self):
+        entries = parse_distinfo(self.base / "lang/py-six/distinfo")
+        self.assertEqual(list(entries), ["six/six-1.16.0.tar.gz"])
+        self.assertEqual(sorted(entries["six/six-1.16.0.tar.gz"]), ["BLAKE2s", "SHA512", "Size"])
+
+    def test_verify_distfile(self):
+        entries = parse_distinfo(self.base / "lang/py-six/distinfo")
+        result = verify_distfile(self.distdir / "six/six-1.16.0.tar.gz", entries["six/six-1.16.0.tar.gz"])
+        self.assertEqual(result["status"], "ok")
+        self.assertEqual(sorted(result["algorithms"]), ["BLAKE2s", "SHA512", "Size"])
+        entries = parse_distinfo(self.base / "devel/bad/distinfo")
+        result = verify_distfile(self.distdir / "bad-1.0.tar.gz", entries["bad-1.0.tar.gz"])
+        self.assertEqual(result["status"], "checksum")
+        self.assertIn("BLAKE2s", result["message"])
+
+    def test_verify_tree(self):
+        results = sorted((r["file"], r["status"]) for r in verify_tree(str(self.base), str(self.distdir), jobs=3))
+        self.assertEqual(results, [
+            ("bad-1.0.tar.gz", "checksum"),
+            ("bad-1.0.tar.gz", "size"),
+            ("missing-2.0.tar.xz", "missing"),
+            ("six/six-1.16.0.tar.gz", "ok"),
+        ])
+
+    def test_distlint(self):
+        (self.distdir / "six" / "six-1.15.0.tar.gz").write_bytes(b"old")
+        (self.distdir / "orphan-0.1.tar.bz2").write_bytes(DATA)
+        lint = DistLint(str(self.base), str(self.distdir), jobs=2)
+        issues = sorted((r["file"], r["status"]) for r in lint.run())
+        self.assertEqual(issues, [
+            ("bad-1.0.tar.gz", "checksum"),
+            ("bad-1.0.tar.gz", "size"),
+            ("missing-2.0.tar.xz", "missing"),
+            ("orphan-0.1.tar.bz2", "orphan"),
+            ("six/six-1.15.0.tar.gz", "orphan"),
+        ])
+        self.assertEqual(lint.stats["entries"], 5)
+        self.assertEqual(lint.stats["checked"], 4)
+        self.assertEqual(lint.stats["reclaimable_bytes"], len(DATA) + 3)
+
+        lint = DistLint(str(self.base), str(self.distdir), jobs=2, checksums=False)
+        statuses = [r["status"] for r in lint.run()]
+        self.assertNotIn("checksum", statuses)
+        self.assertEqual(lint.stats["ok"], 2)
+
+    def test_default_distdir(self):
+        with mock.patch.dict(os.environ, {"DISTDIR": ""}):
+            self.assertEqual(DistLint(str(self.base)).distdir, str(self.distdir))
+        with mock.patch.dict(os.environ, {"DISTDIR": "/var/distfiles"}):
+            self.assertEqual(DistLint(str(self.base)).distdir, "/var/distfiles")
+
+
+class TestDigestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.distfile = self.base / "foo-1.0.tar.gz"
+        self.distfile.write_bytes(DATA)
+        self.cache = DigestCache(self.base / "digests.db")
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_hit_skips_rehash(self):
+        digests, _ = digest_file(self.distfile, ["SHA512", "BLAKE2s"], cache=self.cache)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(digest_file(self.distfile, ["SHA512"], cache=self.cache)[0],
+                         {"SHA512": digests["SHA512"]})
+        self.assertEqual(self.cache.hits, 1)
+
+        # Une entrée falsifiée prouve que le cache est servi sans relecture
+        self.cache.invalidate()
+        st = os.stat(self.distfile)
+        identity = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        self.cache.store(identity, str(self.distfile), {"SHA512": "0" * 128})
+        self.assertEqual(digest_file(self.distfile, ["SHA512"], cache=self.cache)[0]["SHA512"], "0" * 128)
+        self.assertEqual(digest_file(self.distfile, ["SHA512"], cache=self.cache, force=True)[0]["SHA512"],
+                         hashlib.sha512(DATA).hexdigest())
+        self.assertEqual(digest_file(self.distfile, ["SHA512"], cache=self.cache)[0]["SHA512"],
+                         hashlib.sha512(DATA).hexdigest())
+
+    def test_identity_change_invalidates(self):
+        distinfo = self.base / "distinfo"
+        distinfo.write_text(distinfo_for("foo-1.0.tar.gz", DATA))
+        expected = parse_distinfo(distinfo)["foo-1.0.tar.gz"]
+        self.assertEqual(verify_distfile(self.distfile, expected, cache=self.cache)["status"], "ok")
+
+        st = os.stat(self.distfile)
+        self.distfile.write_bytes(DATA[:-1] + b"X")
+        os.utime(self.distfile, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+        self.assertEqual(verify_distfile(self.distfile, expected, cache=self.cache)["status"], "checksum")
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertEqual(self.cache.invalidate(str(self.distfile)), 2)
+
+    def test_unwritable_cache(self):
+        # Parent du cache qui n'est pas un répertoire : vérification sans cache
+        cache = DigestCache(self.distfile / "sub" / "digests.db")
+        distinfo = self.base / "distinfo"
+        distinfo.write_text(distinfo_for("foo-1.0.tar.gz", DATA))
+        expected = parse_distinfo(distinfo)["foo-1.0.tar.gz"]
+        self.assertEqual(verify_distfile(self.distfile, expected, cache=cache)["status"], "ok")
+        self.assertEqual(verify_distfile(self.distfile, expected, cache=cache)["status"], "ok")
+        self.assertEqual(cache.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
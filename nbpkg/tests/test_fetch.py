@@ -0,0 +1,119 @@
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from nbpkg.common.nberrors import NetworkError
+from nbpkg.pkginspect.fetch import Fetcher, Mirror, MirrorSet, load_remote_repos
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.clients.add(self.client_address)
+        body = server.files.get(self.path)
+        status = server.status if server.status else (200 if body is not None else 404)
+        body = body if status == 200 else b"error"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mirror(files, status=None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MirrorHandler)
+    server.files, server.status = files, status
+    server.requests, server.clients = [], set()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/pkgsrc/"
+
+
+def closed_port_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/pkgsrc/"
+
+
+class TestFetch(unittest.TestCase):
+    def setUp(self):
+        self.files = {f"/pkgsrc/doc/CHANGES-{year}": f"CHANGES {year}\n".encode() for year in range(2000, 2025)}
+        self.good, self.good_url = start_mirror(self.files)
+        self.broken, self.broken_url = start_mirror(self.files, status=503)
+        self.stale, self.stale_url = start_mirror({})
+        self.fetcher = Fetcher(max_workers=4, timeout=5)
+
+    def tearDown(self):
+        self.fetcher.close()
+        for server in (self.good, self.broken, self.stale):
+            server.shutdown()
+            server.server_close()
+
+    def test_failover_by_priority(self):
+        mirrors = MirrorSet([
+            Mirror(closed_port_url(), priority=1),
+            Mirror(self.broken_url, priority=2),
+            Mirror(self.stale_url, priority=3),
+            Mirror(self.good_url, priority=50),
+        ])
+        response = self.fetcher.fetch(mirrors, "doc/CHANGES-2024")
+        self.assertEqual(response.text, "CHANGES 2024\n")
+        self.assertEqual(self.stale.requests, ["/pkgsrc/doc/CHANGES-2024"])
+
+        # Les miroirs en panne sont écartés, le miroir en retard (404) ne l'est pas
+        order = [m.baseurl for m in mirrors.ordered()]
+        self.assertEqual(order, [self.stale_url, self.good_url, mirrors.mirrors[0].baseurl, self.broken_url])
+        self.fetcher.fetch(mirrors, "doc/CHANGES-2023")
+        self.assertEqual(len(self.broken.requests), 1)
+
+    def test_all_mirrors_fail(self):
+        mirrors = MirrorSet([Mirror(self.broken_url), Mirror(self.stale_url)])
+        with self.assertRaises(NetworkError):
+            self.fetcher.fetch(mirrors, "doc/CHANGES-2024")
+
+    def test_latency_ordering(self):
+        slow, fast = Mirror(self.stale_url, priority=10), Mirror(self.good_url, priority=10)
+        mirrors = MirrorSet([slow, fast])
+        mirrors.record_success(slow, 0.5)
+        mirrors.record_success(fast, 0.01)
+        self.assertEqual(mirrors.ordered(), [fast, slow])
+        self.assertEqual(self.fetcher.probe(MirrorSet([Mirror(self.good_url)]))[0].failures, 0)
+
+    def test_fetch_many_reuses_connections(self):
+        mirrors = MirrorSet([Mirror(self.good_url)])
+        paths = [f"doc/CHANGES-{year}" for year in range(2000, 2025)]
+        results = list(self.fetcher.fetch_many(mirrors, paths))
+        self.assertEqual([path for path, _, _ in results], paths)
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertEqual(results[-1][1].text, "CHANGES 2024\n")
+        self.assertLessEqual(len(self.good.clients), self.fetcher.max_workers)
+
+    def test_load_remote_repos(self):
+        with tempfile.TemporaryDirectory() as repos_dir:
+            Path(repos_dir, "netbsd.repo").write_text(
+                "[NetBSD]\nname=Dépôt NetBSD\nenabled=1\nautorefresh=1\n"
+                "baseurl=https://cdn.netbsd.org/pub/pkgsrc/current/pkgsrc\npriority=10\n")
+            Path(repos_dir, "local.repo").write_text("[Local]\nname=Local\nbaseurl=/usr/pkgsrc/\nenabled=1\n")
+            Path(repos_dir, "off.repo").write_text("[Off]\nbaseurl=https://example.com/\nenabled=0\n")
+            Path(repos_dir, "static.repo").write_text("[Static]\nbaseurl=https://example.org/\nautorefresh=0\n")
+            Path(repos_dir, "se.repo").write_text(
+                "[pkgsrc.se]\nbaseurl=https://pkgsrc.se/\nautorefresh=1\nmetadata_expire=60\n")
+            repos = load_remote_repos(repos_dir)
+        self.assertEqual(repos[0], {
+            "name": "Dépôt NetBSD", "baseurl": "https://cdn.netbsd.org/pub/pkgsrc/current/pkgsrc/",
+            "priority": 10, "autorefresh": True, "ttl": 3600,
+        })
+        self.assertEqual([(repo["name"], repo["ttl"]) for repo in repos[1:]], [("pkgsrc.se", 60), ("Static", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from nbpkg.pkginspect import nbpkgdescr
+from nbpkg.pkginspect.fuzzy import TrigramIndex, name_index, trigrams
+from nbpkg.pkginspect.nbpkgdescr import PkgQuery
+
+TREE = ("lang/python311", "lang/python312", "lang/perl5", "www/py-requests", "wip/pythran", "editors/gedit")
+
+
+class TestFuzzy(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "pkgsrc"
+        for path in TREE:
+            (self.root / path).mkdir(parents=True)
+            (self.root / path / "Makefile").write_text("# test\n")
+        self.missing_pkgdb = str(Path(self.tmp.name) / "pkgdb")
+        TrigramIndex.invalidate()
+
+    def tearDown(self):
+        TrigramIndex.invalidate()
+        self.tmp.cleanup()
+
+    def test_trigrams(self):
+        self.assertEqual(trigrams("Py"), {"  p", " py", "py "})
+
+    def test_suggest(self):
+        index = TrigramIndex.from_sources(
+            [("py-requests", "py311-requests-2.32.3", "www/py-requests"), ("python311", "python311-3.11.9", "lang/python311")],
+            installed=["python311", "zstd"],
+        )
+        suggestions = index.suggest("pyhton311")
+        self.assertEqual(suggestions[0]["name"], "python311")
+        self.assertEqual(suggestions[0]["locations"], ["lang/python311", "pkgdb"])
+        self.assertEqual(index.suggest("py311-request")[0]["locations"], ["www/py-requests"])
+        self.assertEqual(index.suggest("zzzzzz"), [])
+
+    def test_name_index_from_tree(self):
+        index = name_index([str(self.root)], pkg_db_path=self.missing_pkgdb)
+        self.assertIs(name_index([str(self.root)], pkg_db_path=self.missing_pkgdb), index)
+        names = [item["name"] for item in index.suggest("pyhton312", limit=3)]
+        self.assertEqual(names[0], "python312")
+        self.assertIn("pythran", [item["name"] for item in index.suggest("pythrn")])
+
+    def test_pkgquery_fallback(self):
+        with mock.patch.object(nbpkgdescr, "local_roots", return_value=[str(self.root)]), \
+                mock.patch("nbpkg.pkginspect.fuzzy.PkgDBSnapshot.load", side_effect=FileNotFoundError("pkgdb")):
+            query = PkgQuery("gedti")
+            self.assertIsNone(query._pkg_path)
+            self.assertEqual(query.suggestions[0], "gedit")
+            self.assertIn("vouliez-vous dire : gedit", query.list_patches()[0])
+            self.assertEqual(PkgQuery.suggest("perl")[0]["name"], "perl5")
+
+
+if __name__ == "__main__":
+    unittest.main()
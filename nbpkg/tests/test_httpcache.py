@@ -0,0 +1,121 @@
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from nbpkg.common.nberrors import NetworkError
+from nbpkg.pkginspect.fetch import Fetcher, Mirror, MirrorSet
+from nbpkg.pkginspect.httpcache import HttpCache
+
+
+class RevalidatingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        body = server.files.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = f'"{hash(body) & 0xffffffff:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            server.log.append(("304", self.path))
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        server.log.append(("200", self.path))
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RevalidatingHandler)
+        self.server.files = {
+            "/pkgsrc/doc/CHANGES-2024": "Updated lang/python312 to 3.12.8 — été\n".encode(),
+            "/pkgsrc/doc/CHANGES-2023": b"x" * 600,
+            "/pkgsrc/doc/CHANGES-2022": b"y" * 600,
+        }
+        self.server.log = []
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.baseurl = f"http://127.0.0.1:{self.server.server_address[1]}/pkgsrc/"
+        self.fetcher = Fetcher(max_workers=2, timeout=5)
+        self.cache = HttpCache(self.tmp.name, max_size=1000, fetcher=self.fetcher)
+
+    def tearDown(self):
+        self.cache.close()
+        self.fetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def stop_server(self):
+        self.server.shutdown()
+        self.server.server_close()
+        # Fermer aussi les connexions keep-alive encore ouvertes
+        self.fetcher.close()
+
+    def test_ttl_and_revalidation(self):
+        mirrors = MirrorSet([Mirror(self.baseurl, ttl=3600)])
+        first = self.cache.fetch(mirrors, "doc/CHANGES-2024")
+        self.assertEqual(first.status, "miss")
+        self.assertIn("été", first.text)
+        self.assertEqual(self.cache.fetch(mirrors, "doc/CHANGES-2024").status, "hit")
+        self.assertEqual(self.server.log, [("200", "/pkgsrc/doc/CHANGES-2024")])
+
+        expired = MirrorSet([Mirror(self.baseurl, ttl=0)])
+        again = self.cache.fetch(expired, "doc/CHANGES-2024")
+        self.assertEqual(again.status, "revalidated")
+        self.assertEqual(again.text, first.text)
+        self.assertEqual(self.server.log[-1], ("304", "/pkgsrc/doc/CHANGES-2024"))
+
+        self.server.files["/pkgsrc/doc/CHANGES-2024"] = b"changed\n"
+        self.assertEqual(self.cache.fetch(mirrors, "doc/CHANGES-2024", force=True).text, "changed\n")
+
+    def test_offline_serves_stale_copy(self):
+        self.cache.fetch(MirrorSet([Mirror(self.baseurl, ttl=3600)]), "doc/CHANGES-2024")
+        self.stop_server()
+        expired = MirrorSet([Mirror(self.baseurl, ttl=0)])
+        self.assertEqual(self.cache.fetch(expired, "doc/CHANGES-2024").status, "stale")
+        with self.assertRaises(NetworkError):
+            self.cache.fetch(expired, "doc/CHANGES-2023")
+
+    def test_lru_eviction(self):
+        mirrors = MirrorSet([Mirror(self.baseurl)])
+        self.cache.fetch(mirrors, "doc/CHANGES-2024")
+        self.cache.fetch(mirrors, "doc/CHANGES-2023")
+        time.sleep(0.01)
+        self.cache.fetch(mirrors, "doc/CHANGES-2024")
+        self.cache.fetch(mirrors, "doc/CHANGES-2022")
+        stats = self.cache.stats()
+        self.assertLessEqual(stats["size"], 1000)
+        self.assertEqual(self.cache.fetch(mirrors, "doc/CHANGES-2024").status, "hit")
+        self.assertEqual(self.cache.fetch(mirrors, "doc/CHANGES-2023").status, "miss")
+
+    def test_unavailable_cache_dir(self):
+        # Parent du cache qui n'est pas un répertoire : récupération sans cache
+        blocker = f"{self.tmp.name}/fichier"
+        open(blocker, "w").close()
+        cache = HttpCache(f"{blocker}/http-cache", fetcher=self.fetcher)
+        mirrors = MirrorSet([Mirror(self.baseurl, ttl=3600)])
+        for _ in range(2):
+            response = cache.fetch(mirrors, "doc/CHANGES-2024")
+            self.assertEqual(response.status, "miss")
+            self.assertIn("été", response.text)
+        self.assertEqual(len(self.server.log), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import unittest
+import tempfile
+from pathlib import Path
+from unittest import mock
+from nbpkg.pkginspect.nbpkgdescr import PkgQuery
+from nbpkg.pkginspect.pkgdbsnap import PkgDBSnapshot, parse_contents
+
+CONTENTS = """@comment $NetBSD$
+@name {pkgname}
+@pkgdep {dep}
+@blddep {dep}
+@cwd /usr/pkg
+@src /usr/pkgsrc/work
+bin/{name}
+@comment MD5:d41d8cd98f00b204e9800998ecf8427e
+man/man1/{name}.1
+@ignore
++BUILD_INFO
+@dirrm share/{name}
+"""
+
+
+def make_pkgdb(base, packages):
+    for pkgname, comment, dep in packages:
+        pkg_dir = Path(base) / pkgname
+        pkg_dir.mkdir(parents=True)
+        name = pkgname.rsplit("-", 1)[0]
+        (pkg_dir / "+CONTENTS").write_text(CONTENTS.format(pkgname=pkgname, name=name, dep=dep))
+        (pkg_dir / "+COMMENT").write_text(comment + "\n")
+
+
+class TestPkgDBSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pkgdb = os.path.join(self.tmp.name, "pkgdb")
+        self.snapshot = os.path.join(self.tmp.name, "pkgdb.snapshot")
+        make_pkgdb(self.pkgdb, [
+            ("perl-5.40.1", "Practical Extraction and Report Language", "libiconv>=1.9"),
+            ("gettext-lib-0.22.5", "Internationalized Message Handling Library", "libiconv>=1.9"),
+            ("libiconv-1.17", "Character set conversion library", "none-[0-9]*"),
+        ])
+
+    def tearDown(self):
+        PkgDBSnapshot._opened.clear()
+        self.tmp.cleanup()
+
+    def test_parse_contents(self):
+        parsed = parse_contents(CONTENTS.format(pkgname="a-1", name="a", dep="b>=1"))
+        self.assertEqual(parsed["files"], ["/usr/pkg/bin/a", "/usr/pkg/man/man1/a.1"])
+        self.assertEqual(parsed["depends"], ["b>=1"])
+        self.assertEqual(parsed["build_depends"], ["b>=1"])
+
+    def test_snapshot_contents(self):
+        snapshot = PkgDBSnapshot.load(self.pkgdb, self.snapshot)
+        self.assertEqual(snapshot.names(), ["gettext-lib-0.22.5", "libiconv-1.17", "perl-5.40.1"])
+        perl = snapshot.get("perl")
+        self.assertEqual(perl["version"], "5.40.1")
+        self.assertEqual(perl["depends"], ["libiconv>=1.9"])
+        self.assertEqual(perl["files"], ["/usr/pkg/bin/perl", "/usr/pkg/man/man1/perl.1"])
+        self.assertEqual(snapshot.get("gettext-lib-0.22.5")["comment"], "Internationalized Message Handling Library")
+        self.assertIsNone(snapshot.get("perl-5.38.0"))
+        self.assertEqual(snapshot.owner("/usr/pkg/bin/perl"), "perl-5.40.1")
+        self.assertIsNone(snapshot.owner("/usr/pkg/bin/python"))
+
+    def test_owners_prefix_and_glob(self):
+        snapshot = PkgDBSnapshot.load(self.pkgdb, self.snapshot)
+        self.assertEqual(snapshot.owners("/usr/pkg/man/man1/"), [
+            ("/usr/pkg/man/man1/gettext-lib.1", "gettext-lib-0.22.5"),
+            ("/usr/pkg/man/man1/libiconv.1", "libiconv-1.17"),
+            ("/usr/pkg/man/man1/perl.1", "perl-5.40.1"),
+        ])
+        self.assertEqual(snapshot.owners("/usr/pkg/bin/*i*"), [
+            ("/usr/pkg/bin/gettext-lib", "gettext-lib-0.22.5"),
+            ("/usr/pkg/bin/libiconv", "libiconv-1.17"),
+        ])
+        self.assertEqual(len(snapshot.owners("/usr/pkg/", limit=2)), 2)
+        self.assertEqual(snapshot.owners("/opt/"), [])
+
+    def test_reused_until_pkgdb_changes(self):
+        first = PkgDBSnapshot.load(self.pkgdb, self.snapshot)
+        self.assertIs(PkgDBSnapshot.load(self.pkgdb, self.snapshot), first)
+        make_pkgdb(self.pkgdb, [("curl-8.11.0", "Client that groks URLs", "libiconv>=1.9")])
+        st = os.stat(self.pkgdb)
+        os.utime(self.pkgdb, ns=(st.st_atime_ns, first.pkgdb_mtime + 10**9))
+        second = PkgDBSnapshot.load(self.pkgdb, self.snapshot)
+        self.assertIsNot(second, first)
+        self.assertIn("curl", second)
+
+    def test_unwritable_snapshot_dir(self):
+        # Répertoire du snapshot impossible à créer (un fichier occupe sa place)
+        blocker = Path(self.tmp.name) / "dbdir"
+        blocker.write_text("")
+        snapshot_path = str(blocker / "pkgdb.snapshot")
+        snapshot = PkgDBSnapshot.load(self.pkgdb, snapshot_path)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.owner("/usr/pkg/bin/perl"), "perl-5.40.1")
+        self.assertIs(PkgDBSnapshot.load(self.pkgdb, snapshot_path), snapshot)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["dbdir", "pkgdb"])
+        with mock.patch.object(PkgDBSnapshot, "default_path", return_value=Path(snapshot_path)):
+            self.assertEqual([p["name"] for p in PkgQuery.list_installed_packages(self.pkgdb)],
+                             ["gettext-lib", "libiconv", "perl"])
+        with mock.patch.object(PkgDBSnapshot, "load", side_effect=PermissionError("pkgdb illisible")):
+            self.assertEqual(PkgQuery.whoowns("/usr/pkg/bin/perl", self.pkgdb), [{"error": "pkgdb illisible"}])
+
+    def test_missing_pkgdb(self):
+        with self.assertRaises(FileNotFoundError):
+            PkgDBSnapshot.load(os.path.join(self.tmp.name, "absent"), self.snapshot)
+
+
+if __name__ == "__main__":
+    unittest.main()
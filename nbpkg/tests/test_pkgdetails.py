@@ -0,0 +1,97 @@
+import unittest
+from dataclasses import asdict
+from unittest import mock
+from nbpkg.pkginspect import nbpkgdescr
+from nbpkg.pkginspect.nbpkgdescr import PkgDetails, PkgQuery
+
+
+class FakeSourcePackage:
+    calls = []
+    fail = False
+
+    def __init__(self, name, version="Inconnu"):
+        self.name = name
+        self.version = version
+
+    def fetch_source_info(self):
+        FakeSourcePackage.calls.append("fetch_source_info")
+        if FakeSourcePackage.fail:
+            raise RuntimeError("Makefile illisible")
+        self.version = "1.2"
+        self.comment = "Exemple"
+        self.files = ["bin/exemple"]
+
+    def get_dependencies(self):
+        FakeSourcePackage.calls.append("get_dependencies")
+        return ["zlib>=1.2"]
+
+    def get_master_sites(self):
+        FakeSourcePackage.calls.append("get_master_sites")
+        return ["https://example.org/"]
+
+
+class TestPkgDetails(unittest.TestCase):
+    def setUp(self):
+        FakeSourcePackage.calls = []
+        FakeSourcePackage.fail = False
+        patcher = mock.patch.object(nbpkgdescr, "SourcePackage", FakeSourcePackage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_defer(self):
+        calls = []
+        details = PkgDetails(pkgname="exemple")
+        details.defer({"version": lambda: calls.append("version") or "1.0",
+                       "comment": lambda: calls.append("comment") or "Exemple",
+                       "pkgname": lambda: "remplacé"})
+        self.assertEqual(details.pkgname, "remplacé")
+        self.assertEqual(details.version, "1.0")
+        self.assertEqual(details.version, "1.0")
+        self.assertEqual(calls, ["version"])
+        details.comment = "Affecté"
+        self.assertEqual(details.comment, "Affecté")
+        self.assertEqual(details.pending, [])
+        self.assertEqual(asdict(details)["version"], "1.0")
+        self.assertEqual(PkgDetails(**asdict(details)), details)
+
+    def test_loader_error(self):
+        details = PkgDetails()
+        details.defer({"files": lambda: 1 / 0, "comment": lambda: "Exemple"}, error="Échec")
+        self.assertIsNone(details.files)
+        self.assertEqual(details.comment, "Exemple")
+        self.assertTrue(details.error.startswith("Échec : "))
+
+    def test_query_is_lazy(self):
+        query = PkgQuery("exemple")
+        self.assertEqual(FakeSourcePackage.calls, [])
+        self.assertIsNone(query._pkg_path)
+        details = query.depends()
+        self.assertEqual(details.dependencies, ["zlib>=1.2"])
+        self.assertEqual(details.version, "1.2")
+        self.assertIsNone(details.error)
+        self.assertEqual(FakeSourcePackage.calls, ["fetch_source_info", "get_dependencies"])
+
+    def test_query_reuse(self):
+        query = PkgQuery("exemple")
+        query.show()
+        self.assertEqual(query.provides().files, ["bin/exemple"])
+        self.assertEqual(query.depends().dependencies, ["zlib>=1.2"])
+        self.assertEqual(FakeSourcePackage.calls.count("fetch_source_info"), 1)
+
+    def test_show_only_loads_output(self):
+        result = PkgQuery("exemple").show()
+        self.assertEqual(result[0]["master_sites"], ["https://example.org/"])
+        self.assertNotIn("files", result[0])
+        self.assertEqual(sorted(FakeSourcePackage.calls), ["fetch_source_info", "get_dependencies", "get_master_sites"])
+
+    def test_fetch_error(self):
+        FakeSourcePackage.fail = True
+        query = PkgQuery("exemple")
+        result = query.show()
+        self.assertEqual(result, {"error": "Erreur lors du chargement des détails source : Makefile illisible"})
+        self.assertEqual(FakeSourcePackage.calls.count("fetch_source_info"), 1)
+        self.assertEqual(query.provides().files, ["Aucun fichier trouvé"])
+
+
+if __name__ == "__main__":
+    unittest.main()
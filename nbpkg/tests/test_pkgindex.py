@@ -0,0 +1,245 @@
+import io
+import os
+import sqlite3
+import unittest
+import tempfile
+from pathlib import Path
+from unittest import mock
+from nbpkg.pkginspect import nbpkgdescr, pkgindex
+from nbpkg.pkginspect.nbpkgdescr import PkgQuery
+from nbpkg.pkginspect.pkgindex import PkgIndex, scan_by_name, scan_by_maintainer
+from nbpkg.pkginspect.streaming import stream_results
+from nbpkg.pkginspect.textindex import parse_query, tokenize
+
+
+def fake_extract(pkg_dir):
+    return {
+        "category": pkg_dir.parent.name,
+        "name": pkg_dir.name,
+        "pkgname": f"{pkg_dir.name}-1.0",
+        "version": "1.0",
+        "comment": f"Commentaire de {pkg_dir.name}",
+        "maintainer": "pkgsrc-users@NetBSD.org" if pkg_dir.name != "gedit" else "kamel@example.org",
+        "homepage": None,
+        "categories": [pkg_dir.parent.name],
+        "master_sites": [],
+    }
+
+
+TEXTS = {
+    "postgresql16-client": ("PostgreSQL database client programs and libraries",
+                            "PostgreSQL is an object-relational database.\nThis package holds the client library."),
+    "postgresql16-server": ("PostgreSQL database server programs", "PostgreSQL server daemon."),
+    "libpqxx": ("C++ client library for PostgreSQL", "The official C++ client API for PostgreSQL."),
+    "python311": ("Interpreted, interactive, object-oriented programming language", "Python."),
+}
+
+
+def text_extract(pkg_dir):
+    record = fake_extract(pkg_dir)
+    record["comment"], record["descr"] = TEXTS.get(pkg_dir.name, (record["comment"], None))
+    return record
+
+
+class TestPkgIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "pkgsrc"
+        for path in ("lang/python311", "lang/perl5", "editors/gedit", "CVS/Entries"):
+            (self.root / path).mkdir(parents=True)
+            (self.root / path / "Makefile").write_text("# test\n")
+        self.patcher = mock.patch.object(pkgindex, "extract_package", side_effect=fake_extract)
+        self.extract = self.patcher.start()
+        self.index = PkgIndex(roots=[str(self.root)], index_path=str(Path(self.tmp.name) / "index.db"))
+
+    def tearDown(self):
+        self.index.close()
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def test_reindex_and_search(self):
+        self.assertFalse(self.index.exists())
+        stats = self.index.reindex()
+        self.assertEqual(stats["packages"], 3)
+        self.assertTrue(self.index.exists())
+        self.assertEqual([p["path"] for p in self.index.search_name("PY")], ["lang/python311"])
+        self.assertEqual([p["path"] for p in self.index.search_name("e", category="editors")], ["editors/gedit"])
+        self.assertEqual(self.index.get("lang/perl5")["categories"], ["lang"])
+
+    def test_search_maintainer(self):
+        self.index.reindex()
+        self.assertEqual(len(self.index.search_maintainer("netbsd.org")), 2)
+        self.assertEqual([p["path"] for p in self.index.search_maintainer("kamel", by_email=False)], ["editors/gedit"])
+        self.assertEqual(self.index.search_maintainer("example", by_email=False), [])
+
+    def test_search_does_not_reparse(self):
+        self.index.reindex()
+        calls = self.extract.call_count
+        self.index.search_name("perl")
+        self.index.search_maintainer("pkgsrc-users")
+        self.assertEqual(self.extract.call_count, calls)
+
+    def test_queries_do_not_write(self):
+        missing = Path(self.tmp.name) / "absent" / "index.db"
+        index = PkgIndex(roots=[str(self.root)], index_path=str(missing))
+        self.assertFalse(index.exists())
+        self.assertEqual(index.search_name("perl"), [])
+        self.assertFalse(missing.parent.exists())
+        index.close()
+
+        self.index.reindex()
+        self.index.close()
+        mtime = self.index.index_path.stat().st_mtime_ns
+        self.assertEqual([p["path"] for p in self.index.search_name("perl")], ["lang/perl5"])
+        with self.assertRaises(sqlite3.OperationalError):
+            self.index._connect().execute("DELETE FROM packages")
+        self.assertEqual(self.index.index_path.stat().st_mtime_ns, mtime)
+
+    def test_search_without_writable_index(self):
+        with mock.patch.object(pkgindex, "local_roots", return_value=[str(self.root)]), \
+                mock.patch.object(PkgIndex, "ensure", side_effect=PermissionError("/var/db/nbpkgquery")):
+            details = PkgQuery.search_by_name("p")
+            self.assertEqual(details.files[0][:10], "lang/perl5")
+            self.assertEqual(len(details.files), 2)
+            self.assertEqual(PkgQuery.search_by_maintainer("kamel", by_email=False).files, ["editors/gedit"])
+
+    def test_versions_without_writable_index(self):
+        snapshot = mock.Mock()
+        snapshot.packages.return_value = [{"name": "perl5", "version": "0.9"}, {"name": "gedit", "version": "1.0"}]
+        with mock.patch.object(pkgindex, "local_roots", return_value=[str(self.root)]), \
+                mock.patch.object(nbpkgdescr.PkgDBSnapshot, "load", return_value=snapshot), \
+                mock.patch.object(PkgIndex, "ensure", side_effect=PermissionError("/var/db/nbpkgquery")):
+            results = PkgQuery.check_package_versions(pkgsrc_dir=str(self.root))
+        self.assertEqual(results, [{"name": "perl5", "category": "lang", "installed_version": "0.9",
+                                    "pkgsrc_version": "1.0", "status": "Obsolète"}])
+
+    def test_versions_by_pkgname(self):
+        (self.root / "www/py-requests").mkdir(parents=True)
+        (self.root / "www/py-requests/Makefile").write_text("# test\n")
+
+        def py_extract(pkg_dir):
+            record = fake_extract(pkg_dir)
+            if pkg_dir.name == "py-requests":
+                record.update(pkgname="py311-requests-2.32.3", version="2.32.3")
+            return record
+
+        self.extract.side_effect = py_extract
+        snapshot = mock.Mock()
+        snapshot.packages.return_value = [{"name": "py311-requests", "version": "2.31.0"}]
+        snapshot.get.return_value = {"name": "py311-requests", "version": "2.31.0"}
+        with mock.patch.object(pkgindex, "local_roots", return_value=[str(self.root)]), \
+                mock.patch.object(pkgindex.ConfigManager, "get", return_value=self.tmp.name), \
+                mock.patch.object(nbpkgdescr.PkgDBSnapshot, "load", return_value=snapshot):
+            results = PkgQuery.check_package_versions(pkgsrc_dir=str(self.root))
+            details = PkgQuery("py311-requests", binary=True).outdated()
+        self.assertEqual(results, [{"name": "py311-requests", "category": "www", "installed_version": "2.31.0",
+                                    "pkgsrc_version": "2.32.3", "status": "Obsolète"}])
+        self.assertEqual(details.comment, "Obsolète : 2.32.3 disponible dans pkgsrc")
+        self.index.reindex()
+        self.assertEqual([entry["path"] for entry in self.index.iter_pkgbase("py311-requests")], ["www/py-requests"])
+        self.assertEqual(list(self.index.iter_pkgbase("py-requests")), [])
+
+    def test_refresh_rescans_only_changed(self):
+        self.index.reindex()
+        stats = self.index.refresh()
+        self.assertEqual(stats["rescanned"], 0)
+
+        makefile = self.root / "lang/perl5/Makefile"
+        st = makefile.stat()
+        os.utime(makefile, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        (self.root / "lang/ruby").mkdir()
+        (self.root / "editors/gedit/Makefile").unlink()
+        (self.root / "editors/gedit").rmdir()
+
+        self.extract.reset_mock()
+        stats = self.index.refresh()
+        self.assertEqual(stats["rescanned"], 2)
+        self.assertEqual((stats["added"], stats["removed"]), (1, 1))
+        self.assertEqual(sorted(c.args[0].name for c in self.extract.call_args_list), ["perl5", "ruby"])
+        self.assertIsNone(self.index.get("editors/gedit"))
+        self.assertIsNotNone(self.index.get("lang/ruby"))
+
+    def test_refresh_retries_failed(self):
+        broken = lambda pkg_dir: fake_extract(pkg_dir) if pkg_dir.name != "perl5" else 1 / 0
+        self.extract.side_effect = broken
+        stats = self.index.reindex()
+        self.assertEqual((stats["packages"], stats["errors"]), (2, 1))
+        self.assertEqual(self.index.refresh()["rescanned"], 0)
+
+        self.extract.side_effect = fake_extract
+        makefile = self.root / "lang/perl5/Makefile"
+        st = makefile.stat()
+        os.utime(makefile, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        stats = self.index.refresh()
+        self.assertEqual((stats["rescanned"], stats["packages"], stats["errors"]), (1, 3, 0))
+        self.assertIsNotNone(self.index.get("lang/perl5"))
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("PostgreSQL client libraries, for the python311 module"),
+                         ["postgresql", "client", "library", "python311", "python", "module"])
+        self.assertEqual(parse_query("postg* Client the"), [("postg", True), ("client", False)])
+
+    def test_search_text(self):
+        for path in ("databases/postgresql16-client", "databases/postgresql16-server", "textproc/libpqxx"):
+            (self.root / path).mkdir(parents=True)
+            (self.root / path / "Makefile").write_text("# test\n")
+        self.extract.side_effect = text_extract
+        self.index.reindex()
+        paths = lambda results: [p["path"] for p in results]
+        found = self.index.search_text("postgres client library")
+        self.assertEqual(paths(found[:2]), ["databases/postgresql16-client", "textproc/libpqxx"])
+        self.assertEqual(found[0]["matched"], 3)
+        self.assertEqual(sorted(paths(self.index.search_text("progr*", category="databases"))),
+                         ["databases/postgresql16-client", "databases/postgresql16-server"])
+        self.assertEqual(self.index.search_text("nonexistent"), [])
+
+        # Mise à jour incrémentale : les termes d'un paquet relu sont remplacés
+        TEXTS["libpqxx"] = ("C++ connector", "Connector for the database.")
+        self.addCleanup(TEXTS.__setitem__, "libpqxx", ("C++ client library for PostgreSQL",
+                                                       "The official C++ client API for PostgreSQL."))
+        makefile = self.root / "textproc/libpqxx/Makefile"
+        st = makefile.stat()
+        os.utime(makefile, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.index.refresh()
+        self.assertEqual(paths(self.index.search_text("library")), ["databases/postgresql16-client"])
+        self.assertEqual(paths(self.index.search_text("connector")), ["textproc/libpqxx"])
+
+    def test_search_text_without_writable_index(self):
+        (self.root / "textproc/libpqxx").mkdir(parents=True)
+        (self.root / "textproc/libpqxx/Makefile").write_text("# test\n")
+        self.extract.side_effect = text_extract
+        dbdir = Path(self.tmp.name) / "fichier"
+        dbdir.write_text("")
+        with mock.patch.object(pkgindex, "local_roots", return_value=[str(self.root)]), \
+                mock.patch.object(pkgindex.ConfigManager, "get", return_value=str(dbdir / "nbpkgquery")):
+            found = PkgQuery.search_text("client library")
+        self.assertEqual([p["path"] for p in found], ["textproc/libpqxx"])
+        self.assertEqual(found[0]["matched"], 2)
+        self.assertEqual(set(Path(self.tmp.name).iterdir()), {self.root, dbdir})
+
+    def test_streaming_without_index(self):
+        found = scan_by_name([str(self.root)], "p", jobs=2)
+        self.assertEqual(next(found)["path"][:5], "lang/")
+        self.assertEqual(sorted(p["path"] for p in scan_by_name([str(self.root)], "p")),
+                         ["lang/perl5", "lang/python311"])
+        self.assertEqual([p["path"] for p in scan_by_maintainer([str(self.root)], "kamel", by_email=False)],
+                         ["editors/gedit"])
+
+    def test_stream_results_stops_early(self):
+        def results():
+            yield from scan_by_name([str(self.root)], "")
+            self.fail("le parcours aurait dû être interrompu")
+
+        class Head(io.StringIO):
+            def write(self, text):
+                if self.getvalue():
+                    raise BrokenPipeError()
+                return super().write(text)
+
+        out = Head()
+        self.assertEqual(stream_results(results(), out=out), 1)
+        self.assertEqual(out.getvalue().count("\n"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from nbpkg.pkginspect import pkglog
+from nbpkg.pkginspect.nbpkgdescr import PkgQuery
+from nbpkg.pkginspect.pkglog import PkgLog, parse_event, reverse_lines
+
+LOG = (
+    "2024-01-10 09:00:00 perl-5.38.2 installed\n"
+    "2024-01-10 09:00:05 perl5-module-1.0 installed\n"
+    "Jan 12 10:15:00 host pkgin[412]: perl upgraded: 5.38.2 -> 5.40.0\n"
+    "[2024-02-01 08:00:00] removed perl5-module-1.0\n"
+    "unrelated line\n"
+    "2024-03-01 12:00:00 zstd-1.5.6 installed\n"
+)
+
+
+class TestPkgLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.log_path = self.base / "pkg.log"
+        self.log_path.write_text(LOG)
+        self.log = PkgLog(log_path=str(self.log_path), index_path=str(self.base / "pkglog.db"))
+
+    def tearDown(self):
+        self.log.close()
+        self.tmp.cleanup()
+
+    def test_parse_event(self):
+        event = parse_event("Jan 12 10:15:00 host pkgin[412]: perl upgraded: 5.38.2 -> 5.40.0")
+        self.assertEqual((event["name"], event["action"], event["old_version"], event["version"]),
+                         ("perl", "upgraded", "5.38.2", "5.40.0"))
+        self.assertEqual(event["timestamp"], "Jan 12 10:15:00")
+        event = parse_event("perl-5.38.2 upgraded to perl-5.40.0")
+        self.assertEqual((event["name"], event["old_version"], event["version"]), ("perl", "5.38.2", "5.40.0"))
+        self.assertEqual(parse_event("[2024-02-01 08:00:00] removed perl5-module-1.0")["action"], "deinstalled")
+        self.assertIsNone(parse_event("unrelated line"))
+
+    def test_history_exact_name(self):
+        events = self.log.history("perl")
+        self.assertEqual([event["action"] for event in events], ["installed", "upgraded"])
+        self.assertEqual([event["name"] for event in self.log.history("perl5-module")], ["perl5-module"] * 2)
+        self.assertEqual(len(self.log.history("perl", limit=1)), 1)
+        self.assertEqual(self.log.history("perl", limit=1)[0]["version"], "5.40.0")
+
+    def test_incremental_update(self):
+        self.assertEqual(self.log.update()["events"], 5)
+        with self.log_path.open("a") as f:
+            f.write("2024-04-01 12:00:00 perl-5.40.0 deinstalled\n2024-04-01 12:00:01 perl-5.40.0")
+        stats = self.log.update()
+        self.assertEqual((stats["events"], stats["rebuilt"]), (1, False))
+        # La ligne incomplète sera indexée une fois terminée
+        with self.log_path.open("a") as f:
+            f.write(" installed\n")
+        self.assertEqual(self.log.update()["events"], 1)
+        self.assertEqual([event["action"] for event in self.log.history("perl")][-2:], ["deinstalled", "installed"])
+
+    def test_rotation(self):
+        self.log.update()
+        rotated = self.base / "pkg.log.new"
+        rotated.write_text("2024-05-01 00:00:00 zstd-1.5.7 installed\n")
+        os.replace(rotated, self.log_path)
+        stats = self.log.update()
+        self.assertTrue(stats["rebuilt"])
+        self.assertEqual(self.log.history("perl"), [])
+        self.assertEqual(self.log.history("zstd")[0]["version"], "1.5.7")
+
+    def test_tail(self):
+        self.assertEqual([event["name"] for event in self.log.tail(2)], ["perl5-module", "zstd"])
+        self.assertEqual([event["version"] for event in self.log.tail(5, name="perl")], ["5.38.2", "5.40.0"])
+        lines = list(reverse_lines(str(self.log_path), block_size=7))
+        self.assertEqual([line for _, line in lines], LOG.splitlines()[::-1])
+        with self.log_path.open("rb") as f:
+            for offset, line in lines:
+                f.seek(offset)
+                self.assertEqual(f.readline().decode().rstrip("\n"), line)
+
+    def test_query_history_without_writable_index(self):
+        blocker = self.base / "fichier"
+        blocker.write_text("")
+        with mock.patch.object(pkglog.ConfigManager, "get", return_value=str(blocker / "nbpkgquery")):
+            details = PkgQuery("perl", binary=True).history(limit=5, log_path=str(self.log_path))
+        self.assertIsNone(details.error)
+        self.assertEqual(details.files, LOG.splitlines()[0:3:2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import gzip
+import lzma
+import tempfile
+import threading
+import unittest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+from pathlib import Path
+from nbpkg.pkginspect.fetch import Fetcher
+from nbpkg.pkginspect.httpcache import HttpCache
+from nbpkg.pkginspect.pkgsummary import SummaryIndex, depends_bases, open_summary, parse_summary
+
+RECORDS = {
+    "python312-3.12.8": (
+        "PKGNAME=python312-3.12.8\nPKGPATH=lang/python312\nCATEGORIES=lang python\n"
+        "COMMENT=Interpreted, interactive, object-oriented programming language\n"
+        "DEPENDS=libffi>=3.4\nDEPENDS=gettext-lib>=0.22\nFILE_SIZE=27000000\n"
+        "DESCRIPTION=Python is an interpreted language.\nDESCRIPTION=Second line.\n"
+    ),
+    "libffi-3.4.6": (
+        "PKGNAME=libffi-3.4.6\nPKGPATH=devel/libffi\nCATEGORIES=devel\n"
+        "COMMENT=Foreign function interface\nFILE_SIZE=80000\n"
+    ),
+    "py312-six-1.16.0": (
+        "PKGNAME=py312-six-1.16.0\nPKGPATH=lang/py-six\nCATEGORIES=lang python\n"
+        "COMMENT=Python 2 and 3 compatibility utilities\n"
+        "DEPENDS=python312>=3.12<3.13\nDEPENDS={libffi,libffi-devel}-[0-9]*\n"
+    ),
+}
+
+
+def summary_text(records):
+    return "\n".join(records.values()) + "\n"
+
+
+class TestPkgSummary(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.summary = self.base / "pkg_summary.gz"
+        self.summary.write_bytes(gzip.compress(summary_text(RECORDS).encode()))
+        self.index = SummaryIndex("https://example.org/All", index_path=self.base / "summary.db")
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_parse_summary(self):
+        xz = self.base / "pkg_summary.xz"
+        xz.write_bytes(lzma.compress(summary_text(RECORDS).encode()))
+        with open_summary(xz) as lines:
+            records = [record for record, _ in parse_summary(lines)]
+        self.assertEqual([record["PKGNAME"] for record in records], list(RECORDS))
+        self.assertEqual(records[0]["DEPENDS"], ["libffi>=3.4", "gettext-lib>=0.22"])
+        self.assertEqual(len(records[0]["DESCRIPTION"]), 2)
+
+    def test_depends_bases(self):
+        self.assertEqual(depends_bases("python312>=3.12<3.13"), [("python312", False)])
+        self.assertEqual(depends_bases("{libffi,libffi-devel}-[0-9]*"),
+                         [("libffi", False), ("libffi-devel", False)])
+        self.assertEqual(depends_bases("py3[0-9]-six-[0-9]*"), [("py3[0-9]-six", True)])
+
+    def test_search(self):
+        stats = self.index.ingest(str(self.summary))
+        self.assertEqual((stats["packages"], stats["added"]), (3, 3))
+        names = lambda results: [pkg["pkgname"] for pkg in results]
+        self.assertEqual(names(self.index.search("PYTHON")), ["python312-3.12.8"])
+        self.assertEqual(names(self.index.search("python compatibility", field="comment")),
+                         ["py312-six-1.16.0"])
+        self.assertEqual(names(self.index.search("python", field="category")),
+                         ["py312-six-1.16.0", "python312-3.12.8"])
+        self.assertEqual(names(self.index.search("libffi", field="depends")),
+                         ["py312-six-1.16.0", "python312-3.12.8"])
+        self.assertEqual(self.index.get("libffi")["categories"], ["devel"])
+        records = dict(RECORDS, **{f"foo-{version}": f"PKGNAME=foo-{version}\nCOMMENT=Foo\n"
+                                   for version in ("1.9", "1.10", "1.10rc1")})
+        self.summary.write_bytes(gzip.compress(summary_text(records).encode()))
+        self.index.ingest(str(self.summary))
+        self.assertEqual(self.index.get("foo")["pkgname"], "foo-1.10")
+        self.assertEqual(self.index.get("foo-1.9")["pkgname"], "foo-1.9")
+        with self.assertRaises(ValueError):
+            self.index.search("x", field="maintainer")
+
+    def test_many_dependents(self):
+        # Plus de dépendants que l'ancienne limite de paramètres SQLite (999)
+        records = dict(RECORDS)
+        for i in range(1500):
+            records[f"p5-mod{i}-1.0"] = f"PKGNAME=p5-mod{i}-1.0\nPKGPATH=devel/p5-mod{i}\nDEPENDS=libffi>=3\n"
+        records["py-glob-1.0"] = "PKGNAME=py-glob-1.0\nPKGPATH=devel/py-glob\nDEPENDS=py31[0-9]-six-[0-9]*\n"
+        self.summary.write_bytes(gzip.compress(summary_text(records).encode()))
+        self.index.ingest(str(self.summary))
+        self.assertEqual(len(self.index.search("libffi", field="depends")), 1502)
+        self.assertEqual([pkg["pkgname"] for pkg in self.index.search("py312-six", field="depends")], ["py-glob-1.0"])
+
+    def test_delta_refresh(self):
+        self.index.ingest(str(self.summary))
+        self.assertEqual(self.index.ingest(str(self.summary))["unchanged"], 3)
+
+        records = dict(RECORDS)
+        del records["libffi-3.4.6"]
+        records["py312-six-1.16.0"] = records["py312-six-1.16.0"].replace("utilities", "library")
+        records["zstd-1.5.6"] = "PKGNAME=zstd-1.5.6\nPKGPATH=archivers/zstd\nCATEGORIES=archivers\nCOMMENT=Zstandard\n"
+        self.summary.write_bytes(gzip.compress(summary_text(records).encode()))
+        stats = self.index.ingest(str(self.summary))
+        self.assertEqual((stats["added"], stats["updated"], stats["removed"], stats["unchanged"]), (1, 1, 1, 1))
+        self.assertIsNone(self.index.get("libffi"))
+        self.assertEqual(self.index.search("library", field="comment")[0]["pkgname"], "py312-six-1.16.0")
+        self.assertEqual(self.index.search("devel", field="category"), [])
+        self.assertEqual(len(self.index), 3)
+
+    def test_refresh_from_repository(self):
+        repo = self.base / "All"
+        repo.mkdir()
+        (repo / "pkg_summary.gz").write_bytes(self.summary.read_bytes())
+        handler = partial(SimpleHTTPRequestHandler, directory=str(self.base))
+        handler.log_message = lambda *args: None
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        fetcher = Fetcher(max_workers=2, timeout=5)
+        cache = HttpCache(str(self.base / "cache"), fetcher=fetcher)
+        try:
+            index = SummaryIndex(f"http://127.0.0.1:{server.server_address[1]}/All",
+                                 index_path=self.base / "remote.db")
+            self.assertEqual(index.refresh(cache=cache)["added"], 3)
+            self.assertEqual(index.refresh(cache=cache)["unchanged"], 3)
+            index.close()
+        finally:
+            cache.close()
+            fetcher.close()
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
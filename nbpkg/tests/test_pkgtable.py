@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from nbpkg.pkginspect import pkgindex
+from nbpkg.pkginspect.nbpkgdescr import PkgDetails, PkgQuery
+from nbpkg.pkginspect.pkgindex import PkgIndex
+from nbpkg.pkginspect.pkgtable import DetailsTable
+from nbpkg.tests.test_pkgindex import fake_extract
+
+
+def record(name, category="devel"):
+    return {
+        "pkgname": name,
+        "version": "1.0",
+        "categories": [category],
+        "maintainer": "pkgsrc-users@NetBSD.org",
+        "license": "modified-bsd",
+        "build_info": {"OPSYS": "NetBSD", "MACHINE_ARCH": "x86_64"},
+        "files": [f"bin/{name}"],
+    }
+
+
+class TestDetailsTable(unittest.TestCase):
+    def test_views(self):
+        table = DetailsTable(PkgDetails)
+        table.extend([record("gmake"), PkgDetails(**record("zstd", category="archivers")), {"error": "cassé"}])
+        self.assertEqual(len(table), 3)
+        view = table[1]
+        self.assertEqual(view.pkgname, "zstd")
+        self.assertEqual(view.categories, ["archivers"])
+        self.assertEqual(view.build_info, {"OPSYS": "NetBSD", "MACHINE_ARCH": "x86_64"})
+        self.assertIsNone(view.comment)
+        self.assertEqual(view.to_details(), PkgDetails(**record("zstd", category="archivers")))
+        self.assertEqual(table[-1].error, "cassé")
+        self.assertEqual([item.pkgname for item in table], ["gmake", "zstd", None])
+        view.comment = "Compression rapide"
+        self.assertEqual(table.to_details(1).comment, "Compression rapide")
+        self.assertIsNone(table[0].comment)
+        with self.assertRaises(AttributeError):
+            view.unknown
+
+    def test_shared_values(self):
+        table = DetailsTable(PkgDetails)
+        for name in ("a", "b"):
+            # Chaînes égales mais distinctes, comme après lecture de fichiers
+            table.append({key: "".join(list(value)) if isinstance(value, str) else value
+                          for key, value in record(name).items()})
+        maintainers = table.column("maintainer")
+        self.assertIs(maintainers[0], maintainers[1])
+        self.assertIs(table.column("categories")[0], table.column("categories")[1])
+        self.assertIs(table.column("build_info")[0], table.column("build_info")[1])
+        self.assertIsInstance(table.column("files")[0], tuple)
+        self.assertEqual(table.column("homepage"), [None, None])
+
+    def test_tree_table(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(pkgindex, "extract_package", side_effect=fake_extract), \
+                mock.patch.object(pkgindex, "local_roots", return_value=[str(Path(tmp) / "pkgsrc")]):
+            root = Path(tmp) / "pkgsrc"
+            for path in ("lang/python311", "lang/perl5", "editors/gedit"):
+                (root / path).mkdir(parents=True)
+                (root / path / "Makefile").write_text("# test\n")
+            index_path = str(Path(tmp) / "index.db")
+            index = PkgIndex(roots=[str(root)], index_path=index_path)
+            index.reindex()
+            index.close()
+            table = PkgQuery.tree_table(category="lang", index_path=index_path)
+        self.assertEqual([(item.origin, item.pkgname, item.version) for item in table],
+                         [("lang/perl5", "perl5", "1.0"), ("lang/python311", "python311", "1.0")])
+        self.assertEqual(table[0].categories, ["lang"])
+
+    def test_tree_table_without_writable_index(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(pkgindex, "extract_package", side_effect=fake_extract), \
+                mock.patch.object(pkgindex, "local_roots", return_value=[str(Path(tmp) / "pkgsrc")]):
+            root = Path(tmp) / "pkgsrc"
+            for path in ("lang/python311", "lang/perl5", "editors/gedit"):
+                (root / path).mkdir(parents=True)
+                (root / path / "Makefile").write_text("# test\n")
+            (Path(tmp) / "fichier").write_text("")
+            table = PkgQuery.tree_table(category="lang", index_path=str(Path(tmp) / "fichier" / "index.db"))
+        self.assertEqual([(item.origin, item.pkgname) for item in table],
+                         [("lang/perl5", "perl5"), ("lang/python311", "python311")])
+
+
+if __name__ == "__main__":
+    unittest.main()
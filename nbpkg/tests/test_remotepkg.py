@@ -0,0 +1,131 @@
+import gzip
+import io
+import re
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from nbpkg.common.nberrors import NetworkError
+from nbpkg.pkginspect.fetch import Fetcher
+from nbpkg.pkginspect.remotepkg import RangeReader, inspect_remote
+from nbpkg.tests.test_binpkg import build_package
+
+
+class PackageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        body = server.files.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        match = re.match(r"bytes=(\d+)-(\d*)$", self.headers.get("Range", ""))
+        # server.ranges : True, ou nombre de requêtes servies par plages avant de répondre 200
+        if server.ranges and match and (server.ranges is True or len(server.requests) < server.ranges):
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(body) - 1), len(body) - 1)
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            chunk = body[start:end + 1]
+            self.send_response(206)
+            # server.shift : serveur défaillant qui renvoie une autre plage que celle demandée
+            self.send_header("Content-Range", f"bytes {start + server.shift}-{end + server.shift}/{len(body)}")
+        else:
+            chunk = body
+            self.send_response(200)
+        if server.encoding:
+            # Archive .tgz servie comme gzip encodé : le corps ne doit pas être décodé
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(chunk)))
+        self.end_headers()
+        server.requests.append(self.headers.get("Range"))
+        try:
+            for offset in range(0, len(chunk), 65536):
+                self.wfile.write(chunk[offset:offset + 65536])
+                server.sent += min(65536, len(chunk) - offset)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(files, ranges=True, encoding=False, shift=0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PackageHandler)
+    server.files, server.ranges = files, ranges
+    server.encoding, server.shift = encoding, shift
+    server.requests, server.sent = [], 0
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class TestRemotePkg(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = Path(self.tmp.name) / "zstd-1.5.6.tgz"
+        build_package(path, gzip.compress)
+        self.files = {"/All/zstd-1.5.6.tgz": path.read_bytes()}
+        self.size = len(self.files["/All/zstd-1.5.6.tgz"])
+        self.fetcher = Fetcher(max_workers=2, timeout=5)
+        self.servers = []
+
+    def tearDown(self):
+        self.fetcher.close()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.tmp.cleanup()
+
+    def inspect(self, ranges, encoding=False):
+        server, url = start_server(self.files, ranges=ranges, encoding=encoding)
+        self.servers.append(server)
+        record = inspect_remote(f"{url}/All/zstd-1.5.6.tgz", fetcher=self.fetcher)
+        self.assertEqual((record["pkgname"], record["version"]), ("zstd", "1.5.6"))
+        self.assertEqual(record["origin"], "archivers/zstd")
+        self.assertEqual(record["size"], "3145728")
+        return server, record
+
+    def test_range_requests(self):
+        server, record = self.inspect(ranges=True)
+        self.assertTrue(record["ranged"])
+        self.assertTrue(all(header.startswith("bytes=") for header in server.requests))
+        self.assertLess(server.sent, self.size // 4)
+        self.assertEqual(record["bytes_read"], server.sent)
+
+    def test_streamed_fallback(self):
+        server, record = self.inspect(ranges=False)
+        self.assertFalse(record["ranged"])
+        self.assertEqual(len(server.requests), 1)
+        self.assertLess(record["bytes_read"], self.size // 4)
+
+    def test_content_encoding(self):
+        body = self.files["/All/zstd-1.5.6.tgz"]
+        for ranges in (True, 2):
+            server, url = start_server(self.files, ranges=ranges, encoding=True)
+            self.servers.append(server)
+            reader = io.BufferedReader(RangeReader(f"{url}/All/zstd-1.5.6.tgz", fetcher=self.fetcher, chunk_size=1024))
+            self.assertEqual(reader.read(8192), body[:8192])
+            reader.close()
+
+    def test_unexpected_range(self):
+        server, url = start_server(self.files, shift=1)
+        self.servers.append(server)
+        with self.assertRaises(NetworkError):
+            inspect_remote(f"{url}/All/zstd-1.5.6.tgz", fetcher=self.fetcher)
+
+    def test_missing_package(self):
+        server, url = start_server({})
+        self.servers.append(server)
+        with self.assertRaises(NetworkError):
+            inspect_remote(f"{url}/All/absent-1.0.tgz", fetcher=self.fetcher)
+
+
+if __name__ == "__main__":
+    unittest.main()
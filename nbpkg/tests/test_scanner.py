@@ -0,0 +1,31 @@
+import time
+import unittest
+from nbpkg.pkginspect.scanner import scan
+
+
+def slow_square(n):
+    if n == 3:
+        raise ValueError("paquet invalide")
+    time.sleep(0.01 * (n % 4))
+    return n * n
+
+
+class TestScanner(unittest.TestCase):
+    def check(self, **kwargs):
+        results = list(scan(slow_square, range(12), **kwargs))
+        self.assertEqual([item for item, _, _ in results], list(range(12)))
+        self.assertEqual(results[5], (5, 25, None))
+        self.assertEqual(results[3], (3, None, "paquet invalide"))
+
+    def test_sequential(self):
+        self.check(jobs=1)
+
+    def test_threads(self):
+        self.check(jobs=4)
+
+    def test_processes(self):
+        self.check(jobs=2, processes=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
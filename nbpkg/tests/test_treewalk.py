@@ -0,0 +1,58 @@
+import os
+import unittest
+import tempfile
+from pathlib import Path
+from nbpkg.pkginspect.treewalk import walk_tree
+from nbpkg.pkginspect.pathmap import PackagePathMap
+
+
+class TreeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        for path in ("lang/python311", "lang/perl5", "lang/CVS", "net/curl", "mk/bsd.pkg.mk.d",
+                     "doc/guide", "distfiles/x", "CVS/Root", "wip/perl5"):
+            (self.base / path).mkdir(parents=True)
+        (self.base / "lang" / "Makefile").write_text("SUBDIR+= perl5\n")
+        (self.base / "README").write_text("pkgsrc\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class TestTreeWalk(TreeTestCase):
+    def test_walk_skips_non_packages(self):
+        found = sorted((cat, name) for cat, name, _ in walk_tree(str(self.base)))
+        self.assertEqual(found, [("lang", "perl5"), ("lang", "python311"), ("net", "curl"), ("wip", "perl5")])
+
+    def test_walk_yields_paths(self):
+        for cat, name, path in walk_tree(str(self.base)):
+            self.assertEqual(path, os.path.join(str(self.base), cat, name))
+
+    def test_filters(self):
+        self.assertEqual(sorted(c for c, _, _ in walk_tree(str(self.base), package="perl5")), ["lang", "wip"])
+        self.assertEqual([n for _, n, _ in walk_tree(str(self.base), categories=["net"])], ["curl"])
+        self.assertEqual(list(walk_tree(str(self.base / "missing"))), [])
+
+
+class TestPackagePathMap(TreeTestCase):
+    def tearDown(self):
+        PackagePathMap.invalidate()
+        super().tearDown()
+
+    def test_lookup_prefers_main_tree(self):
+        path_map = PackagePathMap([str(self.base)])
+        self.assertEqual(path_map.lookup("perl5"), self.base / "lang" / "perl5")
+        self.assertEqual(path_map.lookup("curl"), self.base / "net" / "curl")
+        self.assertIsNone(path_map.lookup("ruby"))
+        self.assertEqual(path_map.collisions(), {"perl5": ["lang/perl5", "wip/perl5"]})
+
+    def test_shared_between_callers(self):
+        first = PackagePathMap.for_roots([str(self.base)])
+        self.assertIs(PackagePathMap.for_roots([str(self.base) + "/"]), first)
+        PackagePathMap.invalidate()
+        self.assertIsNot(PackagePathMap.for_roots([str(self.base)]), first)
+
+
+if __name__ == "__main__":
+    unittest.main()